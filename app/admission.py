@@ -0,0 +1,91 @@
+import asyncio
+import math
+from contextlib import asynccontextmanager
+
+
+class AdmissionRejected(Exception):
+    """The render queue is full; the client should retry later"""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Render queue is full, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+class ClientDisconnected(Exception):
+    """The client went away while its request waited for a render slot"""
+
+
+class AdmissionController:
+    """
+    Bounded render queue in front of the render pool.
+
+    At most ``capacity`` requests render at once and at most ``max_queue_depth``
+    more wait for a slot; anything beyond that is rejected immediately with a
+    ``Retry-After`` estimated from an exponential moving average of observed
+    render times.
+    """
+
+    def __init__(self, capacity: int, max_queue_depth: int, initial_render_seconds: float = 1.0,
+                 smoothing: float = 0.2):
+        self.capacity = max(1, capacity)
+        self.max_queue_depth = max(0, max_queue_depth)
+        self.avg_render_seconds = initial_render_seconds
+        self.smoothing = smoothing
+        self.in_flight = 0
+        self.active = 0
+        self.rejected = 0
+        self._semaphore = asyncio.Semaphore(self.capacity)
+
+    @property
+    def queue_depth(self) -> int:
+        """Requests admitted and waiting for a render slot"""
+        return self.in_flight - self.active
+
+    @property
+    def free_capacity(self) -> int:
+        """Requests that can still be admitted before rejecting"""
+        return max(0, self.capacity + self.max_queue_depth - self.in_flight)
+
+    def observe(self, seconds: float):
+        """Feed a render duration into the moving average"""
+        self.avg_render_seconds += self.smoothing * (seconds - self.avg_render_seconds)
+
+    def retry_after(self) -> int:
+        """Seconds until the current backlog is expected to drain"""
+        backlog = self.queue_depth + 1
+        return max(1, math.ceil(self.avg_render_seconds * backlog / self.capacity))
+
+    @asynccontextmanager
+    async def admit(self, reject: bool = True):
+        """
+        Hold a render slot for the duration of the block, or raise ``AdmissionRejected``.
+
+        With ``reject=False`` the caller (e.g. a background job) always waits
+        for a slot instead; it still counts towards the queue seen by others.
+        """
+        if reject and self.free_capacity == 0:
+            self.rejected += 1
+            raise AdmissionRejected(self.retry_after())
+
+        self.in_flight += 1
+        try:
+            async with self._semaphore:
+                self.active += 1
+                try:
+                    yield
+                finally:
+                    self.active -= 1
+        finally:
+            self.in_flight -= 1
+
+    def stats(self) -> dict:
+        return {
+            "capacity": self.capacity,
+            "max_queue_depth": self.max_queue_depth,
+            "in_flight": self.in_flight,
+            "rendering": self.active,
+            "queue_depth": self.queue_depth,
+            "free_capacity": self.free_capacity,
+            "rejected": self.rejected,
+            "avg_render_seconds": round(self.avg_render_seconds, 3),
+        }
@@ -0,0 +1,183 @@
+import fcntl
+import hashlib
+import mimetypes
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+from typing import Optional
+from app.models import Document
+import logging
+
+logger = logging.getLogger(__name__)
+
+_DIGEST_LENGTH = 64
+
+
+class AttachmentCache:
+    """
+    On-disk LRU of downloaded meeting documents, shared by every process on the node.
+
+    Entries are keyed by ``Document.id`` plus ``size`` and ``content_type``, so
+    a replaced document gets a new key. Each file holds the SHA-256 of its
+    payload followed by the payload; a file whose digest doesn't match is
+    treated as a miss and removed. Files are written atomically (temporary
+    file plus rename), hits refresh the file mtime, and eviction of the least
+    recently used files past ``budget_bytes`` runs under an exclusive
+    ``fcntl`` lock so concurrent workers never evict at the same time.
+    """
+
+    def __init__(self, cache_dir: str, budget_bytes: int):
+        self.cache_dir = cache_dir
+        self.budget_bytes = budget_bytes
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.corrupted = 0
+        os.makedirs(cache_dir, exist_ok=True)
+
+    @classmethod
+    def from_settings(cls, settings) -> "AttachmentCache":
+        cache_dir = settings.attachment_cache_dir or os.path.join(tempfile.gettempdir(),
+                                                                  "meeting-notice-attachments")
+        return cls(cache_dir, settings.attachment_cache_mb * 1024 * 1024)
+
+    @staticmethod
+    def make_key(document_id: str, size: int, content_type: str) -> str:
+        return hashlib.sha256(f"{document_id}\0{size}\0{content_type}".encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.bin")
+
+    @contextmanager
+    def _exclusive(self):
+        """Exclusive lock across threads and processes sharing the cache directory"""
+        with self._lock, open(os.path.join(self.cache_dir, ".lock"), "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _count(self, counter: str):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def get(self, document: Document) -> Optional[bytes]:
+        """Return the cached payload of a document, or ``None``"""
+        path = self._path(self.make_key(document.id, document.size, document.content_type))
+        try:
+            with open(path, "rb") as f:
+                content = f.read()
+            os.utime(path)
+        except FileNotFoundError:
+            self._count("misses")
+            return None
+
+        digest, payload = content[:_DIGEST_LENGTH], content[_DIGEST_LENGTH:]
+        if hashlib.sha256(payload).hexdigest().encode("ascii") != digest:
+            logger.warning(f"Removing corrupted cached attachment {document.id}")
+            self._count("corrupted")
+            self._count("misses")
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            return None
+
+        self._count("hits")
+        return payload
+
+    def _store(self, key: str, payload: bytes):
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(hashlib.sha256(payload).hexdigest().encode("ascii"))
+                f.write(payload)
+            os.replace(tmp_path, self._path(key))
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def put(self, document: Document, payload: bytes) -> bool:
+        """
+        Store a downloaded document, returning whether it was cached.
+
+        Payloads whose length differs from the declared ``Document.size`` are
+        not cached, since the key would not describe them.
+        """
+        if document.size and len(payload) != document.size:
+            logger.warning(f"Not caching attachment {document.id}: got {len(payload)} bytes, "
+                           f"expected {document.size}")
+            return False
+        if len(payload) + _DIGEST_LENGTH > self.budget_bytes:
+            return False
+        try:
+            self._store(self.make_key(document.id, document.size, document.content_type), payload)
+            self.evict()
+        except OSError as e:
+            logger.warning(f"Could not cache attachment {document.id}: {e}")
+            return False
+        return True
+
+    def evict(self) -> int:
+        """Remove least recently used files until the cache fits its budget"""
+        removed = 0
+        with self._exclusive():
+            entries = []
+            total = 0
+            for entry in os.scandir(self.cache_dir):
+                if not entry.name.endswith(".bin"):
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, entry.path, stat.st_size))
+                total += stat.st_size
+
+            for _, path, size in sorted(entries):
+                if total <= self.budget_bytes:
+                    break
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                total -= size
+                removed += 1
+        return removed
+
+    def seed(self, directory: str) -> int:
+        """
+        Pre-load the cache from a directory of files named ``<document id>.<ext>``.
+
+        The content type is guessed from the extension and the size taken from
+        the file. Documents already cached are skipped; returns how many were added.
+        """
+        added = 0
+        for entry in os.scandir(directory):
+            if not entry.is_file():
+                continue
+            document_id, _ = os.path.splitext(entry.name)
+            content_type = mimetypes.guess_type(entry.name)[0] or "application/octet-stream"
+            size = entry.stat().st_size
+            key = self.make_key(document_id, size, content_type)
+            if os.path.exists(self._path(key)):
+                continue
+            with open(entry.path, "rb") as f:
+                self._store(key, f.read())
+            added += 1
+        if added:
+            self.evict()
+        return added
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "corrupted": self.corrupted,
+                "hit_ratio": round(self.hits / lookups, 3) if lookups else None,
+            }
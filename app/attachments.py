@@ -0,0 +1,240 @@
+import asyncio
+import time
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING, Dict, List, Optional
+from urllib.parse import parse_qsl, urlsplit
+from app.attachment_cache import AttachmentCache
+from app.models import Document, MeetingNoticeRequest
+from app.net import validate_public_url
+import logging
+
+if TYPE_CHECKING:
+    import httpx
+
+logger = logging.getLogger(__name__)
+
+# Statuses worth retrying: timeouts, throttling and transient server errors
+RETRY_STATUSES = {408, 425, 429, 500, 502, 503, 504}
+MAX_REDIRECTS = 5
+
+
+class AttachmentFetchError(Exception):
+    """A meeting document could not be downloaded from its signed URL"""
+
+    def __init__(self, document: Document, message: str):
+        super().__init__(f"{document.name}: {message}")
+        self.document = document
+
+
+def meeting_documents(request: MeetingNoticeRequest) -> List[Document]:
+    """Documents of the meeting and of its points, without repeats, in notice order"""
+    documents = {}
+    for document in request.meeting.documents:
+        documents.setdefault(document.id, document)
+    for point in request.meeting.meeting_points:
+        for document in point.documents:
+            documents.setdefault(document.id, document)
+    return list(documents.values())
+
+
+def _parse_utc(value: str, fmt: str) -> float:
+    return datetime.strptime(value, fmt).replace(tzinfo=timezone.utc).timestamp()
+
+
+def signed_url_expiry(url: str) -> Optional[float]:
+    """
+    Unix time at which a pre-signed URL stops working, or ``None`` if unknown.
+
+    Understands S3/GCS V4 signatures (``X-Amz-Date``/``X-Goog-Date`` plus
+    ``*-Expires`` seconds), V2 signatures and CloudFront (``Expires`` epoch)
+    and Azure SAS tokens (``se`` timestamp).
+    """
+    params = {name.lower(): value for name, value in parse_qsl(urlsplit(url).query)}
+    try:
+        for prefix in ("x-amz", "x-goog"):
+            if f"{prefix}-date" in params and f"{prefix}-expires" in params:
+                signed_at = _parse_utc(params[f"{prefix}-date"], "%Y%m%dT%H%M%SZ")
+                return signed_at + int(params[f"{prefix}-expires"])
+        if "expires" in params:
+            return float(params["expires"])
+        if "se" in params:
+            expiry = datetime.fromisoformat(params["se"].replace("Z", "+00:00"))
+            if expiry.tzinfo is None:
+                expiry = expiry.replace(tzinfo=timezone.utc)
+            return expiry.timestamp()
+    except ValueError:
+        logger.warning(f"Unreadable expiry in signed URL for host {urlsplit(url).netloc}")
+    return None
+
+
+class AttachmentFetcher:
+    """
+    Downloads meeting documents concurrently over a pooled async HTTP client.
+
+    At most ``concurrency`` downloads run at once and at most ``per_host_limit``
+    against the same host. Network errors and transient statuses are retried
+    with exponential backoff (honouring ``Retry-After``), but never past the
+    expiry of the signed URL: an expired URL fails at once instead of being
+    retried into a guaranteed 403. With a ``cache``, documents already on disk
+    are served from it without touching the network.
+
+    Signed URLs come from the caller, so every URL and every redirect hop must
+    resolve to public addresses unless ``allow_private_hosts`` is set;
+    redirects are followed by hand, up to ``MAX_REDIRECTS``.
+    """
+
+    def __init__(self, concurrency: int = 8, per_host_limit: int = 4, retries: int = 3,
+                 backoff: float = 0.5, timeout: float = 30.0, max_bytes: int = 50 * 1024 * 1024,
+                 cache: Optional[AttachmentCache] = None, allow_private_hosts: bool = False):
+        self.concurrency = max(1, concurrency)
+        self.per_host_limit = max(1, per_host_limit)
+        self.retries = max(1, retries)
+        self.backoff = backoff
+        self.timeout = timeout
+        self.max_bytes = max_bytes
+        self.cache = cache
+        self.allow_private_hosts = allow_private_hosts
+
+        self._client = None
+        self._semaphore = None
+        self._host_semaphores = {}
+
+    @classmethod
+    def from_settings(cls, settings) -> "AttachmentFetcher":
+        return cls(
+            concurrency=settings.attachment_fetch_concurrency,
+            per_host_limit=settings.attachment_per_host_limit,
+            retries=settings.attachment_retries,
+            backoff=settings.attachment_retry_backoff_seconds,
+            timeout=settings.attachment_timeout_seconds,
+            max_bytes=settings.attachment_max_mb * 1024 * 1024,
+            cache=AttachmentCache.from_settings(settings) if settings.attachment_cache_enabled else None,
+            allow_private_hosts=settings.attachment_allow_private_hosts,
+        )
+
+    def _get_client(self) -> "httpx.AsyncClient":
+        # httpx is only loaded once something is actually downloaded
+        import httpx
+
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout,
+                follow_redirects=False,
+                limits=httpx.Limits(max_connections=self.concurrency,
+                                    max_keepalive_connections=self.concurrency),
+            )
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        return self._client
+
+    def _host_semaphore(self, host: str) -> asyncio.Semaphore:
+        if host not in self._host_semaphores:
+            self._host_semaphores[host] = asyncio.Semaphore(self.per_host_limit)
+        return self._host_semaphores[host]
+
+    async def aclose(self):
+        """Close the pooled client and its connections"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+            self._host_semaphores = {}
+
+    async def _check_url(self, document: Document, url: str):
+        loop = asyncio.get_running_loop()
+        try:
+            await loop.run_in_executor(None, validate_public_url, url, self.allow_private_hosts)
+        except ValueError as e:
+            raise AttachmentFetchError(document, f"URL not allowed ({e})")
+
+    async def _download(self, client: "httpx.AsyncClient", document: Document, url: str) -> bytes:
+        for _ in range(MAX_REDIRECTS + 1):
+            await self._check_url(document, url)
+            async with client.stream("GET", url) as response:
+                if response.is_redirect:
+                    await response.aread()
+                    url = str(response.url.join(response.headers["Location"]))
+                    continue
+                return await self._read_body(document, response)
+        raise AttachmentFetchError(document, f"more than {MAX_REDIRECTS} redirects")
+
+    async def _read_body(self, document: Document, response: "httpx.Response") -> bytes:
+        import httpx
+
+        if response.status_code != 200:
+            await response.aread()
+            raise httpx.HTTPStatusError(f"HTTP {response.status_code}", request=response.request,
+                                        response=response)
+        chunks = []
+        received = 0
+        async for chunk in response.aiter_bytes():
+            received += len(chunk)
+            if received > self.max_bytes:
+                raise AttachmentFetchError(document, f"exceeds {self.max_bytes} bytes")
+            chunks.append(chunk)
+        return b"".join(chunks)
+
+    async def fetch(self, document: Document) -> bytes:
+        """Return one document from the cache or download it, retrying transient failures"""
+        loop = asyncio.get_running_loop()
+        if self.cache is not None:
+            payload = await loop.run_in_executor(None, self.cache.get, document)
+            if payload is not None:
+                return payload
+
+        payload = await self._fetch_remote(document)
+        if self.cache is not None:
+            await loop.run_in_executor(None, self.cache.put, document, payload)
+        return payload
+
+    async def _fetch_remote(self, document: Document) -> bytes:
+        """Download one document, retrying transient failures while its URL is valid"""
+        import httpx
+
+        url = document.signed_url
+        if not url:
+            raise AttachmentFetchError(document, "no signed URL")
+        client = self._get_client()
+        expires_at = signed_url_expiry(url)
+        host = urlsplit(url).netloc
+
+        last_error = None
+        for attempt in range(1, self.retries + 1):
+            if expires_at is not None and time.time() >= expires_at:
+                raise AttachmentFetchError(document, "signed URL expired")
+
+            delay = self.backoff * 2 ** (attempt - 1)
+            try:
+                async with self._semaphore, self._host_semaphore(host):
+                    return await self._download(client, document, url)
+            except httpx.HTTPStatusError as e:
+                status = e.response.status_code
+                if status not in RETRY_STATUSES:
+                    raise AttachmentFetchError(document, f"HTTP {status}")
+                last_error = f"HTTP {status}"
+                retry_after = e.response.headers.get("Retry-After", "")
+                if retry_after.isdigit():
+                    delay = max(delay, int(retry_after))
+            except httpx.TransportError as e:
+                last_error = str(e) or type(e).__name__
+
+            if attempt < self.retries:
+                if expires_at is not None and time.time() + delay >= expires_at:
+                    raise AttachmentFetchError(document, f"signed URL expires before retry ({last_error})")
+                logger.warning(f"Attachment {document.id} failed (attempt {attempt}/{self.retries}): {last_error}")
+                await asyncio.sleep(delay)
+
+        raise AttachmentFetchError(document, f"failed after {self.retries} attempts ({last_error})")
+
+    async def fetch_all(self, documents: List[Document]) -> Dict[str, bytes]:
+        """
+        Download every document concurrently, returning payloads by document id.
+
+        All downloads run to completion; the first failure is raised afterwards.
+        """
+        self._get_client()
+        unique = list({document.id: document for document in documents}.values())
+        results = await asyncio.gather(*[self.fetch(document) for document in unique],
+                                       return_exceptions=True)
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+        return {document.id: payload for document, payload in zip(unique, results)}
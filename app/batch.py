@@ -0,0 +1,151 @@
+import asyncio
+import json
+import tempfile
+import zipfile
+from typing import AsyncIterator, Awaitable, Callable, Iterable, Tuple
+from pydantic import ValidationError
+from app.models import MeetingNoticeRequest
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class _ChunkSink:
+    """Write-only, unseekable file object collecting what ZipFile writes"""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data: bytes) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+async def iter_json_items(items: list) -> AsyncIterator[Tuple[int, object]]:
+    """Yield ``(index, item)`` pairs from an already parsed JSON list"""
+    for index, item in enumerate(items):
+        yield index, item
+
+
+async def iter_ndjson_items(lines: Iterable[bytes]) -> AsyncIterator[Tuple[int, object]]:
+    """
+    Yield ``(index, item)`` pairs from NDJSON lines, one line at a time.
+
+    A line that is not valid UTF-8 JSON is yielded as the ``ValueError``
+    (``json.JSONDecodeError`` or ``UnicodeDecodeError``) raised for it, so the
+    caller can report it without failing the batch.
+    """
+    index = 0
+    for line in lines:
+        if not line.strip():
+            continue
+        try:
+            yield index, json.loads(line)
+        except ValueError as e:
+            yield index, e
+        index += 1
+
+
+async def spool_body(stream: AsyncIterator[bytes], max_memory_bytes: int):
+    """
+    Copy a request body into a temporary file that spills to disk past
+    ``max_memory_bytes``, rewound and ready to be read line by line.
+
+    The body has to be consumed before a streaming response starts, because
+    the response listens on the same ASGI channel for client disconnects.
+    """
+    spool = tempfile.SpooledTemporaryFile(max_size=max_memory_bytes)
+    async for chunk in stream:
+        spool.write(chunk)
+    spool.seek(0)
+    return spool
+
+
+def entry_name(index: int, meeting_id: str) -> str:
+    return f"{index:04d}_convocatoria_reunion_{meeting_id}.pdf"
+
+
+async def stream_batch_zip(
+    items: AsyncIterator[Tuple[int, object]],
+    render: Callable[[MeetingNoticeRequest], Awaitable[bytes]],
+    concurrency: int,
+) -> AsyncIterator[bytes]:
+    """
+    Render batch items in parallel and stream a ZIP archive as they finish.
+
+    At most ``concurrency`` renders are in flight, so memory is bounded by the
+    in-flight set rather than the batch size. Each PDF is written to the
+    archive as soon as it is ready; a ``manifest.json`` entry with per-item
+    status and errors closes the archive. A failing item never fails the batch.
+    """
+    sink = _ChunkSink()
+    archive = zipfile.ZipFile(sink, mode="w", compression=zipfile.ZIP_STORED)
+    manifest = []
+    pending = {}
+
+    def collect(task: asyncio.Task):
+        index, meeting_id = pending.pop(task)
+        entry = {"index": index, "meeting_id": meeting_id}
+        try:
+            pdf_bytes = task.result()
+        except Exception as e:
+            logger.error(f"Batch item {index} (meeting ID {meeting_id}) failed: {str(e)}")
+            entry.update(status="error", error=str(e))
+        else:
+            name = entry_name(index, meeting_id)
+            archive.writestr(name, pdf_bytes)
+            entry.update(status="ok", file=name, size=len(pdf_bytes))
+        manifest.append(entry)
+
+    async def wait_for_slot(limit: int):
+        while len(pending) > limit:
+            done, _ = await asyncio.wait(list(pending), return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                collect(task)
+
+    try:
+        async for index, item in items:
+            if isinstance(item, Exception):
+                manifest.append({"index": index, "status": "error", "error": f"JSON inválido: {item}"})
+                continue
+            try:
+                request = MeetingNoticeRequest.model_validate(item)
+            except ValidationError as e:
+                manifest.append({"index": index, "status": "error", "error": str(e)})
+                continue
+
+            task = asyncio.create_task(render(request))
+            pending[task] = (index, request.meeting.id)
+            await wait_for_slot(concurrency - 1)
+            data = sink.drain()
+            if data:
+                yield data
+
+        while pending:
+            await wait_for_slot(len(pending) - 1)
+            data = sink.drain()
+            if data:
+                yield data
+
+        manifest.sort(key=lambda entry: entry["index"])
+        succeeded = sum(1 for entry in manifest if entry["status"] == "ok")
+        summary = {
+            "total": len(manifest),
+            "succeeded": succeeded,
+            "failed": len(manifest) - succeeded,
+            "items": manifest,
+        }
+        archive.writestr("manifest.json", json.dumps(summary, ensure_ascii=False, indent=2))
+        archive.close()
+        yield sink.drain()
+    finally:
+        for task in pending:
+            task.cancel()
@@ -2,17 +2,28 @@
 """
 CLI tool for generating meeting notice PDFs from JSON data.
 Usage: python -m app.cli --json-file data.json --output output.pdf
+       python -m app.cli --batch ./meetings/ --jobs 4 --output-dir ./pdfs/
+       producer | python -m app.cli --stream --jobs 4 > pdfs.tar
+       python -m app.cli --validate export.ndjson --jobs 4 --report errors.ndjson
+       python -m app.cli --daemon &   # later invocations render in the resident daemon
 """
 
 import argparse
 import json
+import multiprocessing
 import sys
 import os
 from pathlib import Path
-from app.models import MeetingNoticeRequest
-from app.pdf_generator import PDFGenerator
+from app.cli_daemon import DaemonUnavailable, call_daemon, default_socket_path
+from app.config import settings
+from app.mail_merge import recipient_file_name
+from app.models import MeetingNoticeRequest, Recipient
+from app.sections import SECTIONS, sections_with_content
 import logging
 
+# Rendering modules (WeasyPrint, the render pool, httpx, asyncio) are imported where
+# they are used, so --help, argument errors and renders sent to the daemon start fast.
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -66,8 +77,38 @@ def validate_data(data: dict) -> bool:
     return True
 
 
-def generate_pdf_from_json(json_data: dict, output_file: str) -> bool:
-    """Generate PDF from JSON data"""
+async def _fetch_attachments(meeting_request: MeetingNoticeRequest) -> dict:
+    """Download the meeting documents to embed them in the PDF"""
+    from app.attachments import AttachmentFetcher, meeting_documents
+
+    fetcher = AttachmentFetcher.from_settings(settings)
+    if settings.attachment_cache_seed_dir and fetcher.cache is not None:
+        fetcher.cache.seed(settings.attachment_cache_seed_dir)
+    try:
+        return await fetcher.fetch_all(meeting_documents(meeting_request))
+    finally:
+        await fetcher.aclose()
+
+
+def _render(method: str, *args, daemon_socket: str = None, timeout: float = None, **kwargs):
+    """Run a ``PDFGenerator`` method in the resident daemon if one is listening, in-process otherwise"""
+    if daemon_socket:
+        try:
+            result = call_daemon(daemon_socket, method, *args, timeout=timeout, **kwargs)
+            logger.debug(f"Rendered by the daemon on {daemon_socket}")
+            return result
+        except DaemonUnavailable as e:
+            logger.debug(f"Rendering in-process: {e}")
+    
+    # Imported here so renders forwarded to the daemon don't load WeasyPrint
+    from app.pdf_generator import PDFGenerator
+    return getattr(PDFGenerator(), method)(*args, **kwargs)
+
+
+def generate_pdf_from_json(json_data: dict, output_file: str, deterministic: bool = None,
+                           sections: list = None, embed_attachments: bool = False,
+                           daemon_socket: str = None) -> bool:
+    """Generate PDF from JSON data, optionally only some sections of the notice"""
     try:
         # Validate data
         if not validate_data(json_data):
@@ -76,12 +117,21 @@ def generate_pdf_from_json(json_data: dict, output_file: str) -> bool:
         # Create MeetingNoticeRequest object
         meeting_request = MeetingNoticeRequest(**json_data)
         
-        # Initialize PDF generator
-        pdf_generator = PDFGenerator()
+        if sections is not None and not sections_with_content(meeting_request, sections):
+            logger.error(f"None of the sections {', '.join(sections)} has content for this meeting")
+            return False
+        
+        attachments = None
+        if embed_attachments:
+            import asyncio
+            from app.attachments import meeting_documents
+            logger.info(f"Downloading {len(meeting_documents(meeting_request))} attachments")
+            attachments = asyncio.run(_fetch_attachments(meeting_request))
         
         # Generate PDF
         logger.info(f"Generating PDF for meeting ID: {meeting_request.meeting.id}")
-        pdf_bytes = pdf_generator.generate_meeting_notice_pdf(meeting_request)
+        pdf_bytes = _render("generate_meeting_notice_pdf", meeting_request, daemon_socket=daemon_socket,
+                            deterministic=deterministic, sections=sections, attachments=attachments)
         
         # Write to output file
         with open(output_file, 'wb') as f:
@@ -95,8 +145,49 @@ def generate_pdf_from_json(json_data: dict, output_file: str) -> bool:
         return False
 
 
+def generate_mail_merge_from_json(json_data: dict, recipients_data: list, output_dir: str,
+                                  merged_output: str = None, deterministic: bool = None,
+                                  daemon_socket: str = None) -> bool:
+    """Generate one personalised PDF per recipient, or a single print file if ``merged_output`` is set"""
+    try:
+        # Validate data
+        if not validate_data(json_data):
+            return False
+        
+        meeting_request = MeetingNoticeRequest(**json_data)
+        recipients = [Recipient(**recipient) for recipient in recipients_data]
+        if not recipients:
+            logger.error("The recipients file has no recipients")
+            return False
+        
+        logger.info(f"Generating mail merge of {len(recipients)} copies for meeting ID: {meeting_request.meeting.id}")
+        timeout = settings.render_timeout_seconds + settings.mail_merge_seconds_per_recipient * len(recipients)
+        
+        if merged_output:
+            pdf_bytes = _render("generate_mail_merge_print_file", meeting_request, recipients,
+                                daemon_socket=daemon_socket, timeout=timeout, deterministic=deterministic)
+            with open(merged_output, 'wb') as f:
+                f.write(pdf_bytes)
+            return True
+        
+        output_path = Path(output_dir)
+        output_path.mkdir(parents=True, exist_ok=True)
+        pdfs = _render("generate_mail_merge_pdfs", meeting_request, recipients,
+                       daemon_socket=daemon_socket, timeout=timeout, deterministic=deterministic)
+        for index, (recipient, pdf_bytes) in enumerate(zip(recipients, pdfs)):
+            with open(output_path / recipient_file_name(index, meeting_request.meeting.id, recipient), 'wb') as f:
+                f.write(pdf_bytes)
+        return True
+        
+    except Exception as e:
+        logger.error(f"Error generating mail merge: {e}")
+        return False
+
+
 def main():
     """Main CLI function"""
+    # The one-file executable starts render workers with spawn; they must not run the CLI again
+    multiprocessing.freeze_support()
     parser = argparse.ArgumentParser(
         description="Generate meeting notice PDF from JSON data",
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -110,15 +201,79 @@ Examples:
   
   # Generate PDF with custom filename based on meeting ID
   python -m app.cli --json-file data.json --output-dir ./pdfs/
+  
+  # Batch: every .json file in a directory (or a glob, or an NDJSON file) with 4 workers
+  python -m app.cli --batch ./meetings/ --jobs 4 --output-dir ./pdfs/
+  python -m app.cli --batch meetings.ndjson --jobs 4 --output-dir ./pdfs/
+  
+  # Stream: one request per line on stdin, a tar of PDFs on stdout
+  producer | python -m app.cli --stream --jobs 4 --errors errors.ndjson | tar -x -C ./pdfs/
+  
+  # Only the voting sheet and the proxy form
+  python -m app.cli --json-file data.json --sections voting_sheet proxy_form --output hoja.pdf
+  
+  # Mail merge: one personalised PDF per owner
+  python -m app.cli --json-file data.json --recipients owners.json --output-dir ./pdfs/
+  
+  # Mail merge: a single print file with every owner's copy
+  python -m app.cli --json-file data.json --recipients owners.json --merged --output print.pdf
+  
+  # Validate inputs without rendering: every error of every record, as NDJSON
+  python -m app.cli --validate export.ndjson --jobs 4 --report errors.ndjson
+  python -m app.cli --validate ./meetings/ data.json
+  
+  # Resident daemon: later invocations forward their render to it (and render
+  # in-process when it isn't running)
+  python -m app.cli --daemon --jobs 2
         """
     )
     
     parser.add_argument(
         '--json-file', '-j',
-        required=True,
         help='JSON file with meeting data (use "-" for stdin)'
     )
     
+    parser.add_argument(
+        '--batch', '-b',
+        help='Render many notices: a directory of .json files, a glob pattern or an NDJSON file'
+    )
+    
+    parser.add_argument(
+        '--stream',
+        action='store_true',
+        help='Read one JSON request per line from stdin and write a tar stream of PDFs to stdout'
+    )
+    
+    parser.add_argument(
+        '--validate',
+        nargs='+',
+        metavar='INPUT',
+        help='Only validate these inputs (files, directories, globs, NDJSON, "-" for stdin) and report every error'
+    )
+    
+    parser.add_argument(
+        '--report',
+        help='With --validate, write the NDJSON error report to this file instead of stdout'
+    )
+    
+    parser.add_argument(
+        '--completion-order',
+        action='store_true',
+        help='With --stream, write each PDF as soon as it is ready instead of in input order'
+    )
+    
+    parser.add_argument(
+        '--errors',
+        help='With --stream, write failed lines as JSON to this file instead of stderr'
+    )
+    
+    parser.add_argument(
+        '--jobs', '-J',
+        type=int,
+        default=1,
+        help='Processes for --batch, --stream, --validate and --daemon (default: 1)'
+    )
+    
     parser.add_argument(
         '--output', '-o',
         help='Output PDF file path'
@@ -129,6 +284,54 @@ Examples:
         help='Output directory (filename will be auto-generated based on meeting ID)'
     )
     
+    parser.add_argument(
+        '--deterministic',
+        action='store_true',
+        default=None,
+        help='Produce byte-identical PDFs for identical input (generation date from the payload)'
+    )
+    
+    parser.add_argument(
+        '--sections', '-s',
+        nargs='+',
+        choices=SECTIONS,
+        help='Render only these sections of the notice (default: the whole document)'
+    )
+    
+    parser.add_argument(
+        '--embed-attachments',
+        action='store_true',
+        help='Download the meeting documents from their signed URLs and embed them in the PDF'
+    )
+    
+    parser.add_argument(
+        '--recipients', '-r',
+        help='JSON file with a list of recipients (name, unit, ballot_token) for a mail merge'
+    )
+    
+    parser.add_argument(
+        '--merged',
+        action='store_true',
+        help='With --recipients, write every copy into a single print file instead of one PDF per owner'
+    )
+    
+    parser.add_argument(
+        '--daemon',
+        action='store_true',
+        help='Run a resident render daemon on a Unix socket that other invocations forward to'
+    )
+    
+    parser.add_argument(
+        '--socket',
+        help='Unix socket of the render daemon (default: PDF_CLI_SOCKET_PATH or a per-user runtime path)'
+    )
+    
+    parser.add_argument(
+        '--no-daemon',
+        action='store_true',
+        help='Always render in this process, even if a daemon is running'
+    )
+    
     parser.add_argument(
         '--verbose', '-v',
         action='store_true',
@@ -141,9 +344,76 @@ Examples:
     if args.verbose:
         logging.getLogger().setLevel(logging.DEBUG)
     
+    socket_path = args.socket or default_socket_path()
+    if args.daemon:
+        from app.cli_daemon import serve
+        try:
+            serve(socket_path, jobs=max(1, args.jobs))
+        except RuntimeError as e:
+            logger.error(str(e))
+            sys.exit(1)
+        sys.exit(0)
+    daemon_socket = None if args.no_daemon else socket_path
+    
+    if args.batch:
+        if not args.output_dir:
+            parser.error("--batch requires --output-dir")
+        from app.cli_batch import run_batch
+        summary = run_batch(args.batch, args.output_dir, jobs=max(1, args.jobs),
+                            deterministic=args.deterministic, timeout=settings.render_timeout_seconds)
+        sys.exit(1 if summary["failed"] else 0)
+    
+    if args.validate:
+        from app.cli_validate import run_validate
+        report = open(args.report, 'w', encoding='utf-8') if args.report else sys.stdout
+        try:
+            code = run_validate(args.validate, report, jobs=max(1, args.jobs))
+        finally:
+            if report is not sys.stdout:
+                report.close()
+        sys.exit(code)
+    
+    if args.stream:
+        if sys.stdout.isatty():
+            parser.error("--stream writes a tar archive to stdout; redirect or pipe it")
+        from app.cli_stream import exit_code, run_stream
+        errors = open(args.errors, 'w', encoding='utf-8') if args.errors else sys.stderr
+        try:
+            summary = run_stream(sys.stdin.buffer, sys.stdout.buffer, errors, jobs=max(1, args.jobs),
+                                 deterministic=args.deterministic, completion_order=args.completion_order,
+                                 timeout=settings.render_timeout_seconds)
+        except BrokenPipeError:
+            logger.error("Output closed before the stream finished")
+            # Keep the interpreter from failing again when it flushes stdout at exit
+            os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+            sys.exit(1)
+        finally:
+            if errors is not sys.stderr:
+                errors.close()
+        sys.exit(exit_code(summary))
+    
+    if not args.json_file:
+        parser.error("one of --json-file, --batch, --stream, --validate or --daemon is required")
+    
     # Load JSON data
     json_data = load_json_data(args.json_file)
     
+    if args.recipients:
+        recipients_data = load_json_data(args.recipients)
+        meeting_id = json_data.get('meeting', {}).get('id', 'unknown')
+        merged_output = None
+        if args.merged:
+            merged_output = args.output or f"convocatorias_reunion_{meeting_id}.pdf"
+        success = generate_mail_merge_from_json(json_data, recipients_data, args.output_dir or '.',
+                                                merged_output, deterministic=args.deterministic,
+                                                daemon_socket=daemon_socket)
+        if success:
+            logger.info("Mail merge generated successfully")
+            sys.exit(0)
+        else:
+            logger.error("Failed to generate mail merge")
+            sys.exit(1)
+    
     # Determine output file
     if args.output:
         output_file = args.output
@@ -159,7 +429,9 @@ Examples:
         output_file = f"convocatoria_reunion_{meeting_id}.pdf"
     
     # Generate PDF
-    success = generate_pdf_from_json(json_data, str(output_file))
+    success = generate_pdf_from_json(json_data, str(output_file), deterministic=args.deterministic,
+                                     sections=args.sections, embed_attachments=args.embed_attachments,
+                                     daemon_socket=daemon_socket)
     
     if success:
         logger.info(f"PDF generated successfully: {output_file}")
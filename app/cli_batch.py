@@ -0,0 +1,215 @@
+"""
+Batch mode for the CLI: render many meeting notices in one invocation.
+
+Inputs come from a directory of ``.json`` files, a glob pattern or an NDJSON
+file. Renders run in a pool of warmed-up worker processes, and every finished
+item is appended to ``manifest.ndjson`` in the output directory, so a run that
+is interrupted (or repeated) skips the inputs whose output is already there
+for the same content.
+"""
+
+import glob
+import json
+import os
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Iterator, Optional, Tuple
+from pydantic import ValidationError
+from app.config import settings
+from app.files import write_atomic
+from app.models import MeetingNoticeRequest
+from app.render_pool import RenderPool
+from app.result_cache import ResultCache
+from app.template_registry import get_registry
+import logging
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = "manifest.ndjson"
+
+
+def iter_batch_inputs(spec: str) -> Iterator[Tuple[str, object]]:
+    """
+    Yield ``(source, item)`` pairs for a directory, glob pattern or NDJSON file.
+
+    ``item`` is the parsed JSON, or the exception raised while reading it so
+    a broken input is reported without stopping the batch. NDJSON files are
+    read one line at a time.
+    """
+    if os.path.isdir(spec):
+        paths = sorted(glob.glob(os.path.join(spec, "*.json")))
+    elif glob.has_magic(spec):
+        paths = sorted(glob.glob(spec))
+    elif spec.endswith((".ndjson", ".jsonl")):
+        with open(spec, "r", encoding="utf-8") as f:
+            for line_number, line in enumerate(f, start=1):
+                if not line.strip():
+                    continue
+                source = f"{spec}:{line_number}"
+                try:
+                    yield source, json.loads(line)
+                except json.JSONDecodeError as e:
+                    yield source, e
+        return
+    else:
+        paths = [spec]
+
+    for path in paths:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                yield path, json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            yield path, e
+
+
+class BatchManifest:
+    """
+    Append-only record of finished batch items, one JSON object per line.
+
+    The last line for an output file wins; a line cut short by an interrupted
+    run is ignored.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.entries = {}
+        complete = True
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    complete = line.endswith("\n")
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    if entry.get("file"):
+                        self.entries[entry["file"]] = entry
+        self._file = open(path, "a", encoding="utf-8")
+        if not complete:
+            # Start on a fresh line after one cut short
+            self._file.write("\n")
+
+    def is_done(self, file_name: str, content_key: str, output_dir: str) -> bool:
+        """Whether ``file_name`` was already produced from content with this key"""
+        entry = self.entries.get(file_name)
+        return (entry is not None and entry.get("status") == "ok" and entry.get("key") == content_key
+                and os.path.exists(os.path.join(output_dir, file_name)))
+
+    def record(self, entry: dict):
+        if entry.get("file"):
+            self.entries[entry["file"]] = entry
+        self._file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+def output_name(claimed: dict, meeting_id: str, content_key: str) -> Optional[str]:
+    """
+    Output file for an input, or ``None`` when an earlier input of this run has the same content.
+
+    The first input of a meeting gets ``convocatoria_reunion_{id}.pdf``; later
+    inputs with the same meeting ID but other content get the start of their
+    content key appended, so they never overwrite each other and a repeated
+    run names them the same way. ``claimed`` maps the names taken so far to
+    their content keys.
+    """
+    file_name = f"convocatoria_reunion_{meeting_id}.pdf"
+    if file_name in claimed:
+        if claimed[file_name] == content_key:
+            return None
+        file_name = f"convocatoria_reunion_{meeting_id}_{content_key[:12]}.pdf"
+        if file_name in claimed:
+            return None
+    claimed[file_name] = content_key
+    return file_name
+
+
+def run_batch(spec: str, output_dir: str, jobs: int = 1, deterministic: bool = None,
+              timeout: float = 60.0) -> dict:
+    """
+    Render every input of a batch into ``output_dir`` and return a summary.
+
+    Inputs whose content key (canonical request hash plus template/CSS
+    fingerprint and options, as used by the service's result cache) matches
+    an output recorded in the manifest are skipped.
+    """
+    if deterministic is None:
+        deterministic = settings.deterministic_render
+
+    os.makedirs(output_dir, exist_ok=True)
+    manifest = BatchManifest(os.path.join(output_dir, MANIFEST_NAME))
+    fingerprint = get_registry().fingerprint('styles.css')
+    summary = {"rendered": 0, "skipped": 0, "failed": 0}
+
+    pool = RenderPool.from_settings(settings, mode="process" if jobs > 1 else "thread", workers=jobs,
+                                    timeout=timeout)
+    pool.start()
+    executor = ThreadPoolExecutor(max_workers=jobs, thread_name_prefix="batch")
+    pending = {}
+    claimed = {}
+
+    def collect(future):
+        entry = pending.pop(future)
+        try:
+            write_atomic(os.path.join(output_dir, entry["file"]), future.result())
+        except Exception as e:
+            logger.error(f"Failed to render {entry['source']}: {e}")
+            entry.update(status="error", error=str(e))
+            summary["failed"] += 1
+        else:
+            entry["status"] = "ok"
+            summary["rendered"] += 1
+        manifest.record(entry)
+
+    def wait_for_slot(limit: int):
+        while len(pending) > limit:
+            done, _ = wait(list(pending), return_when=FIRST_COMPLETED)
+            for future in done:
+                collect(future)
+
+    try:
+        for source, item in iter_batch_inputs(spec):
+            if isinstance(item, Exception):
+                logger.error(f"Invalid input {source}: {item}")
+                manifest.record({"source": source, "status": "error", "error": str(item)})
+                summary["failed"] += 1
+                continue
+            try:
+                request = MeetingNoticeRequest.model_validate(item)
+            except ValidationError as e:
+                logger.error(f"Invalid input {source}: {e}")
+                manifest.record({"source": source, "status": "error", "error": str(e)})
+                summary["failed"] += 1
+                continue
+
+            content_key = ResultCache.make_key(request, fingerprint, deterministic=deterministic)
+            file_name = output_name(claimed, request.meeting.id, content_key)
+            if file_name is None:
+                logger.warning(f"Skipping {source}: same content as an earlier input")
+                summary["skipped"] += 1
+                continue
+            if file_name != f"convocatoria_reunion_{request.meeting.id}.pdf":
+                logger.warning(f"{source} shares meeting ID {request.meeting.id} with an earlier input; "
+                               f"writing {file_name}")
+            if manifest.is_done(file_name, content_key, output_dir):
+                summary["skipped"] += 1
+                continue
+
+            future = executor.submit(pool.run_sync, "generate_meeting_notice_pdf", request,
+                                     deterministic=deterministic)
+            pending[future] = {"source": source, "file": file_name, "key": content_key}
+            # Keep a bounded number of renders queued so memory doesn't grow with the batch
+            wait_for_slot(2 * jobs)
+
+        wait_for_slot(0)
+    finally:
+        for future in pending:
+            future.cancel()
+        executor.shutdown(wait=True)
+        pool.shutdown()
+        manifest.close()
+
+    logger.info(f"Batch finished: {summary['rendered']} rendered, {summary['skipped']} skipped, "
+                f"{summary['failed']} failed")
+    return summary
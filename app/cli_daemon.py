@@ -0,0 +1,266 @@
+"""
+Resident render daemon for the CLI.
+
+``python -m app.cli --daemon`` keeps a warmed-up render pool (templates, CSS,
+fonts and layout caches already loaded) listening on a local Unix socket. A
+normal CLI invocation sends its render to the daemon when one is listening
+and renders in-process otherwise, so scripts that call the CLI thousands of
+times don't pay the start-up cost on every call.
+
+Messages are length-prefixed frames: a JSON header followed by raw binary
+frames (attachments on the way in, PDFs on the way out). Nothing is pickled,
+the socket is only accessible to the user running the daemon, and the client
+only talks to a daemon run by its own user, since the default socket may sit
+in a shared temporary directory.
+"""
+
+import json
+import os
+import signal
+import socket
+import socketserver
+import struct
+import tempfile
+import threading
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+from app.config import settings
+from app.models import MeetingNoticeRequest, Recipient
+from app.render_pool import RenderError, RenderPool, RenderTimeoutError
+from app.warmup import configure_font_cache
+import logging
+
+logger = logging.getLogger(__name__)
+
+PROTOCOL_VERSION = 1
+
+# PDFGenerator methods the daemon renders; everything else is refused
+METHODS = ("generate_meeting_notice_pdf", "generate_mail_merge_pdfs", "generate_mail_merge_print_file")
+
+_FRAME_HEADER = struct.Struct(">I")
+
+
+class DaemonUnavailable(Exception):
+    """No daemon answered on the socket, so the caller should render in-process"""
+
+
+def default_socket_path() -> str:
+    """Socket from ``PDF_CLI_SOCKET_PATH``, else a per-user path in the runtime directory"""
+    if settings.cli_socket_path:
+        return settings.cli_socket_path
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR") or tempfile.gettempdir()
+    return os.path.join(runtime_dir, f"meeting-notice-pdf-{os.getuid()}.sock")
+
+
+def _peer_uid(sock: socket.socket, socket_path: str) -> int:
+    """User running the process at the other end of a connected Unix socket"""
+    if hasattr(socket, "SO_PEERCRED"):
+        credentials = sock.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize("3i"))
+        return struct.unpack("3i", credentials)[1]
+    # No peer credentials on this platform; the socket file's owner is the next best thing
+    return os.stat(socket_path).st_uid
+
+
+def _send_frame(sock: socket.socket, payload: bytes):
+    sock.sendall(_FRAME_HEADER.pack(len(payload)))
+    sock.sendall(payload)
+
+
+def _recv_exact(sock: socket.socket, size: int) -> bytes:
+    buffer = bytearray(size)
+    view = memoryview(buffer)
+    received = 0
+    while received < size:
+        count = sock.recv_into(view[received:])
+        if not count:
+            raise ConnectionError("Connection closed mid-message")
+        received += count
+    return bytes(buffer)
+
+
+def _recv_frame(sock: socket.socket) -> bytes:
+    (size,) = _FRAME_HEADER.unpack(_recv_exact(sock, _FRAME_HEADER.size))
+    return _recv_exact(sock, size)
+
+
+def _send_json(sock: socket.socket, message: dict):
+    _send_frame(sock, json.dumps(message).encode("utf-8"))
+
+
+def _recv_json(sock: socket.socket) -> dict:
+    return json.loads(_recv_frame(sock))
+
+
+class _RenderHandler(socketserver.BaseRequestHandler):
+    """Serves one render per connection"""
+
+    def handle(self):
+        try:
+            header = _recv_json(self.request)
+            attachments = {document_id: _recv_frame(self.request)
+                           for document_id in header.get("attachments") or []}
+        except ConnectionError:
+            # Another daemon probing whether the socket is in use
+            return
+        except ValueError as e:
+            logger.warning(f"Dropping malformed daemon request: {e}")
+            return
+
+        try:
+            parts = self.server.render(header, attachments or None)
+        except RenderError as e:
+            _send_json(self.request, {"status": "error", "error_type": e.error_type, "error": str(e)})
+            return
+        except Exception as e:
+            logger.error(f"Daemon request failed: {e}")
+            _send_json(self.request, {"status": "error", "error_type": type(e).__name__, "error": str(e)})
+            return
+
+        _send_json(self.request, {"status": "ok", "parts": len(parts)})
+        for part in parts:
+            _send_frame(self.request, part)
+
+
+class RenderDaemon(socketserver.ThreadingUnixStreamServer):
+    """Unix socket server that renders CLI requests in a resident render pool"""
+
+    daemon_threads = True
+
+    def __init__(self, socket_path: str, pool: RenderPool):
+        self.socket_path = socket_path
+        self.pool = pool
+        self.renders = 0
+        # In thread mode run_sync renders in the calling thread; keep it to one render per worker
+        self._slots = threading.BoundedSemaphore(pool.size)
+        _claim_socket_path(socket_path)
+        # Create the socket with owner-only permissions from the start
+        umask = os.umask(0o177)
+        try:
+            super().__init__(socket_path, _RenderHandler)
+        finally:
+            os.umask(umask)
+
+    def render(self, header: dict, attachments: Optional[Dict[str, bytes]]) -> List[bytes]:
+        if header.get("version") != PROTOCOL_VERSION:
+            raise RenderError(f"Unsupported protocol version {header.get('version')}", error_type="ProtocolError")
+        method = header.get("method")
+        if method not in METHODS:
+            raise RenderError(f"Unknown method {method}", error_type="ProtocolError")
+
+        args = [MeetingNoticeRequest.model_validate(header["request"])]
+        if header.get("recipients") is not None:
+            args.append([Recipient.model_validate(recipient) for recipient in header["recipients"]])
+        kwargs = dict(header.get("kwargs") or {})
+        if attachments:
+            kwargs["attachments"] = attachments
+
+        with self._slots:
+            result = self.pool.run_sync(method, *args, timeout=header.get("timeout"), **kwargs)
+            self.renders += 1
+        return result if isinstance(result, list) else [result]
+
+    def server_close(self):
+        super().server_close()
+        try:
+            os.remove(self.socket_path)
+        except FileNotFoundError:
+            pass
+
+
+def _claim_socket_path(socket_path: str):
+    """Remove a socket left behind by a dead daemon, refusing if one is still listening"""
+    if not os.path.exists(socket_path):
+        os.makedirs(os.path.dirname(socket_path) or ".", exist_ok=True)
+        return
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(socket_path)
+    except OSError:
+        os.remove(socket_path)
+    else:
+        raise RuntimeError(f"A daemon is already listening on {socket_path}")
+    finally:
+        probe.close()
+
+
+def serve(socket_path: str, jobs: int = 1):
+    """Start a warmed-up render pool and serve renders on ``socket_path`` until interrupted"""
+    _claim_socket_path(socket_path)
+    configure_font_cache(settings.font_cache_dir)
+    # Worker recycling and the start method follow the settings, as in the API
+    pool = RenderPool.from_settings(settings, mode="process" if jobs > 1 else "thread", workers=jobs)
+    pool.start()
+    try:
+        with RenderDaemon(socket_path, pool) as server:
+            # shutdown() waits for serve_forever(), so it can't run in the signal handler's thread
+            signal.signal(signal.SIGTERM, lambda *_: threading.Thread(target=server.shutdown).start())
+            logger.info(f"Render daemon listening on {socket_path}")
+            try:
+                server.serve_forever()
+            except KeyboardInterrupt:
+                pass
+            logger.info(f"Render daemon stopping after {server.renders} renders")
+    finally:
+        pool.shutdown()
+
+
+def call_daemon(socket_path: str, method: str, request: MeetingNoticeRequest,
+                recipients: List[Recipient] = None, attachments: Dict[str, bytes] = None,
+                timeout: float = None, deterministic: bool = None, **kwargs):
+    """
+    Run a ``PDFGenerator`` method in the daemon listening on ``socket_path``.
+
+    Returns what the method would return in-process. Raises
+    ``DaemonUnavailable`` when no daemon answers, when the one answering
+    belongs to another user (or it goes away mid-render) and ``RenderError``
+    when the daemon reports a failed render.
+    """
+    timeout = timeout or settings.render_timeout_seconds
+    if deterministic is None:
+        deterministic = settings.deterministic_render
+    if deterministic and request.generated_at is None and not request.meeting.meeting_points:
+        # The date would come from this process's epoch setting; pin it so the daemon's can't change it
+        request = request.model_copy(update={
+            "generated_at": datetime.fromtimestamp(settings.deterministic_epoch, tz=timezone.utc)})
+
+    header = {
+        "version": PROTOCOL_VERSION,
+        "method": method,
+        "request": request.model_dump(mode="json"),
+        "recipients": [recipient.model_dump(mode="json") for recipient in recipients]
+        if recipients is not None else None,
+        "kwargs": dict(kwargs, deterministic=deterministic),
+        "attachments": list(attachments) if attachments else [],
+        "timeout": timeout,
+    }
+
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        try:
+            sock.connect(socket_path)
+        except OSError as e:
+            raise DaemonUnavailable(f"No daemon on {socket_path}: {e}")
+        owner = _peer_uid(sock, socket_path)
+        if owner != os.getuid():
+            raise DaemonUnavailable(f"Daemon on {socket_path} runs as uid {owner}, not {os.getuid()}")
+        # Leave the daemon time to report its own render timeout first
+        sock.settimeout(timeout + 5)
+        try:
+            _send_json(sock, header)
+            for payload in (attachments or {}).values():
+                _send_frame(sock, payload)
+            response = _recv_json(sock)
+            if response.get("status") != "ok":
+                if response.get("error_type") == "ProtocolError":
+                    raise DaemonUnavailable(f"Daemon on {socket_path} refused the request: {response.get('error')}")
+                raise RenderError(response.get("error", "Render failed"),
+                                  error_type=response.get("error_type", "RenderError"))
+            parts = [_recv_frame(sock) for _ in range(response["parts"])]
+        except socket.timeout:
+            raise RenderTimeoutError(f"Daemon render exceeded deadline of {timeout}s")
+        except (OSError, ValueError) as e:
+            raise DaemonUnavailable(f"Daemon on {socket_path} failed: {e}")
+    finally:
+        sock.close()
+
+    return parts if method == "generate_mail_merge_pdfs" else parts[0]
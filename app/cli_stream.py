@@ -0,0 +1,174 @@
+"""
+Streaming mode for the CLI: NDJSON requests in, a tar stream of PDFs out.
+
+One ``MeetingNoticeRequest`` per input line is read as it arrives and each
+PDF is written to the output as soon as it can be, so the command works as a
+filter in a pipeline (``producer | python -m app.cli --stream | tar -x``).
+Only a bounded window of renders is in flight at a time, which keeps memory
+flat however long the input is. Invalid lines and failed renders are reported
+as JSON lines on a separate error stream and never reach the archive.
+"""
+
+import json
+import tarfile
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import BinaryIO, Callable, Iterable, TextIO
+from pydantic import ValidationError
+from app.batch import entry_name
+from app.config import settings
+from app.models import MeetingNoticeRequest
+from app.render_pool import RenderPool
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Exit codes: every item rendered, some items failed, nothing could be rendered
+EXIT_OK = 0
+EXIT_PARTIAL = 1
+EXIT_ALL_FAILED = 3
+
+
+class TarStreamWriter:
+    """
+    Writes a ustar/GNU tar archive straight to a binary stream.
+
+    Unlike ``tarfile`` in ``w|`` mode, which holds back the tail of every
+    entry in its record buffer, each entry is written and flushed whole, so a
+    consumer can extract a PDF as soon as it arrives.
+    """
+
+    def __init__(self, output: BinaryIO):
+        self.output = output
+        self.written = 0
+
+    def _write(self, data: bytes):
+        self.output.write(data)
+        self.written += len(data)
+
+    def add(self, name: str, data: bytes, mtime: float):
+        info = tarfile.TarInfo(name)
+        info.size = len(data)
+        info.mtime = int(mtime)
+        info.mode = 0o644
+        self._write(info.tobuf(format=tarfile.GNU_FORMAT))
+        self._write(data)
+        remainder = len(data) % tarfile.BLOCKSIZE
+        if remainder:
+            self._write(tarfile.NUL * (tarfile.BLOCKSIZE - remainder))
+        self.output.flush()
+
+    def close(self):
+        """Write the end-of-archive marker, padded to a full record like ``tarfile``"""
+        self._write(tarfile.NUL * (2 * tarfile.BLOCKSIZE))
+        remainder = self.written % tarfile.RECORDSIZE
+        if remainder:
+            self._write(tarfile.NUL * (tarfile.RECORDSIZE - remainder))
+        self.output.flush()
+
+
+def exit_code(summary: dict) -> int:
+    """Exit code summarising a stream run"""
+    if not summary["failed"]:
+        return EXIT_OK
+    return EXIT_PARTIAL if summary["rendered"] else EXIT_ALL_FAILED
+
+
+def stream_tar(
+    lines: Iterable[bytes],
+    output: BinaryIO,
+    errors: TextIO,
+    submit: Callable[[MeetingNoticeRequest], Future],
+    window: int,
+    completion_order: bool = False,
+    mtime: float = None,
+) -> dict:
+    """
+    Render NDJSON ``lines`` through ``submit`` and write the PDFs as a tar stream.
+
+    Entries keep input order unless ``completion_order`` is set, in which case
+    each PDF is written as soon as its render finishes. At most ``window``
+    renders are pending; in input order a slow item holds back the ones after
+    it, but never more than ``window`` of them. Returns a summary with the
+    ``rendered`` and ``failed`` counts.
+    """
+    archive = TarStreamWriter(output)
+    summary = {"rendered": 0, "failed": 0}
+    pending = deque()
+
+    def report(entry: dict):
+        summary["failed"] += 1
+        errors.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        errors.flush()
+
+    def collect(item: tuple):
+        index, line_number, meeting_id, future = item
+        try:
+            pdf_bytes = future.result()
+        except Exception as e:
+            logger.error(f"Line {line_number} (meeting ID {meeting_id}) failed: {e}")
+            report({"index": index, "line": line_number, "meeting_id": meeting_id, "error": str(e)})
+            return
+        archive.add(entry_name(index, meeting_id), pdf_bytes, time.time() if mtime is None else mtime)
+        summary["rendered"] += 1
+
+    def drain(limit: int):
+        while len(pending) > limit:
+            if completion_order:
+                done, _ = wait([item[3] for item in pending], return_when=FIRST_COMPLETED)
+                for item in [item for item in pending if item[3] in done]:
+                    pending.remove(item)
+                    collect(item)
+            else:
+                collect(pending.popleft())
+
+    try:
+        index = 0
+        for line_number, line in enumerate(lines, start=1):
+            if not line.strip():
+                continue
+            try:
+                request = MeetingNoticeRequest.model_validate_json(line)
+            except ValidationError as e:
+                report({"index": index, "line": line_number, "error": str(e)})
+                index += 1
+                continue
+            pending.append((index, line_number, request.meeting.id, submit(request)))
+            index += 1
+            drain(window - 1)
+        drain(0)
+    finally:
+        for item in pending:
+            item[3].cancel()
+        archive.close()
+
+    return summary
+
+
+def run_stream(input_stream: BinaryIO, output: BinaryIO, errors: TextIO, jobs: int = 1,
+               deterministic: bool = None, completion_order: bool = False,
+               timeout: float = 60.0) -> dict:
+    """Render an NDJSON stream with a pool of ``jobs`` render workers"""
+    if deterministic is None:
+        deterministic = settings.deterministic_render
+
+    pool = RenderPool.from_settings(settings, mode="process" if jobs > 1 else "thread", workers=jobs,
+                                    timeout=timeout)
+    pool.start()
+    executor = ThreadPoolExecutor(max_workers=jobs, thread_name_prefix="stream")
+
+    def submit(request: MeetingNoticeRequest) -> Future:
+        return executor.submit(pool.run_sync, "generate_meeting_notice_pdf", request,
+                               deterministic=deterministic)
+
+    try:
+        summary = stream_tar(input_stream, output, errors, submit, window=2 * jobs,
+                             completion_order=completion_order,
+                             mtime=settings.deterministic_epoch if deterministic else None)
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+        pool.shutdown()
+
+    logger.info(f"Stream finished: {summary['rendered']} rendered, {summary['failed']} failed")
+    return summary
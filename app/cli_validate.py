@@ -0,0 +1,190 @@
+"""
+Validate mode for the CLI: check inputs against the request models without rendering.
+
+Every record is parsed once and validated once by ``MeetingNoticeRequest``,
+with no separate field checks, and every error of every record is reported,
+not just the first. Records come from the same inputs as ``--batch`` (a
+directory of ``.json`` files, a glob pattern, an NDJSON file, a JSON file
+holding one request or a list of them) or from NDJSON on stdin, and are
+validated in chunks across ``jobs`` processes.
+
+The report is NDJSON: one line per invalid record with its index, source and
+errors (JSON path, error type and message), then a summary line.
+"""
+
+import glob
+import json
+import os
+import sys
+from collections import deque
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from typing import Iterator, List, Optional, TextIO, Tuple
+from pydantic import ValidationError
+from app.models import MeetingNoticeRequest
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Records sent to a worker process at a time
+CHUNK_SIZE = 500
+
+# Exit codes: every record valid, some records invalid, an input could not be read,
+# validation itself failed (e.g. a worker process crashed)
+EXIT_OK = 0
+EXIT_INVALID = 1
+EXIT_UNREADABLE = 2
+EXIT_ERROR = 3
+
+
+def json_path(loc: Tuple) -> str:
+    """JSON path of a Pydantic error location, e.g. ``$.meeting.meeting_points[3].title``"""
+    path = "$"
+    for part in loc:
+        path += f"[{part}]" if isinstance(part, int) else f".{part}"
+    return path
+
+
+def validate_record(payload) -> List[dict]:
+    """Errors of one record, given as raw JSON bytes or already parsed; empty when valid"""
+    if isinstance(payload, (bytes, str)):
+        try:
+            # json.loads plus model_validate is faster than model_validate_json with the pinned pydantic
+            payload = json.loads(payload)
+        except json.JSONDecodeError as e:
+            return [{"path": "$", "type": "json_invalid",
+                     "message": f"{e.msg} (line {e.lineno}, column {e.colno})"}]
+        except ValueError as e:
+            # Not UTF-8 (UnicodeDecodeError)
+            return [{"path": "$", "type": "json_invalid", "message": str(e)}]
+    try:
+        MeetingNoticeRequest.model_validate(payload)
+    except ValidationError as e:
+        return [{"path": json_path(error["loc"]), "type": error["type"], "message": error["msg"]}
+                for error in e.errors(include_url=False)]
+    return []
+
+
+def validate_chunk(records: List[Tuple[int, str, object]]) -> List[dict]:
+    """Report entries for the invalid records of a chunk"""
+    report = []
+    for index, source, payload in records:
+        errors = validate_record(payload)
+        if errors:
+            report.append({"index": index, "source": source, "errors": errors})
+    return report
+
+
+def _iter_ndjson(lines, name: str) -> Iterator[Tuple[str, bytes]]:
+    for line_number, line in enumerate(lines, start=1):
+        if line.strip():
+            yield f"{name}:{line_number}", line
+
+
+def iter_records(spec: str) -> Iterator[Tuple[str, object]]:
+    """
+    Yield ``(source, payload)`` for every record of an input.
+
+    ``payload`` is the raw bytes of a record, or the parsed value of an
+    element of a JSON list. Unreadable files raise ``OSError``.
+    """
+    if spec == "-":
+        yield from _iter_ndjson(sys.stdin.buffer, "stdin")
+        return
+    if os.path.isdir(spec):
+        paths = sorted(glob.glob(os.path.join(spec, "*.json")))
+    elif glob.has_magic(spec):
+        paths = sorted(glob.glob(spec))
+    elif spec.endswith((".ndjson", ".jsonl")):
+        with open(spec, "rb") as f:
+            yield from _iter_ndjson(f, spec)
+        return
+    else:
+        paths = [spec]
+
+    for path in paths:
+        with open(path, "rb") as f:
+            data = f.read()
+        if data.lstrip()[:1] == b"[":
+            try:
+                items = json.loads(data)
+            except ValueError:
+                # Reported by validate_record, like any other unparseable record
+                yield path, data
+                continue
+            for position, item in enumerate(items):
+                yield f"{path}[{position}]", item
+        else:
+            yield path, data
+
+
+def _chunks(specs: List[str]) -> Iterator[List[Tuple[int, str, object]]]:
+    chunk = []
+    index = 0
+    for spec in specs:
+        for source, payload in iter_records(spec):
+            chunk.append((index, source, payload))
+            index += 1
+            if len(chunk) == CHUNK_SIZE:
+                yield chunk
+                chunk = []
+    if chunk:
+        yield chunk
+
+
+def validate_inputs(specs: List[str], report: TextIO, executor: Optional[Executor] = None,
+                    window: int = 4) -> dict:
+    """
+    Validate every record of ``specs`` and write the NDJSON report, returning the summary.
+
+    Chunks run on ``executor`` (in this process when ``None``) with at most
+    ``window`` pending; invalid records are reported in input order.
+    """
+    summary = {"records": 0, "valid": 0, "invalid": 0}
+    pending = deque()
+
+    def collect(item: Tuple[int, object]):
+        size, result = item
+        entries = result.result() if isinstance(result, Future) else result
+        summary["records"] += size
+        summary["invalid"] += len(entries)
+        summary["valid"] += size - len(entries)
+        for entry in entries:
+            report.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+    try:
+        for chunk in _chunks(specs):
+            if executor is None:
+                collect((len(chunk), validate_chunk(chunk)))
+                continue
+            pending.append((len(chunk), executor.submit(validate_chunk, chunk)))
+            while len(pending) >= window:
+                collect(pending.popleft())
+        while pending:
+            collect(pending.popleft())
+    finally:
+        for _, future in pending:
+            future.cancel()
+
+    report.write(json.dumps({"summary": summary}) + "\n")
+    report.flush()
+    return summary
+
+
+def run_validate(specs: List[str], report: TextIO, jobs: int = 1) -> int:
+    """Validate ``specs`` with ``jobs`` processes and return the exit code"""
+    try:
+        if jobs > 1:
+            with ProcessPoolExecutor(max_workers=jobs) as executor:
+                summary = validate_inputs(specs, report, executor, window=2 * jobs)
+        else:
+            summary = validate_inputs(specs, report)
+    except OSError as e:
+        logger.error(f"Cannot read input: {e}")
+        return EXIT_UNREADABLE
+    except Exception as e:
+        # Includes BrokenProcessPool and anything a worker raised; the report is incomplete
+        logger.exception(f"Validation failed: {e}")
+        return EXIT_ERROR
+
+    logger.info(f"Validated {summary['records']} records: {summary['valid']} valid, {summary['invalid']} invalid")
+    return EXIT_INVALID if summary["invalid"] else EXIT_OK
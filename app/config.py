@@ -0,0 +1,121 @@
+import os
+from pydantic import BaseModel
+
+
+class Settings(BaseModel):
+    """
+    Service settings.
+
+    Every field can be overridden with an environment variable named after it
+    with a ``PDF_`` prefix, e.g. ``PDF_RENDER_WORKERS=4``.
+    """
+
+    # Render pool: "process" runs renders in worker processes, "thread" in threads
+    render_pool_mode: str = "process"
+    render_workers: int = os.cpu_count() or 1
+    render_start_method: str = "spawn"
+    render_max_jobs_per_worker: int = 200
+    render_max_rss_mb: int = 1024
+    render_timeout_seconds: float = 60.0
+    # Persistent fontconfig cache, so restarted workers skip the font scan ("" keeps the system cache)
+    font_cache_dir: str = ""
+
+    # Admission control: requests allowed to wait for a render slot before 503
+    render_queue_depth: int = 32
+
+    # Rendered PDF cache: in-memory LRU plus an optional size-bounded disk tier
+    result_cache_enabled: bool = True
+    result_cache_memory_mb: int = 64
+    result_cache_disk_mb: int = 512
+    result_cache_dir: str = ""
+    # Page information and thumbnails, cached separately in "<result_cache_dir>/products"
+    result_cache_products_memory_mb: int = 16
+    result_cache_products_disk_mb: int = 128
+    # Render workers write PDFs to a file; larger ones are streamed from it instead of loaded into memory
+    stream_threshold_kb: int = 256
+
+    # Renders in flight per batch request (0 = one per render worker)
+    batch_concurrency: int = 0
+
+    # Laid-out sections kept per render worker for section and mail-merge renders
+    layout_cache_entries: int = 32
+    # Full notices laid out per render worker and kept briefly, so the PDF, page
+    # information and thumbnails of one notice share a single layout
+    document_cache_entries: int = 4
+    document_cache_ttl_seconds: float = 120.0
+
+    # Mail merge: render time allowed per recipient on top of render_timeout_seconds
+    mail_merge_seconds_per_recipient: float = 1.0
+
+    # Attachment downloads from signed URLs
+    attachment_fetch_concurrency: int = 8
+    attachment_per_host_limit: int = 4
+    attachment_retries: int = 3
+    attachment_retry_backoff_seconds: float = 0.5
+    attachment_timeout_seconds: float = 30.0
+    attachment_max_mb: int = 50
+    # Allow signed URLs (and their redirects) whose host resolves to loopback, private or link-local addresses
+    attachment_allow_private_hosts: bool = False
+    # Disk cache of downloaded attachments shared by all workers on the node
+    attachment_cache_enabled: bool = True
+    attachment_cache_dir: str = ""
+    attachment_cache_mb: int = 1024
+    # Directory of "<document id>.<ext>" files loaded into the cache at startup
+    attachment_cache_seed_dir: str = ""
+
+    # Asynchronous jobs stored on the local filesystem
+    jobs_dir: str = ""
+    jobs_ttl_seconds: int = 24 * 3600
+    jobs_cleanup_interval_seconds: int = 300
+    webhook_timeout_seconds: float = 10.0
+    # Allow webhook URLs whose host resolves to loopback, private or link-local addresses
+    webhook_allow_private_hosts: bool = False
+    # Jobs rendering at once (0 = one per render worker); they wait for render slots instead of being rejected
+    jobs_concurrency: int = 0
+
+    # Slow-render profiling: renders sampled at profile_sample_rate run under cProfile and
+    # are captured when slower than profile_slow_seconds (0 disables sampling)
+    profile_slow_seconds: float = 0.0
+    profile_sample_rate: float = 0.1
+    profile_dir: str = ""
+    profile_max_captures: int = 50
+    profile_ttl_seconds: int = 7 * 24 * 3600
+    # Requests with header X-Debug-Profile set to this token are always profiled ("" disables it)
+    profile_debug_token: str = ""
+
+    # Preforking production server (python -m app.server): the app is loaded and warmed up
+    # once, then server_workers HTTP workers are forked, each rendering in its own threads
+    server_host: str = "0.0.0.0"
+    server_port: int = 8000
+    server_workers: int = os.cpu_count() or 1
+    server_render_threads: int = 1
+    # Replace a worker after this many requests (0 = never), plus a random 0..jitter; workers are
+    # also replaced after render_max_jobs_per_worker renders, past render_max_rss_mb, or when a
+    # render overruns render_timeout_seconds
+    server_max_requests: int = 1000
+    server_max_requests_jitter: int = 100
+    # Time allowed to finish in-flight requests after SIGTERM before workers are killed
+    server_graceful_timeout_seconds: float = 30.0
+    # Resume unfinished jobs at startup (every server worker does, claiming each job once)
+    jobs_resume_on_startup: bool = True
+
+    # Unix socket of the resident CLI render daemon (default: per-user path in the runtime dir)
+    cli_socket_path: str = ""
+
+    # Deterministic rendering: identical input produces byte-identical PDFs
+    deterministic_render: bool = False
+    # Generation date used when the payload doesn't provide one
+    deterministic_epoch: int = int(os.environ.get("SOURCE_DATE_EPOCH", 0))
+
+    @classmethod
+    def from_env(cls) -> "Settings":
+        """Build settings from ``PDF_*`` environment variables"""
+        values = {}
+        for name in cls.model_fields:
+            env_name = f"PDF_{name.upper()}"
+            if env_name in os.environ:
+                values[name] = os.environ[env_name]
+        return cls(**values)
+
+
+settings = Settings.from_env()
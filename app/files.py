@@ -0,0 +1,15 @@
+import os
+import tempfile
+
+
+def write_atomic(path: str, data: bytes):
+    """Write a file so readers never see it half written"""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
@@ -0,0 +1,201 @@
+import fcntl
+import json
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+from typing import List, Optional
+from app.files import write_atomic
+from app.models import MeetingNoticeRequest
+from app.net import build_public_opener, validate_public_url
+import logging
+
+logger = logging.getLogger(__name__)
+
+_JOB_ID_RE = re.compile(r"^[0-9a-f]{32}$")
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+
+class JobStore:
+    """
+    Render jobs persisted on the local filesystem.
+
+    Every job is a directory under ``root_dir`` holding ``job.json`` (status,
+    timings, error), ``request.json`` (the validated request) and, once the
+    render succeeded, ``result.pdf``. Jobs older than ``ttl_seconds`` are
+    removed by ``cleanup_expired``.
+
+    A process runs a job only while it holds the lock taken by ``claim``, so
+    server workers resuming unfinished jobs never run the same one twice.
+    """
+
+    def __init__(self, root_dir: str, ttl_seconds: int):
+        self.root_dir = root_dir
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        # Descriptors of the claim files this process holds locked, by job ID
+        self._claims = {}
+        os.makedirs(root_dir, exist_ok=True)
+
+    @classmethod
+    def from_settings(cls, settings) -> "JobStore":
+        root_dir = settings.jobs_dir or os.path.join(tempfile.gettempdir(), "meeting-notice-jobs")
+        return cls(root_dir, settings.jobs_ttl_seconds)
+
+    def _job_dir(self, job_id: str) -> str:
+        if not _JOB_ID_RE.match(job_id):
+            raise KeyError(job_id)
+        return os.path.join(self.root_dir, job_id)
+
+    def create(self, request: MeetingNoticeRequest, webhook_url: Optional[str] = None,
+               options: Optional[dict] = None) -> dict:
+        """Persist a new queued job and return its record"""
+        job_id = uuid.uuid4().hex
+        job_dir = self._job_dir(job_id)
+        os.makedirs(job_dir)
+        write_atomic(os.path.join(job_dir, "request.json"), request.model_dump_json().encode("utf-8"))
+        job = {
+            "job_id": job_id,
+            "status": QUEUED,
+            "meeting_id": request.meeting.id,
+            "options": options or {},
+            "webhook_url": webhook_url,
+            "created_at": time.time(),
+            "started_at": None,
+            "finished_at": None,
+            "queue_seconds": None,
+            "render_seconds": None,
+            "size": None,
+            "error": None,
+        }
+        self._save(job)
+        return job
+
+    def _save(self, job: dict):
+        path = os.path.join(self._job_dir(job["job_id"]), "job.json")
+        write_atomic(path, json.dumps(job).encode("utf-8"))
+
+    def get(self, job_id: str) -> Optional[dict]:
+        """Return the job record, or ``None`` if it doesn't exist"""
+        try:
+            with open(os.path.join(self._job_dir(job_id), "job.json"), "rb") as f:
+                return json.loads(f.read())
+        except (KeyError, FileNotFoundError):
+            return None
+
+    def update(self, job_id: str, **fields) -> dict:
+        with self._lock:
+            job = self.get(job_id)
+            if job is None:
+                raise KeyError(job_id)
+            job.update(fields)
+            self._save(job)
+            return job
+
+    def load_request(self, job_id: str) -> MeetingNoticeRequest:
+        with open(os.path.join(self._job_dir(job_id), "request.json"), "rb") as f:
+            return MeetingNoticeRequest.model_validate_json(f.read())
+
+    def result_path(self, job_id: str) -> str:
+        return os.path.join(self._job_dir(job_id), "result.pdf")
+
+    def save_result(self, job_id: str, pdf_bytes: bytes):
+        write_atomic(self.result_path(job_id), pdf_bytes)
+
+    def claim(self, job_id: str) -> bool:
+        """
+        Claim a job for this process, returning ``False`` if another claim holds it.
+
+        The claim is an exclusive ``fcntl`` lock on the job's ``claim`` file,
+        held until ``release``; the kernel drops it when the process dies, so
+        a job left by a dead worker can be claimed again with no takeover step.
+        """
+        fd = os.open(os.path.join(self._job_dir(job_id), "claim"), os.O_WRONLY | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return False
+        with self._lock:
+            self._claims[job_id] = fd
+        return True
+
+    def release(self, job_id: str):
+        """Drop this process's claim on a job"""
+        # The file stays: removing it would let a process that opened it meanwhile lock an orphaned inode
+        with self._lock:
+            fd = self._claims.pop(job_id, None)
+        if fd is not None:
+            os.close(fd)
+
+    def unfinished(self) -> List[dict]:
+        """Jobs left queued or running, e.g. by a previous process"""
+        jobs = []
+        for job_id in os.listdir(self.root_dir):
+            if not _JOB_ID_RE.match(job_id):
+                continue
+            job = self.get(job_id)
+            if job is not None and job["status"] in (QUEUED, RUNNING):
+                jobs.append(job)
+        return sorted(jobs, key=lambda job: job["created_at"])
+
+    def cleanup_expired(self) -> int:
+        """Remove jobs older than the TTL, returning how many were removed"""
+        cutoff = time.time() - self.ttl_seconds
+        removed = 0
+        for job_id in os.listdir(self.root_dir):
+            if not _JOB_ID_RE.match(job_id):
+                continue
+            job = self.get(job_id)
+            reference = (job.get("finished_at") or job.get("created_at")) if job else None
+            if reference is None:
+                try:
+                    reference = os.stat(os.path.join(self.root_dir, job_id)).st_mtime
+                except FileNotFoundError:
+                    # Removed meanwhile by another server worker
+                    continue
+            if reference < cutoff:
+                shutil.rmtree(os.path.join(self.root_dir, job_id), ignore_errors=True)
+                removed += 1
+        return removed
+
+
+def validate_webhook_url(url: str, allow_private: bool = False):
+    """Raise ``ValueError`` unless ``url`` is an acceptable webhook target (see ``validate_public_url``)"""
+    validate_public_url(url, allow_private)
+
+
+def post_webhook(url: str, payload: dict, timeout: float = 10.0, retries: int = 3,
+                 backoff: float = 1.0, allow_private: bool = False) -> bool:
+    """
+    POST a JSON payload to a completion webhook, retrying on failure.
+
+    Returns ``True`` once the receiver answers with a 2xx status. Redirects
+    are not followed and, unless ``allow_private`` is set, the host is checked
+    again when connecting, so a 3xx or a DNS change after validation can't
+    point the request at an internal service.
+    """
+    body = json.dumps(payload).encode("utf-8")
+    opener = build_public_opener(allow_private)
+    for attempt in range(1, retries + 1):
+        request = urllib.request.Request(url, data=body, method="POST",
+                                         headers={"Content-Type": "application/json"})
+        try:
+            with opener.open(request, timeout=timeout) as response:
+                # status is None for non-HTTP responses
+                if 200 <= (response.status or 0) < 300:
+                    return True
+        except (urllib.error.URLError, OSError, ValueError) as e:
+            logger.warning(f"Webhook {url} failed (attempt {attempt}/{retries}): {e}")
+        if attempt < retries:
+            time.sleep(backoff * attempt)
+    return False
@@ -0,0 +1,66 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Hashable
+
+
+class LayoutCache:
+    """
+    In-process LRU of laid-out documents, keyed by the hash of their HTML.
+
+    Laying out HTML is the expensive part of a render, while rendering the
+    Jinja template is cheap; keying on the rendered HTML of a section (plus the
+    stylesheet fingerprint) means any section whose output didn't change is
+    reused as is. Bounded by entry count since layout trees have no cheap size,
+    and optionally by age: entries older than ``ttl_seconds`` are dropped.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float = None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self.ttl_seconds is not None and entry[1] < time.monotonic():
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: Hashable, value):
+        if self.max_entries <= 0:
+            return
+        expires_at = time.monotonic() + self.ttl_seconds if self.ttl_seconds is not None else None
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get_or_create(self, key: Hashable, create: Callable):
+        """Return the cached value for ``key``, creating and caching it on a miss"""
+        value = self.get(key)
+        if value is None:
+            value = create()
+            self.put(key, value)
+        return value
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 3) if lookups else None,
+            }
@@ -0,0 +1,22 @@
+import io
+import re
+import zipfile
+from typing import List
+from app.models import Recipient
+
+_UNSAFE_CHARS_RE = re.compile(r"[^A-Za-z0-9_-]+")
+
+
+def recipient_file_name(index: int, meeting_id: str, recipient: Recipient) -> str:
+    """File name of a recipient's copy, safe for any unit label"""
+    unit = _UNSAFE_CHARS_RE.sub("-", recipient.unit).strip("-") or "sin-vivienda"
+    return f"{index:04d}_convocatoria_reunion_{meeting_id}_{unit}.pdf"
+
+
+def zip_recipient_pdfs(meeting_id: str, recipients: List[Recipient], pdfs: List[bytes]) -> bytes:
+    """Pack one PDF per recipient into a ZIP archive, in recipient order"""
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, mode="w", compression=zipfile.ZIP_STORED) as archive:
+        for index, (recipient, pdf_bytes) in enumerate(zip(recipients, pdfs)):
+            archive.writestr(recipient_file_name(index, meeting_id, recipient), pdf_bytes)
+    return buffer.getvalue()
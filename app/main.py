@@ -1,22 +1,247 @@
-from fastapi import FastAPI, HTTPException
-from fastapi.responses import Response
-from app.models import MeetingNoticeRequest
-from app.pdf_generator import PDFGenerator
+import asyncio
+import functools
+import glob
+import hmac
+import io
+import json
+import os
+import tempfile
+import time
+import zipfile
+from contextlib import asynccontextmanager
+from typing import Annotated, Dict, List, Optional, Tuple
+from fastapi import Depends, FastAPI, Header, HTTPException, Query, Request
+from fastapi.openapi.utils import get_openapi
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse, Response, StreamingResponse
+from starlette.background import BackgroundTask
+from app.admission import AdmissionController, AdmissionRejected, ClientDisconnected
+from app.attachments import AttachmentFetcher, AttachmentFetchError, meeting_documents
+from app.batch import iter_json_items, iter_ndjson_items, spool_body, stream_batch_zip
+from app.config import settings
+from app.jobs import FAILED, RUNNING, SUCCEEDED, JobStore, post_webhook, validate_webhook_url
+from app.mail_merge import zip_recipient_pdfs
+from app.metrics import RENDER_PHASES, ServiceMetrics, server_timing
+from app.models import MailMergeRequest, MeetingNoticeRequest, Section
+from app.products import MAX_THUMBNAIL_DPI, MAX_THUMBNAILS_PER_REQUEST, MIN_THUMBNAIL_DPI, thumbnails_available
+from app.profiler import ProfileStore
+from app.request_body import add_schemas, body_of, openapi_body
+from app.sections import sections_with_content
+from app.render_pool import RenderPool, RenderTimeoutError
+from app.result_cache import ResultCache
+from app.singleflight import SingleFlight
+from app.template_registry import get_registry
+from app.warmup import configure_font_cache
 import logging
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Render pool running PDFGenerator off the event loop
+render_pool = RenderPool.from_settings(settings)
+
+# Bounded render queue in front of the pool
+admission = AdmissionController(render_pool.size, settings.render_queue_depth)
+
+# Content-addressed cache of rendered PDFs
+result_cache = ResultCache.from_settings(settings) if settings.result_cache_enabled else None
+product_cache = ResultCache.from_settings(settings, products=True) if settings.result_cache_enabled else None
+
+# Concurrent identical renders share a single render
+singleflight = SingleFlight()
+
+# Pooled HTTP client downloading meeting documents to embed
+attachment_fetcher = AttachmentFetcher.from_settings(settings)
+
+# Rendered PDFs not kept in the disk cache are removed this long after the render
+SPOOL_GRACE_SECONDS = 60.0
+
+# Request bodies validated in one pass from the raw bytes (JSON, gzip or MessagePack)
+MeetingNoticeBody = Annotated[MeetingNoticeRequest, Depends(body_of(MeetingNoticeRequest))]
+MailMergeBody = Annotated[MailMergeRequest, Depends(body_of(MailMergeRequest))]
+
+# Startup warm-up of the render workers, reported by /ready
+_warm_up = {"status": "warming_up", "seconds": None, "error": None}
+
+# Asynchronous render jobs persisted on disk
+job_store = JobStore.from_settings(settings)
+_job_tasks = set()
+_job_slots = asyncio.Semaphore(settings.jobs_concurrency or render_pool.size)
+
+# Rendered PDFs being streamed that are not in the disk cache, removed after a grace period
+_spool_files = set()
+
+# Profiles of slow or explicitly requested renders
+profile_store = ProfileStore.from_settings(settings)
+
+# Prometheus metrics; component state is read when /metrics is scraped
+metrics = ServiceMetrics()
+metrics.scrape("pdf_queue_depth", "Renders waiting for a render slot", lambda: admission.queue_depth)
+metrics.scrape("pdf_in_flight", "Renders admitted, queued or rendering", lambda: admission.in_flight)
+metrics.scrape("pdf_rejected_total", "Renders rejected because the queue was full",
+               lambda: admission.rejected, kind="counter")
+metrics.scrape("pdf_render_workers", "Render pool workers", lambda: render_pool.size)
+metrics.scrape("pdf_ready", "1 once the render workers have warmed up and one is running",
+               lambda: int(render_pool.ready))
+metrics.scrape("pdf_render_workers_busy", "Render pool workers currently rendering", lambda: render_pool.stats()["busy"])
+metrics.scrape("pdf_render_worker_events_total", "Render workers recycled, timed out or crashed",
+               lambda: {("recycled",): render_pool.recycled, ("timeout",): render_pool.timeouts,
+                        ("crash",): render_pool.crashes},
+               labels=("event",), kind="counter")
+metrics.scrape("pdf_singleflight_renders_saved_total", "Requests served by joining an identical in-flight render",
+               lambda: singleflight.coalesced, kind="counter")
+if result_cache is not None:
+    metrics.scrape("pdf_result_cache_lookups_total", "Result cache lookups by outcome",
+                   lambda: {("memory_hit",): result_cache.hits["memory"], ("disk_hit",): result_cache.hits["disk"],
+                            ("miss",): result_cache.misses},
+                   labels=("result",), kind="counter")
+    metrics.scrape("pdf_result_cache_hit_ratio", "Share of result cache lookups that were hits",
+                   lambda: result_cache.stats()["hit_ratio"])
+if attachment_fetcher.cache is not None:
+    metrics.scrape("pdf_attachment_cache_lookups_total", "Attachment cache lookups by outcome",
+                   lambda: {("hit",): attachment_fetcher.cache.hits, ("miss",): attachment_fetcher.cache.misses},
+                   labels=("result",), kind="counter")
+    metrics.scrape("pdf_attachment_cache_hit_ratio", "Share of attachment cache lookups that were hits",
+                   lambda: attachment_fetcher.cache.stats()["hit_ratio"])
+
+
+def _count_error(endpoint: str, error: Exception):
+    metrics.errors.inc(endpoint=endpoint, type=getattr(error, "error_type", type(error).__name__))
+
+
+def _profile_requested(http_request: Request) -> bool:
+    """Whether the request carries the debug header asking for a profile of its render"""
+    token = settings.profile_debug_token
+    return bool(token) and hmac.compare_digest(http_request.headers.get("x-debug-profile", "").encode("utf-8"),
+                                               token.encode("utf-8"))
+
+
+def _require_debug_token(http_request: Request):
+    """Only let requests carrying the profiling debug token reach the capture endpoints"""
+    if not settings.profile_debug_token:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not _profile_requested(http_request):
+        raise HTTPException(status_code=403, detail="Token de depuración no válido")
+
+
+async def _capture_profile(request: MeetingNoticeRequest, stats: dict, render_seconds: float,
+                           requested: bool, endpoint: str) -> Optional[str]:
+    """Save the profile of a render if one was kept, returning the capture ID"""
+    if "profile" not in stats:
+        return None
+    reason = "requested" if requested else "slow"
+    try:
+        capture_id = await asyncio.get_running_loop().run_in_executor(
+            None, profile_store.save, request, stats, render_seconds, reason, endpoint)
+    except Exception as e:
+        logger.error(f"Could not save render profile for meeting ID {request.meeting.id}: {str(e)}")
+        return None
+    logger.warning(f"Saved {reason} render profile {capture_id} for meeting ID {request.meeting.id} "
+                   f"({render_seconds:.2f}s)")
+    return capture_id
+
+
+def _render_timings(stats: dict, render_seconds: float, queue_seconds: float = None,
+                    fetch_seconds: float = None) -> dict:
+    """Server-Timing entries of a render, in pipeline order"""
+    timings = {}
+    if fetch_seconds is not None:
+        timings["fetch"] = fetch_seconds
+    if queue_seconds is not None:
+        timings["queue"] = queue_seconds
+    for phase in RENDER_PHASES:
+        if phase in stats["phases"]:
+            timings[phase] = stats["phases"][phase]
+    timings["render"] = render_seconds
+    return timings
+
+
+async def _cleanup_jobs_periodically():
+    """Remove expired jobs and stale spool files at startup and then at a fixed interval"""
+    loop = asyncio.get_running_loop()
+    while True:
+        removed = await loop.run_in_executor(None, job_store.cleanup_expired)
+        if removed:
+            logger.info(f"Removed {removed} expired jobs")
+        swept = await loop.run_in_executor(None, _sweep_spool_files)
+        if swept:
+            logger.info(f"Removed {swept} stale render spool files")
+        await asyncio.sleep(settings.jobs_cleanup_interval_seconds)
+
+
+async def _warm_up_render_pool():
+    """Start and warm up the render workers, then seed the attachment cache and resume jobs"""
+    loop = asyncio.get_running_loop()
+    started = time.perf_counter()
+    try:
+        await loop.run_in_executor(None, render_pool.start)
+        if settings.attachment_cache_seed_dir and attachment_fetcher.cache is not None:
+            seeded = await loop.run_in_executor(None, attachment_fetcher.cache.seed,
+                                                settings.attachment_cache_seed_dir)
+            logger.info(f"Seeded attachment cache with {seeded} documents")
+    except Exception as e:
+        logger.error(f"Render pool warm-up failed: {str(e)}")
+        _warm_up.update(status="failed", error=str(e))
+        return
+    _warm_up.update(status="ready", seconds=round(time.perf_counter() - started, 3))
+    logger.info(f"Render pool warmed up in {_warm_up['seconds']}s")
+
+    # Resume jobs left unfinished by a previous process
+    if settings.jobs_resume_on_startup:
+        for job in job_store.unfinished():
+            _schedule_job(job["job_id"])
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Warm up the render pool in the background and start job housekeeping, stop them on shutdown.
+
+    The API answers /health while the workers warm up; /ready reports when
+    they can take traffic, and renders requested earlier wait for them.
+    """
+    loop = asyncio.get_running_loop()
+    # Before any worker starts, so all of them share the persistent font cache
+    configure_font_cache(settings.font_cache_dir)
+    render_pool.mark_starting()
+    warm_up_task = asyncio.create_task(_warm_up_render_pool())
+    cleanup_task = asyncio.create_task(_cleanup_jobs_periodically())
+
+    yield
+
+    warm_up_task.cancel()
+    cleanup_task.cancel()
+    if _job_tasks:
+        # Running jobs get the graceful timeout to finish; cancelled ones are resumed by the next start
+        await asyncio.wait(list(_job_tasks), timeout=settings.server_graceful_timeout_seconds)
+    for task in list(_job_tasks):
+        task.cancel()
+    await attachment_fetcher.aclose()
+    await loop.run_in_executor(None, render_pool.shutdown)
+    for path in list(_spool_files):
+        _release_spool(path)
+
+
 # Initialize FastAPI app
 app = FastAPI(
     title="Meeting Notice PDF Generator API",
     description="API para generar PDFs de convocatorias de reuniones usando WeasyPrint",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
-# Initialize PDF generator
-pdf_generator = PDFGenerator()
+
+def _openapi() -> dict:
+    """OpenAPI schema, including the models of the bodies the endpoints read themselves"""
+    if app.openapi_schema is None:
+        schema = get_openapi(title=app.title, version=app.version, openapi_version=app.openapi_version,
+                             description=app.description, routes=app.routes, tags=app.openapi_tags,
+                             servers=app.servers)
+        app.openapi_schema = add_schemas(schema, MeetingNoticeRequest, MailMergeRequest)
+    return app.openapi_schema
+
+
+app.openapi = _openapi
 
 
 @app.get("/")
@@ -29,35 +254,402 @@ async def root():
     }
 
 
-@app.post("/meeting-notice/generate-pdf")
-async def generate_meeting_notice_pdf(request: MeetingNoticeRequest):
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Check an If-None-Match header against an entity tag (weak comparison, as RFC 9110 requires)"""
+    if not if_none_match:
+        return False
+    candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in candidates or etag.removeprefix("W/") in candidates
+
+
+def _cache_key(request: MeetingNoticeRequest, deterministic: bool, sections: Optional[List[str]] = None,
+               embed_attachments: bool = False, product: Optional[str] = None) -> str:
+    """Render key for a request under the current templates, shared by the result cache and single-flight"""
+    variant = {"deterministic": deterministic}
+    if sections is not None:
+        variant["sections"] = ",".join(sections)
+    if embed_attachments:
+        variant["attachments"] = "embedded"
+    if product is not None:
+        variant["product"] = product
+    return ResultCache.make_key(request, get_registry().fingerprint('styles.css'), **variant)
+
+
+def _read_file(path: str) -> bytes:
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def _remove_file(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def _release_spool(path: str):
+    _spool_files.discard(path)
+    _remove_file(path)
+
+
+def _spool_dir() -> str:
+    """Where renders are spooled: next to the disk cache so they can be moved in, else the temp dir"""
+    if result_cache is not None and result_cache.disk_dir:
+        return result_cache.disk_dir
+    return tempfile.gettempdir()
+
+
+def _spool_path() -> str:
+    """New file for a render worker to write a PDF into"""
+    fd, path = tempfile.mkstemp(dir=_spool_dir(), prefix="render-", suffix=".tmp")
+    os.close(fd)
+    return path
+
+
+def _sweep_spool_files() -> int:
+    """
+    Remove spool files older than any render and its grace period, returning how many.
+
+    They are left behind when a process dies between a render and moving or
+    removing its file, and the disk cache budget doesn't account for them.
+    """
+    cutoff = time.time() - settings.render_timeout_seconds - SPOOL_GRACE_SECONDS
+    removed = 0
+    for path in glob.glob(os.path.join(_spool_dir(), "render-*.tmp")):
+        try:
+            if os.stat(path).st_mtime >= cutoff:
+                continue
+            os.remove(path)
+        except FileNotFoundError:
+            # Moved into the cache or removed meanwhile
+            continue
+        removed += 1
+    return removed
+
+
+def _store_render(cache_key: str, path: str):
+    """
+    Keep a PDF rendered into ``path``, returning ``(bytes or path, kept)``.
+
+    PDFs up to ``stream_threshold_kb`` are returned as bytes (and cached in
+    memory); larger ones are returned as the path to stream them from. ``kept``
+    is false when the file is not in the disk cache and must be removed.
+    """
+    data = _read_file(path) if os.path.getsize(path) <= settings.stream_threshold_kb * 1024 else None
+    cached_path = result_cache.put_file(cache_key, path, data) if result_cache is not None else None
+    if data is not None:
+        if cached_path is None:
+            _remove_file(path)
+        return data, True
+    return (cached_path, True) if cached_path is not None else (path, False)
+
+
+def _iter_file(f, chunk_size: int = 64 * 1024):
+    with f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+
+
+def _pdf_file_response(path: str, headers: dict) -> StreamingResponse:
+    """
+    Stream a PDF file with its Content-Length.
+
+    The file is opened before returning, so evicting or removing it while the
+    response is sent doesn't affect it.
+    """
+    f = open(path, 'rb')
+    headers = dict(headers, **{"Content-Length": str(os.fstat(f.fileno()).st_size)})
+    return StreamingResponse(_iter_file(f), media_type="application/pdf", headers=headers)
+
+
+async def _render_and_cache(request: MeetingNoticeRequest, deterministic: bool, cache_key: str,
+                            endpoint: str) -> bytes:
+    stats = {}
+    start = time.monotonic()
+    pdf_bytes = await render_pool.run("generate_meeting_notice_pdf", request,
+                                      deterministic=deterministic, render_stats=stats,
+                                      profile=profile_store.threshold())
+    render_seconds = time.monotonic() - start
+    metrics.observe_render(endpoint, render_seconds, stats, len(pdf_bytes), request)
+    await _capture_profile(request, stats, render_seconds, False, endpoint)
+    if result_cache is not None:
+        await asyncio.get_running_loop().run_in_executor(None, result_cache.put, cache_key, pdf_bytes)
+    return pdf_bytes
+
+
+async def _cached_bytes(cache_key: str, cache: Optional[ResultCache] = None,
+                        suffix: str = None) -> Optional[Tuple[str, bytes]]:
+    """``(tier, bytes)`` of an entry of ``cache`` (default: the PDF result cache), or ``None``"""
+    cache = cache or result_cache
+    cached = cache.get(cache_key, suffix) if cache is not None else None
+    if cached is None:
+        return None
+    tier, value = cached
+    if tier == "disk":
+        try:
+            value = await asyncio.get_running_loop().run_in_executor(None, _read_file, value)
+        except FileNotFoundError:
+            # Evicted by another process since the lookup
+            return None
+    return tier, value
+
+
+async def _render_pdf_bytes(request: MeetingNoticeRequest, deterministic: bool, endpoint: str) -> bytes:
+    """Render a notice through the result cache, single-flight and the render pool"""
+    cache_key = _cache_key(request, deterministic)
+    cached = await _cached_bytes(cache_key)
+    if cached is not None:
+        tier, value = cached
+        metrics.responses.inc(endpoint=endpoint, source=f"{tier}_cache")
+        return value
+
+    source = "shared"
+
+    async def render() -> bytes:
+        nonlocal source
+        source = "render"
+        return await _render_and_cache(request, deterministic, cache_key, endpoint)
+
+    try:
+        pdf_bytes = await singleflight.do(cache_key, render)
+    except Exception as e:
+        _count_error(endpoint, e)
+        raise
+    metrics.responses.inc(endpoint=endpoint, source=source)
+    return pdf_bytes
+
+
+def _pdf_headers(meeting_id: str, etag: Optional[str], file_prefix: str = "convocatoria_reunion") -> dict:
+    headers = {
+        "Content-Disposition": f"attachment; filename={file_prefix}_{meeting_id}.pdf"
+    }
+    if etag:
+        headers["ETag"] = etag
+    return headers
+
+
+@app.post("/meeting-notice/generate-pdf", openapi_extra=openapi_body(MeetingNoticeRequest))
+async def generate_meeting_notice_pdf(
+    request: MeetingNoticeBody,
+    http_request: Request,
+    deterministic: Optional[bool] = None,
+    sections: Optional[List[Section]] = Query(None),
+    embed_attachments: bool = False,
+    if_none_match: Optional[str] = Header(None)
+):
     """
     Genera un PDF de convocatoria de reunión basado en los datos proporcionados.
     
     Args:
         request: Datos de la convocatoria de reunión
+        http_request: Petición HTTP, usada para detectar clientes desconectados
+        deterministic: Generar un PDF idéntico byte a byte para los mismos datos
+            (por defecto, según PDF_DETERMINISTIC_RENDER)
+        sections: Generar solo estas secciones (por defecto, el documento completo)
+        embed_attachments: Descargar los documentos de la reunión y adjuntarlos al PDF
+        if_none_match: ETag de una descarga anterior; si coincide se responde 304
         
     Returns:
         PDF file como respuesta HTTP
     """
+    return await _serve_pdf(request, http_request, deterministic, if_none_match,
+                            [section.value for section in sections] if sections else None,
+                            embed_attachments=embed_attachments)
+
+
+@app.post("/meeting-notice/voting-sheet", openapi_extra=openapi_body(MeetingNoticeRequest))
+async def generate_voting_sheet_pdf(
+    request: MeetingNoticeBody,
+    http_request: Request,
+    deterministic: Optional[bool] = None,
+    if_none_match: Optional[str] = Header(None)
+):
+    """
+    Genera solo la hoja de votación de la convocatoria.
+
+    Returns:
+        PDF file como respuesta HTTP
+    """
+    return await _serve_pdf(request, http_request, deterministic, if_none_match,
+                            [Section.VOTING_SHEET.value], "hoja_votacion")
+
+
+@app.post("/meeting-notice/proxy-form", openapi_extra=openapi_body(MeetingNoticeRequest))
+async def generate_proxy_form_pdf(
+    request: MeetingNoticeBody,
+    http_request: Request,
+    deterministic: Optional[bool] = None,
+    if_none_match: Optional[str] = Header(None)
+):
+    """
+    Genera solo el modelo de representación de la convocatoria.
+
+    Returns:
+        PDF file como respuesta HTTP
+    """
+    return await _serve_pdf(request, http_request, deterministic, if_none_match,
+                            [Section.PROXY_FORM.value], "modelo_representacion")
+
+
+async def _serve_pdf(request: MeetingNoticeRequest, http_request: Request, deterministic: Optional[bool],
+                     if_none_match: Optional[str], sections: Optional[List[str]] = None,
+                     file_prefix: str = "convocatoria_reunion", embed_attachments: bool = False):
+    """Serve a notice, or some of its sections, from the result cache or the render pool"""
+    started = time.perf_counter()
+    endpoint = http_request.url.path
+    profile_requested = _profile_requested(http_request)
+    if deterministic is None:
+        deterministic = settings.deterministic_render
+
+    if sections is not None:
+        sections = sections_with_content(request, sections)
+        if not sections:
+            raise HTTPException(
+                status_code=422,
+                detail="Las secciones solicitadas no tienen contenido para esta reunión"
+            )
+
     try:
-        logger.info(f"Generating PDF for meeting ID: {request.meeting.id}")
-        
-        # Generate PDF
-        pdf_bytes = pdf_generator.generate_meeting_notice_pdf(request)
+        documents = meeting_documents(request) if embed_attachments else []
+        cache_key = _cache_key(request, deterministic, sections, bool(documents))
+        etag = None
+        if result_cache is not None:
+            # Only deterministic renders are byte-identical; otherwise the timestamps and PDF /ID differ
+            etag = f'"{cache_key}"' if deterministic else f'W/"{cache_key}"'
+
+        # Profiled requests always render, so they skip the cache and in-flight renders
+        if result_cache is not None and not profile_requested:
+            if _etag_matches(if_none_match, etag):
+                metrics.responses.inc(endpoint=endpoint, source="not_modified")
+                return Response(status_code=304, headers={"ETag": etag})
+
+            cached = result_cache.get(cache_key)
+            if cached is not None:
+                tier, value = cached
+                headers = _pdf_headers(request.meeting.id, etag, file_prefix)
+                elapsed = time.perf_counter() - started
+                headers["Server-Timing"] = server_timing({"cache": elapsed, "total": elapsed}, {"cache": tier})
+                response = None
+                if tier == "disk":
+                    try:
+                        response = _pdf_file_response(value, headers)
+                    except FileNotFoundError:
+                        # Evicted by another process since the lookup: render it again
+                        pass
+                else:
+                    response = Response(content=value, media_type="application/pdf", headers=headers)
+                if response is not None:
+                    logger.info(f"Serving cached PDF ({tier}) for meeting ID: {request.meeting.id}")
+                    metrics.responses.inc(endpoint=endpoint, source=f"{tier}_cache")
+                    return response
+
+        # Whether this request rendered, or joined an identical in-flight render
+        source = "shared"
+
+        async def render() -> tuple:
+            nonlocal source
+            source = "render"
+
+            # Download attachments before taking a render slot
+            attachments = None
+            fetch_seconds = None
+            if documents:
+                fetch_start = time.monotonic()
+                attachments = await attachment_fetcher.fetch_all(documents)
+                fetch_seconds = time.monotonic() - fetch_start
+
+            queued = time.monotonic()
+            async with admission.admit():
+                # Drop renders whose client went away while queued, unless
+                # duplicates joined and still wait for the result
+                if await http_request.is_disconnected() and singleflight.waiters(cache_key) <= 1:
+                    raise ClientDisconnected()
+
+                logger.info(f"Generating PDF for meeting ID: {request.meeting.id}")
+
+                # Generate PDF in the render pool, written to a file rather than sent back whole
+                start = time.monotonic()
+                queue_seconds = start - queued
+                stats = {}
+                spool_path = _spool_path()
+                try:
+                    await render_pool.run("generate_meeting_notice_pdf", request,
+                                          deterministic=deterministic, sections=sections,
+                                          attachments=attachments, target=spool_path, render_stats=stats,
+                                          profile=profile_store.threshold(profile_requested))
+                except BaseException:
+                    _remove_file(spool_path)
+                    raise
+                render_seconds = time.monotonic() - start
+                admission.observe(render_seconds)
+
+            loop = asyncio.get_running_loop()
+            metrics.queue_seconds.observe(queue_seconds, endpoint=endpoint)
+            metrics.observe_render(endpoint, render_seconds, stats, os.path.getsize(spool_path), request)
+            capture_id = await _capture_profile(request, stats, render_seconds, profile_requested, endpoint)
+            body, kept = await loop.run_in_executor(None, _store_render, cache_key, spool_path)
+            if not kept:
+                # Every response for this render opens the file as soon as it resumes
+                _spool_files.add(body)
+                loop.call_later(SPOOL_GRACE_SECONDS, _release_spool, body)
+            return body, _render_timings(stats, render_seconds, queue_seconds, fetch_seconds), capture_id
+
+        if profile_requested:
+            body, timings, capture_id = await render()
+        else:
+            if singleflight.waiters(cache_key):
+                logger.info(f"Joining in-flight render for meeting ID: {request.meeting.id}")
+            body, timings, capture_id = await singleflight.do(cache_key, render)
+        metrics.responses.inc(endpoint=endpoint, source=source)
         
         logger.info(f"PDF generated successfully for meeting ID: {request.meeting.id}")
         
-        # Return PDF as response
+        # Return PDF as response; joiners report the timings of the render they shared
+        headers = _pdf_headers(request.meeting.id, etag, file_prefix)
+        headers["Server-Timing"] = server_timing(
+            dict(timings, total=time.perf_counter() - started),
+            {"render": "shared"} if source == "shared" else None)
+        if capture_id:
+            headers["X-Profile-Capture"] = capture_id
+        if isinstance(body, str):
+            return _pdf_file_response(body, headers)
         return Response(
-            content=pdf_bytes,
+            content=body,
             media_type="application/pdf",
-            headers={
-                "Content-Disposition": f"attachment; filename=convocatoria_reunion_{request.meeting.id}.pdf"
-            }
+            headers=headers
         )
         
+    except ClientDisconnected as e:
+        _count_error(endpoint, e)
+        logger.info(f"Client disconnected before rendering meeting ID: {request.meeting.id}")
+        return Response(status_code=499)
+    except AttachmentFetchError as e:
+        _count_error(endpoint, e)
+        logger.error(f"Error fetching attachment for meeting ID {request.meeting.id}: {str(e)}")
+        raise HTTPException(
+            status_code=502,
+            detail=f"No se pudo descargar el documento adjunto {str(e)}"
+        )
+    except AdmissionRejected as e:
+        _count_error(endpoint, e)
+        logger.warning(f"Rejecting meeting ID {request.meeting.id}: {str(e)}")
+        raise HTTPException(
+            status_code=503,
+            detail="Servicio saturado, inténtelo de nuevo más tarde",
+            headers={"Retry-After": str(e.retry_after)}
+        )
+    except RenderTimeoutError as e:
+        _count_error(endpoint, e)
+        logger.error(f"Timeout generating PDF for meeting ID {request.meeting.id}: {str(e)}")
+        raise HTTPException(
+            status_code=504,
+            detail=f"Tiempo de generación del PDF excedido: {str(e)}"
+        )
     except Exception as e:
+        _count_error(endpoint, e)
         logger.error(f"Error generating PDF for meeting ID {request.meeting.id}: {str(e)}")
         raise HTTPException(
             status_code=500,
@@ -65,13 +657,491 @@ async def generate_meeting_notice_pdf(request: MeetingNoticeRequest):
         )
 
 
+async def _notice_products(request: MeetingNoticeRequest, http_request: Request, deterministic: Optional[bool],
+                           pages: List[int], dpi: int) -> dict:
+    """
+    Page information and thumbnails of the full notice, from the result cache or a single render.
+
+    Whatever is missing is produced in one layout pass in the render pool. The
+    PDF is written in that same pass when it isn't cached yet, so the download
+    that usually follows is served from the result cache.
+    """
+    endpoint = http_request.url.path
+    if deterministic is None:
+        deterministic = settings.deterministic_render
+
+    info_key = _cache_key(request, deterministic, product="info")
+    thumbnail_keys = {page: _cache_key(request, deterministic, product=f"thumbnail-{page}-{dpi}") for page in pages}
+    info = None
+    thumbnails = {}
+    cached = await _cached_bytes(info_key, product_cache, ".json")
+    if cached is not None:
+        info = json.loads(cached[1])
+    for page, key in thumbnail_keys.items():
+        cached = await _cached_bytes(key, product_cache, ".png")
+        if cached is not None:
+            thumbnails[page] = cached[1]
+
+    missing = [page for page in pages if page not in thumbnails
+               and (info is None or page <= info["page_count"])]
+    if info is not None and not missing:
+        metrics.responses.inc(endpoint=endpoint, source="cache")
+        return {"info": info, "thumbnails": thumbnails}
+
+    pdf_key = _cache_key(request, deterministic)
+    write_pdf = result_cache is not None and not result_cache.contains(pdf_key)
+    source = "shared"
+
+    async def render() -> dict:
+        nonlocal source
+        source = "render"
+        async with admission.admit():
+            logger.info(f"Generating page information and {len(missing)} thumbnails for meeting ID: "
+                        f"{request.meeting.id}")
+            start = time.monotonic()
+            stats = {}
+            products = await render_pool.run("generate_meeting_notice_products", request,
+                                             deterministic=deterministic, pdf=write_pdf, thumbnail_pages=missing,
+                                             dpi=dpi, render_stats=stats, profile=profile_store.threshold())
+            render_seconds = time.monotonic() - start
+            admission.observe(render_seconds)
+
+        metrics.observe_render(endpoint, render_seconds, stats,
+                               len(products["pdf"]) if "pdf" in products else None, request)
+        await _capture_profile(request, stats, render_seconds, False, endpoint)
+        if result_cache is not None:
+            # Page information and thumbnails go to the products cache, so they never use the PDF budget
+            entries = [(product_cache, info_key, json.dumps(products["info"]).encode("utf-8"), ".json")]
+            entries += [(product_cache, _cache_key(request, deterministic, product=f"thumbnail-{page}-{dpi}"), png,
+                         ".png") for page, png in products["thumbnails"].items()]
+            if "pdf" in products:
+                entries.append((result_cache, pdf_key, products["pdf"], ".pdf"))
+            loop = asyncio.get_running_loop()
+            for cache, key, data, suffix in entries:
+                await loop.run_in_executor(None, cache.put, key, data, suffix)
+        return products
+
+    try:
+        products = await singleflight.do(f"{info_key}:{dpi}:{','.join(map(str, missing))}", render)
+    except AdmissionRejected as e:
+        _count_error(endpoint, e)
+        logger.warning(f"Rejecting meeting ID {request.meeting.id}: {str(e)}")
+        raise HTTPException(
+            status_code=503,
+            detail="Servicio saturado, inténtelo de nuevo más tarde",
+            headers={"Retry-After": str(e.retry_after)}
+        )
+    except RenderTimeoutError as e:
+        _count_error(endpoint, e)
+        logger.error(f"Timeout generating page information for meeting ID {request.meeting.id}: {str(e)}")
+        raise HTTPException(
+            status_code=504,
+            detail=f"Tiempo de generación del PDF excedido: {str(e)}"
+        )
+    except Exception as e:
+        _count_error(endpoint, e)
+        logger.error(f"Error generating page information for meeting ID {request.meeting.id}: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error generando el PDF: {str(e)}"
+        )
+    metrics.responses.inc(endpoint=endpoint, source=source)
+    thumbnails.update(products["thumbnails"])
+    return {"info": products["info"], "thumbnails": thumbnails}
+
+
+@app.post("/meeting-notice/info", openapi_extra=openapi_body(MeetingNoticeRequest))
+async def get_meeting_notice_info(
+    request: MeetingNoticeBody,
+    http_request: Request,
+    deterministic: Optional[bool] = None
+):
+    """
+    Devuelve el número de páginas, sus tamaños, las secciones y los metadatos de la convocatoria.
+
+    La maquetación se reutiliza: el PDF se genera en la misma pasada y queda en caché, por lo que
+    la descarga posterior con `/meeting-notice/generate-pdf` no vuelve a maquetar el documento.
+
+    Args:
+        request: Datos de la convocatoria de reunión
+        http_request: Petición HTTP
+        deterministic: Generar un PDF idéntico byte a byte para los mismos datos
+
+    Returns:
+        Información de las páginas en JSON
+    """
+    products = await _notice_products(request, http_request, deterministic, [], MIN_THUMBNAIL_DPI)
+    return products["info"]
+
+
+@app.post("/meeting-notice/thumbnails", openapi_extra=openapi_body(MeetingNoticeRequest))
+async def get_meeting_notice_thumbnails(
+    request: MeetingNoticeBody,
+    http_request: Request,
+    pages: List[int] = Query([1]),
+    dpi: int = Query(48, ge=MIN_THUMBNAIL_DPI, le=MAX_THUMBNAIL_DPI),
+    deterministic: Optional[bool] = None
+):
+    """
+    Genera miniaturas PNG de las páginas indicadas de la convocatoria.
+
+    Args:
+        request: Datos de la convocatoria de reunión
+        http_request: Petición HTTP
+        pages: Números de página, empezando en 1 (por defecto, la primera)
+        dpi: Resolución de las miniaturas
+        deterministic: Generar un PDF idéntico byte a byte para los mismos datos
+
+    Returns:
+        Un PNG si se pide una sola página, o un ZIP con un PNG por página
+    """
+    if not thumbnails_available():
+        raise HTTPException(status_code=503, detail="Las miniaturas no están disponibles: falta pdftoppm")
+    pages = sorted(set(pages))
+    if pages[0] < 1 or len(pages) > MAX_THUMBNAILS_PER_REQUEST:
+        raise HTTPException(
+            status_code=422,
+            detail=f"Se admiten entre 1 y {MAX_THUMBNAILS_PER_REQUEST} páginas, numeradas desde 1"
+        )
+
+    products = await _notice_products(request, http_request, deterministic, pages, dpi)
+    page_count = products["info"]["page_count"]
+    if pages[-1] > page_count:
+        raise HTTPException(
+            status_code=422,
+            detail=f"La página {pages[-1]} no existe: la convocatoria tiene {page_count} páginas"
+        )
+
+    thumbnails: Dict[int, bytes] = products["thumbnails"]
+    if len(pages) == 1:
+        return Response(
+            content=thumbnails[pages[0]],
+            media_type="image/png",
+            headers={"Content-Disposition": f"inline; filename=miniatura_{request.meeting.id}_{pages[0]}.png"}
+        )
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_STORED) as archive:
+        for page in pages:
+            archive.writestr(f"pagina_{page}.png", thumbnails[page])
+    return Response(
+        content=buffer.getvalue(),
+        media_type="application/zip",
+        headers={"Content-Disposition": f"attachment; filename=miniaturas_{request.meeting.id}.zip"}
+    )
+
+
+@app.post(
+    "/meeting-notice/generate-batch",
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/json": {
+                    "schema": {"type": "array", "items": {"$ref": "#/components/schemas/MeetingNoticeRequest"}}
+                },
+                "application/x-ndjson": {"schema": {"type": "string"}}
+            }
+        }
+    },
+    response_class=StreamingResponse
+)
+async def generate_meeting_notice_batch(http_request: Request, deterministic: Optional[bool] = None):
+    """
+    Genera varios PDFs de convocatoria y los devuelve en un ZIP en streaming.
+    
+    Acepta una lista JSON de `MeetingNoticeRequest` o un cuerpo NDJSON
+    (`Content-Type: application/x-ndjson`, una convocatoria por línea). Los PDFs
+    se añaden al ZIP según terminan y el archivo se cierra con `manifest.json`,
+    que indica el estado y los errores de cada elemento.
+    
+    Args:
+        http_request: Petición HTTP con el lote de convocatorias
+        deterministic: Generar PDFs idénticos byte a byte para los mismos datos
+        
+    Returns:
+        Archivo ZIP como respuesta HTTP en streaming
+    """
+    if deterministic is None:
+        deterministic = settings.deterministic_render
+
+    content_type = http_request.headers.get("content-type", "")
+    spool = None
+    if "ndjson" in content_type:
+        spool = await spool_body(http_request.stream(), 8 * 1024 * 1024)
+        items = iter_ndjson_items(spool)
+    else:
+        try:
+            body = json.loads(await http_request.body())
+        except json.JSONDecodeError as e:
+            raise HTTPException(status_code=400, detail=f"JSON inválido: {str(e)}")
+        if not isinstance(body, list):
+            raise HTTPException(status_code=400, detail="Se esperaba una lista de convocatorias")
+        items = iter_json_items(body)
+
+    async def render(request: MeetingNoticeRequest) -> bytes:
+        # Batch items take render slots like any request; they wait for one rather than fail the item
+        async with admission.admit(reject=False):
+            return await _render_pdf_bytes(request, deterministic, http_request.url.path)
+
+    concurrency = settings.batch_concurrency or render_pool.size
+    logger.info(f"Generating PDF batch with concurrency {concurrency}")
+    return StreamingResponse(
+        stream_batch_zip(items, render, concurrency),
+        media_type="application/zip",
+        headers={"Content-Disposition": "attachment; filename=convocatorias.zip"},
+        background=BackgroundTask(spool.close) if spool is not None else None
+    )
+
+
+@app.post("/meeting-notice/mail-merge", openapi_extra=openapi_body(MailMergeRequest))
+async def generate_mail_merge(
+    request: MailMergeBody,
+    merged: bool = False,
+    deterministic: Optional[bool] = None
+):
+    """
+    Genera una copia personalizada de la convocatoria para cada propietario.
+
+    La convocatoria, el orden del día y los documentos se maquetan una sola vez;
+    la hoja de votación y el modelo de representación se rellenan con el nombre,
+    la vivienda y el código de votación de cada destinatario.
+
+    Args:
+        request: Datos de la convocatoria y lista de destinatarios
+        merged: Devolver un único PDF para imprimir en lugar de un ZIP con un PDF por propietario
+        deterministic: Generar PDFs idénticos byte a byte para los mismos datos
+
+    Returns:
+        ZIP con un PDF por propietario, o un único PDF si `merged` es verdadero
+    """
+    if deterministic is None:
+        deterministic = settings.deterministic_render
+
+    started = time.perf_counter()
+    endpoint = "/meeting-notice/mail-merge"
+    method = "generate_mail_merge_print_file" if merged else "generate_mail_merge_pdfs"
+    timeout = settings.render_timeout_seconds + settings.mail_merge_seconds_per_recipient * len(request.recipients)
+    try:
+        queued = time.monotonic()
+        async with admission.admit():
+            logger.info(f"Generating mail merge of {len(request.recipients)} copies for meeting ID: {request.meeting.id}")
+            start = time.monotonic()
+            stats = {}
+            result = await render_pool.run(method, request, request.recipients,
+                                           deterministic=deterministic, timeout=timeout, render_stats=stats)
+            render_seconds = time.monotonic() - start
+            admission.observe(render_seconds)
+    except AdmissionRejected as e:
+        _count_error(endpoint, e)
+        logger.warning(f"Rejecting mail merge for meeting ID {request.meeting.id}: {str(e)}")
+        raise HTTPException(
+            status_code=503,
+            detail="Servicio saturado, inténtelo de nuevo más tarde",
+            headers={"Retry-After": str(e.retry_after)}
+        )
+    except RenderTimeoutError as e:
+        _count_error(endpoint, e)
+        logger.error(f"Timeout generating mail merge for meeting ID {request.meeting.id}: {str(e)}")
+        raise HTTPException(
+            status_code=504,
+            detail=f"Tiempo de generación del PDF excedido: {str(e)}"
+        )
+    except Exception as e:
+        _count_error(endpoint, e)
+        logger.error(f"Error generating mail merge for meeting ID {request.meeting.id}: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error generando el PDF: {str(e)}"
+        )
+
+    queue_seconds = start - queued
+    metrics.queue_seconds.observe(queue_seconds, endpoint=endpoint)
+    metrics.observe_render(endpoint, render_seconds, stats,
+                           len(result) if merged else sum(len(pdf) for pdf in result), request)
+    metrics.responses.inc(endpoint=endpoint, source="render")
+    timings = _render_timings(stats, render_seconds, queue_seconds)
+
+    if merged:
+        return Response(
+            content=result,
+            media_type="application/pdf",
+            headers={"Content-Disposition": f"attachment; filename=convocatorias_reunion_{request.meeting.id}.pdf",
+                     "Server-Timing": server_timing(dict(timings, total=time.perf_counter() - started))}
+        )
+    archive = await asyncio.get_running_loop().run_in_executor(
+        None, zip_recipient_pdfs, request.meeting.id, request.recipients, result)
+    return Response(
+        content=archive,
+        media_type="application/zip",
+        headers={"Content-Disposition": f"attachment; filename=convocatorias_reunion_{request.meeting.id}.zip",
+                 "Server-Timing": server_timing(dict(timings, total=time.perf_counter() - started))}
+    )
+
+
+def _job_view(job: dict) -> dict:
+    """Public representation of a job record"""
+    view = {key: value for key, value in job.items() if key not in ("webhook_url", "options")}
+    view["result_url"] = f"/jobs/{job['job_id']}/result" if job["status"] == SUCCEEDED else None
+    return view
+
+
+async def _run_job(job_id: str):
+    """Render a stored job, save its result and notify its webhook"""
+    if not job_store.claim(job_id):
+        # Already taken by another server worker
+        return
+    try:
+        # Stays queued until one of the job slots is free
+        async with _job_slots:
+            await _render_job(job_id)
+    finally:
+        job_store.release(job_id)
+
+
+async def _render_job(job_id: str):
+    loop = asyncio.get_running_loop()
+    job = job_store.get(job_id)
+    request = job_store.load_request(job_id)
+    started_at = time.time()
+    job_store.update(job_id, status=RUNNING, started_at=started_at,
+                     queue_seconds=round(started_at - job["created_at"], 3))
+    deterministic = job["options"].get("deterministic", settings.deterministic_render)
+
+    try:
+        # Jobs take render slots like any request, so they count in the backpressure of the API
+        async with admission.admit(reject=False):
+            pdf_bytes = await _render_pdf_bytes(request, deterministic, "/jobs")
+        await loop.run_in_executor(None, job_store.save_result, job_id, pdf_bytes)
+        job = job_store.update(job_id, status=SUCCEEDED, finished_at=time.time(),
+                               render_seconds=round(time.time() - started_at, 3), size=len(pdf_bytes))
+        logger.info(f"Job {job_id} finished for meeting ID: {request.meeting.id}")
+    except Exception as e:
+        logger.error(f"Job {job_id} failed for meeting ID {request.meeting.id}: {str(e)}")
+        job = job_store.update(job_id, status=FAILED, finished_at=time.time(),
+                               render_seconds=round(time.time() - started_at, 3), error=str(e))
+
+    if job["webhook_url"]:
+        delivered = await loop.run_in_executor(
+            None, functools.partial(post_webhook, job["webhook_url"], _job_view(job),
+                                    settings.webhook_timeout_seconds,
+                                    allow_private=settings.webhook_allow_private_hosts))
+        job_store.update(job_id, webhook_delivered=delivered)
+
+
+def _schedule_job(job_id: str):
+    task = asyncio.create_task(_run_job(job_id))
+    _job_tasks.add(task)
+    task.add_done_callback(_job_tasks.discard)
+
+
+@app.post("/jobs", status_code=202, openapi_extra=openapi_body(MeetingNoticeRequest))
+async def create_job(request: MeetingNoticeBody, webhook_url: Optional[str] = None,
+                     deterministic: Optional[bool] = None):
+    """
+    Encola la generación de un PDF de convocatoria y devuelve el ID del trabajo.
+    
+    Args:
+        request: Datos de la convocatoria de reunión
+        webhook_url: URL a la que se hará un POST con el estado al terminar
+        deterministic: Generar un PDF idéntico byte a byte para los mismos datos
+        
+    Returns:
+        Estado inicial del trabajo
+    """
+    if webhook_url is not None:
+        try:
+            await asyncio.get_running_loop().run_in_executor(
+                None, validate_webhook_url, webhook_url, settings.webhook_allow_private_hosts)
+        except ValueError as e:
+            raise HTTPException(status_code=422, detail=f"webhook_url no válida: {str(e)}")
+    options = {"deterministic": deterministic} if deterministic is not None else {}
+    job = job_store.create(request, webhook_url=webhook_url, options=options)
+    _schedule_job(job["job_id"])
+    logger.info(f"Queued job {job['job_id']} for meeting ID: {request.meeting.id}")
+    return _job_view(job)
+
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Estado y tiempos de un trabajo de generación"""
+    job = job_store.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Trabajo no encontrado")
+    return _job_view(job)
+
+
+@app.get("/jobs/{job_id}/result")
+async def get_job_result(job_id: str):
+    """Descarga el PDF generado por un trabajo terminado"""
+    job = job_store.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Trabajo no encontrado")
+    if job["status"] == FAILED:
+        raise HTTPException(status_code=409, detail=f"El trabajo falló: {job['error']}")
+    if job["status"] != SUCCEEDED:
+        raise HTTPException(status_code=409, detail="El trabajo aún no ha terminado")
+    return FileResponse(
+        job_store.result_path(job_id),
+        media_type="application/pdf",
+        headers=_pdf_headers(job["meeting_id"], None)
+    )
+
+
+@app.get("/debug/profiles", dependencies=[Depends(_require_debug_token)])
+async def list_profiles():
+    """Capturas de perfilado de renderizados lentos o solicitados, de la más reciente a la más antigua"""
+    captures = await asyncio.get_running_loop().run_in_executor(None, profile_store.captures)
+    return {"captures": captures}
+
+
+@app.get("/debug/profiles/{capture_id}", dependencies=[Depends(_require_debug_token)])
+async def download_profile(capture_id: str):
+    """Descarga una captura (perfil, resumen, petición anonimizada y tiempos) en un ZIP"""
+    archive = await asyncio.get_running_loop().run_in_executor(None, profile_store.archive, capture_id)
+    if archive is None:
+        raise HTTPException(status_code=404, detail="Captura no encontrada")
+    return Response(
+        content=archive,
+        media_type="application/zip",
+        headers={"Content-Disposition": f"attachment; filename=perfil_{capture_id}.zip"}
+    )
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Métricas del servicio en formato de texto de Prometheus"""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
+@app.api_route("/ready", methods=["GET", "HEAD"])
+async def readiness_check():
+    """Readiness check: 200 once the render workers have warmed up, 503 until then"""
+    if _warm_up["status"] == "ready" and render_pool.ready:
+        return {"status": "ready", "warm_up_seconds": _warm_up["seconds"], "workers": render_pool.size}
+    if _warm_up["status"] == "ready":
+        # Every render worker died and none of their replacements has started yet
+        return JSONResponse(status_code=503, content={"status": "unavailable", "workers": render_pool.size,
+                                                      "missing_workers": render_pool.stats()["missing_workers"]})
+    content = {"status": _warm_up["status"]}
+    if _warm_up["error"] is not None:
+        content["error"] = _warm_up["error"]
+    return JSONResponse(status_code=503, content=content)
+
+
 @app.api_route("/health", methods=["GET", "HEAD"])
 async def health_check():
     """Health check endpoint for monitoring"""
     return {
         "status": "healthy",
         "service": "meeting-notice-pdf-generator",
-        "version": "1.0.0"
+        "version": "1.0.0",
+        "ready": _warm_up["status"] == "ready" and render_pool.ready,
+        "queue": admission.stats(),
+        "render_pool": render_pool.stats(),
+        "result_cache": result_cache.stats() if result_cache is not None else None,
+        "product_cache": product_cache.stats() if product_cache is not None else None,
+        "singleflight": singleflight.stats(),
+        "attachment_cache": attachment_fetcher.cache.stats() if attachment_fetcher.cache is not None else None
     }
 
 
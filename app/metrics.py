@@ -0,0 +1,257 @@
+"""
+Service metrics in the Prometheus text format, and per-render phase timings.
+
+Render phases are recorded where they happen, inside ``PDFGenerator``, with
+``render_phase``; ``collect_render_stats`` gathers them for one render so the
+render pool can send them back with the PDF, whether it ran in a worker
+process or a thread.
+"""
+
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+# Phases of a render, in pipeline order
+RENDER_PHASES = ("context", "jinja", "html_parse", "layout", "pdf_write", "thumbnails")
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+PAGE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512)
+SIZE_BUCKETS = (16 * 1024, 64 * 1024, 256 * 1024, 1024 ** 2, 4 * 1024 ** 2, 16 * 1024 ** 2, 64 * 1024 ** 2)
+COUNT_BUCKETS = (0, 1, 5, 10, 25, 50, 100, 250, 500)
+
+_render_stats = threading.local()
+
+
+@contextmanager
+def collect_render_stats():
+    """Collect the phases and pages recorded by the render running in this thread"""
+    stats = {"phases": {}, "pages": 0}
+    previous = getattr(_render_stats, "current", None)
+    _render_stats.current = stats
+    try:
+        yield stats
+    finally:
+        _render_stats.current = previous
+
+
+@contextmanager
+def render_phase(name: str):
+    """Add the time spent in the block to phase ``name`` of the current render, if collected"""
+    stats = getattr(_render_stats, "current", None)
+    if stats is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        stats["phases"][name] = stats["phases"].get(name, 0.0) + time.perf_counter() - started
+
+
+def record_pages(pages: int):
+    """Add written pages to the current render, if collected"""
+    stats = getattr(_render_stats, "current", None)
+    if stats is not None:
+        stats["pages"] += pages
+
+
+def server_timing(durations: Dict[str, float], descriptions: Dict[str, str] = None) -> str:
+    """``Server-Timing`` header value for durations in seconds"""
+    entries = []
+    for name, seconds in durations.items():
+        entry = f"{name};dur={seconds * 1000:.1f}"
+        if descriptions and name in descriptions:
+            entry += f';desc="{descriptions[name]}"'
+        entries.append(entry)
+    return ", ".join(entries)
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{str(value)}"'.replace("\n", " ") for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labels: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(labels.get(name, "") for name in self.labels)
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._samples())
+        return lines
+
+    def _samples(self) -> list:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """Monotonically increasing count, per label set"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labels: Iterable[str] = ()):
+        super().__init__(name, documentation, labels)
+        self._values = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def _samples(self) -> list:
+        with self._lock:
+            values = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labels, key)} {_format_value(value)}" for key, value in values]
+
+
+class ScrapedMetric(_Metric):
+    """
+    Gauge or counter read from another component when the metrics are scraped.
+
+    ``fn`` returns a number, or for labelled metrics a dict from label value
+    tuples to numbers; ``None`` values are left out.
+    """
+
+    def __init__(self, name: str, documentation: str, fn: Callable, labels: Iterable[str] = (),
+                 kind: str = "gauge"):
+        super().__init__(name, documentation, labels)
+        self.fn = fn
+        self.kind = kind
+
+    def _samples(self) -> list:
+        values = self.fn()
+        if not isinstance(values, dict):
+            values = {(): values}
+        return [f"{self.name}{_format_labels(self.labels, key)} {_format_value(value)}"
+                for key, value in sorted(values.items()) if value is not None]
+
+
+class Histogram(_Metric):
+    """Distribution of observed values over fixed buckets, per label set"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, buckets: Iterable[float], labels: Iterable[str] = ()):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        self._series = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = {"counts": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series["counts"][index] += 1
+                    break
+            series["sum"] += value
+            series["count"] += 1
+
+    def _samples(self) -> list:
+        lines = []
+        with self._lock:
+            series_items = sorted((key, dict(series, counts=list(series["counts"])))
+                                  for key, series in self._series.items())
+        for key, series in series_items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, series["counts"]):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labels, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, key)} {_format_value(series['sum'])}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, key)} {series['count']}")
+        return lines
+
+
+class MetricsRegistry:
+    """Ordered set of metrics exposed together"""
+
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+class ServiceMetrics:
+    """Request and render metrics of the PDF service"""
+
+    def __init__(self):
+        self.registry = MetricsRegistry()
+        register = self.registry.register
+        self.render_seconds = register(Histogram(
+            "pdf_render_seconds", "Time a render spent in the render pool", LATENCY_BUCKETS, ("endpoint",)))
+        self.render_phase_seconds = register(Histogram(
+            "pdf_render_phase_seconds", "Time spent in each phase of a render", LATENCY_BUCKETS, ("phase",)))
+        self.queue_seconds = register(Histogram(
+            "pdf_queue_wait_seconds", "Time a render waited for a render slot", LATENCY_BUCKETS, ("endpoint",)))
+        self.pages = register(Histogram("pdf_pages", "Pages of each rendered PDF", PAGE_BUCKETS, ("endpoint",)))
+        self.output_bytes = register(Histogram(
+            "pdf_output_bytes", "Size of each rendered PDF", SIZE_BUCKETS, ("endpoint",)))
+        self.input_meeting_points = register(Histogram(
+            "pdf_input_meeting_points", "Meeting points per rendered request", COUNT_BUCKETS))
+        self.input_documents = register(Histogram(
+            "pdf_input_documents", "Meeting documents per rendered request", COUNT_BUCKETS))
+        self.responses = register(Counter(
+            "pdf_responses_total", "PDF responses by where the PDF came from", ("endpoint", "source")))
+        self.errors = register(Counter(
+            "pdf_errors_total", "Failed PDF requests by error type", ("endpoint", "type")))
+        self.render_busy_seconds = register(Counter(
+            "pdf_render_busy_seconds_total",
+            "Render time summed over all renders; its rate divided by the worker count is the utilisation"))
+
+    def scrape(self, name: str, documentation: str, fn: Callable, labels: Iterable[str] = (),
+               kind: str = "gauge"):
+        """Expose a value read from another component at scrape time"""
+        self.registry.register(ScrapedMetric(name, documentation, fn, labels, kind))
+
+    def observe_render(self, endpoint: str, seconds: float, stats: dict, output_bytes: Optional[int],
+                       request=None):
+        """Record a finished render, its phases, pages and output size, and the size of its input"""
+        self.render_seconds.observe(seconds, endpoint=endpoint)
+        self.render_busy_seconds.inc(seconds)
+        for phase, phase_seconds in stats.get("phases", {}).items():
+            self.render_phase_seconds.observe(phase_seconds, phase=phase)
+        if stats.get("pages"):
+            self.pages.observe(stats["pages"], endpoint=endpoint)
+        if output_bytes is not None:
+            self.output_bytes.observe(output_bytes, endpoint=endpoint)
+        if request is not None:
+            self.input_meeting_points.observe(len(request.meeting.meeting_points))
+            self.input_documents.observe(len(request.meeting.documents)
+                                         + sum(len(point.documents) for point in request.meeting.meeting_points))
+
+    def render(self) -> str:
+        return self.registry.render()
@@ -10,6 +10,14 @@ class VoteType(str, Enum):
     FREE = "free"
 
 
+class Section(str, Enum):
+    CONVOCATION = "convocation"
+    AGENDA = "agenda"
+    DOCUMENTS = "documents"
+    VOTING_SHEET = "voting_sheet"
+    PROXY_FORM = "proxy_form"
+
+
 class Coordinates(BaseModel):
     Lat: float
     Long: float
@@ -86,4 +94,15 @@ class Meeting(BaseModel):
 
 class MeetingNoticeRequest(BaseModel):
     community: Community
-    meeting: Meeting 
\ No newline at end of file
+    meeting: Meeting
+    generated_at: Optional[datetime] = None  # Fixed generation date for deterministic renders
+
+
+class Recipient(BaseModel):
+    name: str
+    unit: str  # Flat or premises number, e.g. "3º B"
+    ballot_token: str
+
+
+class MailMergeRequest(MeetingNoticeRequest):
+    recipients: List[Recipient] = Field(min_length=1)
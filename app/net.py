@@ -0,0 +1,116 @@
+import functools
+import http.client
+import ipaddress
+import socket
+import urllib.request
+from typing import List
+from urllib.parse import urlsplit
+
+
+def resolve_public_host(host: str, port: int, allow_private: bool = False) -> List[str]:
+    """
+    Resolve ``host`` and return its addresses.
+
+    Unless ``allow_private`` is set, raise ``ValueError`` if any address is
+    loopback, private, link-local or otherwise not globally routable.
+    """
+    try:
+        addresses = list(dict.fromkeys(
+            info[4][0] for info in socket.getaddrinfo(host, port, proto=socket.IPPROTO_TCP)))
+    except (socket.gaierror, UnicodeError) as e:
+        raise ValueError(f"host {host} does not resolve: {e}")
+    if not allow_private:
+        for address in addresses:
+            if not ipaddress.ip_address(address.split("%")[0]).is_global:
+                raise ValueError(f"host {host} resolves to non-public address {address}")
+    return addresses
+
+
+def validate_public_url(url: str, allow_private: bool = False):
+    """
+    Raise ``ValueError`` unless ``url`` is an http(s) URL with a host.
+
+    Unless ``allow_private`` is set, the host must also resolve only to
+    public addresses, so outgoing requests can't reach loopback, private or
+    link-local services.
+    """
+    try:
+        parts = urlsplit(url)
+        host = parts.hostname
+        port = parts.port
+    except ValueError as e:
+        raise ValueError(f"malformed URL: {e}")
+    if parts.scheme not in ("http", "https") or not host:
+        raise ValueError("only http and https URLs with a host are allowed")
+    if allow_private:
+        return
+    resolve_public_host(host, port or (443 if parts.scheme == "https" else 80))
+
+
+class _PublicConnectionMixin:
+    """Connects only to addresses that pass ``resolve_public_host`` at connect time"""
+
+    def __init__(self, *args, allow_private: bool = False, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.allow_private = allow_private
+        # Checking the addresses actually connected to, not an earlier lookup, defeats DNS rebinding
+        self._create_connection = self._connect_public
+
+    def _connect_public(self, address, timeout, source_address=None):
+        host, port = address
+        last_error = None
+        for ip in resolve_public_host(host, port, self.allow_private):
+            try:
+                return socket.create_connection((ip, port), timeout, source_address)
+            except OSError as e:
+                last_error = e
+        raise last_error
+
+
+class _PublicHTTPConnection(_PublicConnectionMixin, http.client.HTTPConnection):
+    pass
+
+
+class _PublicHTTPSConnection(_PublicConnectionMixin, http.client.HTTPSConnection):
+    pass
+
+
+class _PublicHTTPHandler(urllib.request.HTTPHandler):
+    def __init__(self, allow_private: bool):
+        super().__init__()
+        self.allow_private = allow_private
+
+    def http_open(self, req):
+        return self.do_open(functools.partial(_PublicHTTPConnection, allow_private=self.allow_private), req)
+
+
+class _PublicHTTPSHandler(urllib.request.HTTPSHandler):
+    def __init__(self, allow_private: bool):
+        super().__init__()
+        self.allow_private = allow_private
+
+    def https_open(self, req):
+        return self.do_open(functools.partial(_PublicHTTPSConnection, allow_private=self.allow_private), req,
+                            context=self._context)
+
+
+class _RefuseRedirectHandler(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        # Returning None makes the 3xx surface as an HTTPError
+        return None
+
+
+def build_public_opener(allow_private: bool = False) -> urllib.request.OpenerDirector:
+    """
+    urllib opener for requests to caller-supplied URLs.
+
+    Redirects are refused and, unless ``allow_private`` is set, connections
+    are only made to public addresses, checked when connecting. Proxies from
+    the environment are ignored, since they would hide the real target.
+    """
+    return urllib.request.build_opener(
+        urllib.request.ProxyHandler({}),
+        _PublicHTTPHandler(allow_private),
+        _PublicHTTPSHandler(allow_private),
+        _RefuseRedirectHandler(),
+    )
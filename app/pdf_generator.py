@@ -1,28 +1,48 @@
+import copy
+import hashlib
 import os
-from datetime import datetime
-from typing import List
-from weasyprint import HTML, CSS
+from datetime import datetime, timezone
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+from urllib.parse import quote
+from weasyprint import HTML, Attachment
 from jinja2 import Template
-from app.models import MeetingNoticeRequest, MeetingPoint, Document
+from app.attachments import meeting_documents
+from app.config import settings
+from app.layout_cache import LayoutCache
+from app.metrics import record_pages, render_phase
+from app.models import MeetingNoticeRequest, MeetingPoint, Document, Recipient
+from app.products import document_info, rasterize
+from app.sections import RECIPIENT_SECTIONS, SECTIONS, SHARED_SECTIONS, sections_with_content
+from app.template_registry import STATIC_DIR, TEMPLATE_DIR, TemplateRegistry, get_registry
+from app.warmup import warm_up_request
 import logging
 
 class PDFGenerator:
-    def __init__(self):
-        self.template_dir = os.path.join(os.path.dirname(__file__), 'templates')
-        self.static_dir = os.path.join(os.path.dirname(__file__), 'static')
+    def __init__(self, registry: TemplateRegistry = None):
+        self.template_dir = TEMPLATE_DIR
+        self.static_dir = STATIC_DIR
+        self.registry = registry or get_registry()
+        self.layout_cache = LayoutCache(settings.layout_cache_entries)
+        self.document_cache = LayoutCache(settings.document_cache_entries, settings.document_cache_ttl_seconds)
         
     def _load_template(self, template_name: str) -> Template:
-        """Load HTML template from file"""
-        template_path = os.path.join(self.template_dir, template_name)
-        with open(template_path, 'r', encoding='utf-8') as f:
-            return Template(f.read())
+        """Get the compiled HTML template from the registry"""
+        return self.registry.get_template(template_name)
     
-    def _load_css(self, css_name: str) -> str:
-        """Load CSS from file"""
-        css_path = os.path.join(self.static_dir, css_name)
-        with open(css_path, 'r', encoding='utf-8') as f:
-            return f.read()
+    def _load_css(self, css_name: str):
+        """Get the parsed CSS stylesheet from the registry"""
+        return self.registry.get_css(css_name)
     
+    def warm_up(self):
+        """
+        Load templates, stylesheets and fonts ahead of the first real render.
+
+        Renders a synthetic notice with every section through the full
+        pipeline, so fontconfig, Pango and WeasyPrint build their caches
+        before any request is served.
+        """
+        self.generate_meeting_notice_pdf(warm_up_request(), deterministic=True)
+
     def _format_datetime(self, timestamp: int) -> str:
         """Convert Unix timestamp to formatted datetime string"""
         dt = datetime.fromtimestamp(timestamp / 1000)  # Convert from milliseconds
@@ -68,66 +88,311 @@ class PDFGenerator:
         }
         return meeting_types.get(meeting_type, meeting_type)
         
-    def generate_meeting_notice_pdf(self, data: MeetingNoticeRequest) -> bytes:
+    def _generation_time(self, data: MeetingNoticeRequest, deterministic: bool) -> datetime:
+        """
+        Timestamp printed as the generation date.
+
+        In deterministic mode it comes from the payload (``generated_at``, or the
+        latest meeting point update) or, failing that, the configured fixed epoch.
+        """
+        if not deterministic:
+            return datetime.now()
+        if data.generated_at is not None:
+            return data.generated_at
+        updates = [point.updated_at for point in data.meeting.meeting_points]
+        if updates:
+            return max(updates)
+        return datetime.fromtimestamp(settings.deterministic_epoch, tz=timezone.utc)
+
+    def _deterministic_metadata(self, document, html_content: str, generated_at: datetime) -> dict:
+        """
+        Pin PDF dates to the generation time and derive the file identifier
+        from the content hash, returning the extra ``write_pdf`` options
+        """
+        if generated_at.tzinfo is not None:
+            generated_at = generated_at.astimezone(timezone.utc)
+        pdf_date = generated_at.strftime("%Y-%m-%dT%H:%M:%SZ")
+        document.metadata.created = pdf_date
+        document.metadata.modified = pdf_date
+
+        content_hash = hashlib.sha256(html_content.encode('utf-8'))
+        content_hash.update(self.registry.fingerprint('styles.css').encode('ascii'))
+        return {'pdf_identifier': content_hash.hexdigest()[:32].encode('ascii')}
+
+    def _build_context(self, data: MeetingNoticeRequest, generated_at: datetime,
+                       sections: Sequence[str] = SECTIONS, recipient: Recipient = None,
+                       notice_footer: bool = True) -> dict:
+        """Prepare template context with properly formatted data"""
+        return {
+            'community': {
+                'id': data.community.id,
+                'name': data.community.name,
+                'legal_name': data.community.legal_name,
+                'cif': data.community.cif,
+                'address': data.community.address,
+                'coordinates': data.community.coordinates,
+                'admin': data.community.admin
+            },
+            'meeting': {
+                'id': data.meeting.id,
+                'title': data.meeting.title,
+                'meeting_type': self._get_meeting_type_text(data.meeting.meeting_type),
+                'date_time': self._format_datetime(data.meeting.date_time),
+                'time': self._format_time(data.meeting.date_time),
+                'location_time': self._format_location_time(data.meeting.date_time),
+                'location': data.meeting.location,
+                'description': data.meeting.description,
+                'status': data.meeting.status,
+                'documents': data.meeting.documents,
+                'meeting_points': data.meeting.meeting_points
+            },
+            'sections': list(sections),
+            'recipient': recipient,
+            'notice_footer': notice_footer,
+            'generated_at': generated_at.strftime("%d/%m/%Y a las %H:%M horas"),
+            'format_file_size': self._format_file_size,
+            'get_vote_type_text': self._get_vote_type_text
+        }
+
+    def _render_html(self, data: MeetingNoticeRequest, generated_at: datetime,
+                     sections: Sequence[str] = SECTIONS, recipient: Recipient = None,
+                     notice_footer: bool = True) -> str:
+        """Render the notice template for the given sections"""
+        template = self._load_template('meeting_notice.html')
+        with render_phase('context'):
+            context = self._build_context(data, generated_at, sections, recipient, notice_footer)
+        with render_phase('jinja'):
+            return template.render(**context)
+
+    def _layout(self, html_content: str):
+        """Lay out rendered HTML with the shared stylesheet into a WeasyPrint document"""
+        css_doc = self._load_css('styles.css')
+        with render_phase('html_parse'):
+            html = HTML(string=html_content)
+        with render_phase('layout'):
+            return html.render(stylesheets=[css_doc], font_config=self.registry.font_config)
+
+    def _layout_key(self, html_content: str) -> str:
+        key = hashlib.sha256(html_content.encode('utf-8'))
+        key.update(self.registry.fingerprint('styles.css').encode('ascii'))
+        return key.hexdigest()
+
+    def _layout_cached(self, html_content: str):
+        """Lay out rendered HTML, reusing the layout of identical HTML from the layout cache"""
+        return self.layout_cache.get_or_create(self._layout_key(html_content), lambda: self._layout(html_content))
+
+    def _layout_document(self, html_content: str):
+        """
+        Lay out a full notice, reusing it from the document cache for a short time.
+
+        Callers must write a copy (see ``_combine``) since the cached document
+        is shared.
+        """
+        return self.document_cache.get_or_create(self._layout_key(html_content),
+                                                 lambda: self._layout(html_content))
+
+    def _combine(self, documents: list):
+        """
+        Concatenate the pages of laid-out documents into a new document.
+
+        The metadata is copied so cached documents are never modified when the
+        combined one gets its dates set.
+        """
+        combined = documents[0].copy([page for document in documents for page in document.pages])
+        combined.metadata = copy.copy(documents[0].metadata)
+        return combined
+
+    def _embedded_attachments(self, data: MeetingNoticeRequest, payloads: Dict[str, bytes],
+                              generated_at: datetime, deterministic: bool) -> list:
+        """PDF file attachments for the downloaded meeting documents, in notice order"""
+        # Attachment dates default to now; pin them so deterministic output stays stable
+        fixed_date = generated_at if deterministic else None
+        attachments = []
+        for document in meeting_documents(data):
+            payload = payloads.get(document.id)
+            if payload is None:
+                continue
+            # WeasyPrint takes the embedded file name from the last path segment of base_url
+            attachments.append(Attachment(string=payload, base_url=f"attachment:///{quote(document.name)}",
+                                          description=document.name, created=fixed_date,
+                                          modified=fixed_date))
+        return attachments
+
+    def _write_pdf(self, document, html_content: str, generated_at: datetime, deterministic: bool,
+                   attachments: list = None, target=None) -> Optional[bytes]:
+        options = {}
+        if deterministic:
+            options = self._deterministic_metadata(document, html_content, generated_at)
+        if attachments:
+            options['attachments'] = attachments
+        record_pages(len(document.pages))
+        with render_phase('pdf_write'):
+            return document.write_pdf(target, **options)
+
+    def generate_meeting_notice_pdf(self, data: MeetingNoticeRequest, deterministic: bool = None,
+                                    sections: Sequence[str] = None,
+                                    attachments: Dict[str, bytes] = None, target=None) -> Optional[bytes]:
         """
         Generate a PDF meeting notice using WeasyPrint
         
         Args:
             data: MeetingNoticeRequest object containing meeting data
+            deterministic: Produce byte-identical output for identical input
+                (defaults to the process-wide ``deterministic_render`` setting)
+            sections: Render only these sections of the notice (defaults to the whole document)
+            attachments: Downloaded meeting documents by id, embedded as PDF file attachments
+            target: File path or binary file object to write the PDF into instead of
+                returning it, so the document never has to be held in memory whole
             
         Returns:
-            bytes: PDF content as bytes
+            bytes: PDF content as bytes, or None when written to ``target``
         """
+        if deterministic is None:
+            deterministic = settings.deterministic_render
+
         try:
-            # Load the HTML template
-            template = self._load_template('meeting_notice.html')
-            
-            # Load CSS styles
-            css_content = self._load_css('styles.css')
-            
-            # Prepare template context with properly formatted data
-            context = {
-                'community': {
-                    'id': data.community.id,
-                    'name': data.community.name,
-                    'legal_name': data.community.legal_name,
-                    'cif': data.community.cif,
-                    'address': data.community.address,
-                    'coordinates': data.community.coordinates,
-                    'admin': data.community.admin
-                },
-                'meeting': {
-                    'id': data.meeting.id,
-                    'title': data.meeting.title,
-                    'meeting_type': self._get_meeting_type_text(data.meeting.meeting_type),
-                    'date_time': self._format_datetime(data.meeting.date_time),
-                    'time': self._format_time(data.meeting.date_time),
-                    'location_time': self._format_location_time(data.meeting.date_time),
-                    'location': data.meeting.location,
-                    'description': data.meeting.description,
-                    'status': data.meeting.status,
-                    'documents': data.meeting.documents,
-                    'meeting_points': data.meeting.meeting_points
-                },
-                'generated_at': datetime.now().strftime("%d/%m/%Y a las %H:%M horas"),
-                'format_file_size': self._format_file_size,
-                'get_vote_type_text': self._get_vote_type_text
-            }
-            
+            generated_at = self._generation_time(data, deterministic)
+            embedded = self._embedded_attachments(data, attachments or {}, generated_at, deterministic)
+
+            if sections is not None:
+                return self._generate_sections_pdf(data, sections, generated_at, deterministic, embedded, target)
+
             # Render HTML with template
-            html_content = template.render(**context)
-            
-            # Create WeasyPrint HTML object
-            html_doc = HTML(string=html_content)
-            
-            # Create CSS object
-            css_doc = CSS(string=css_content)
+            html_content = self._render_html(data, generated_at)
             
-            # Generate PDF with styles
-            pdf_bytes = html_doc.write_pdf(stylesheets=[css_doc])
-            
-            return pdf_bytes
+            # Lay out the document with styles
+            document = self._layout_document(html_content)
+
+            # Generate PDF
+            return self._write_pdf(self._combine([document]), html_content, generated_at, deterministic,
+                                   embedded, target)
             
         except Exception as e:
             logging.error(f"Error generating PDF: {str(e)}")
-            raise Exception(f"Failed to generate PDF: {str(e)}")
\ No newline at end of file
+            raise Exception(f"Failed to generate PDF: {str(e)}")
+
+    def generate_meeting_notice_products(self, data: MeetingNoticeRequest, deterministic: bool = None,
+                                         pdf: bool = True, thumbnail_pages: Sequence[int] = (),
+                                         dpi: int = 72) -> dict:
+        """
+        Lay out the full notice once and produce several outputs from that layout.
+
+        Args:
+            data: MeetingNoticeRequest object containing meeting data
+            deterministic: Produce byte-identical output for identical input
+            pdf: Also write the PDF, identical to ``generate_meeting_notice_pdf``
+            thumbnail_pages: Page numbers (from 1) to rasterise as PNG; pages
+                beyond the end of the document are skipped
+            dpi: Resolution of the thumbnails
+
+        Returns:
+            dict: ``info`` (page count, page sizes, sections and metadata),
+            ``thumbnails`` (PNG bytes by page number) and ``pdf`` if requested
+        """
+        if deterministic is None:
+            deterministic = settings.deterministic_render
+
+        try:
+            generated_at = self._generation_time(data, deterministic)
+            html_content = self._render_html(data, generated_at)
+            # Kept in the document cache, so a later output of this notice reuses the layout
+            document = self._layout_document(html_content)
+
+            products = {
+                "info": document_info(document, sections_with_content(data, SECTIONS), generated_at.isoformat()),
+                "thumbnails": {},
+            }
+            if pdf:
+                products["pdf"] = self._write_pdf(self._combine([document]), html_content, generated_at,
+                                                  deterministic)
+            for number in thumbnail_pages:
+                if 1 <= number <= len(document.pages):
+                    with render_phase('thumbnails'):
+                        page_pdf = document.copy([document.pages[number - 1]]).write_pdf()
+                        products["thumbnails"][number] = rasterize(page_pdf, dpi)
+            return products
+
+        except Exception as e:
+            logging.error(f"Error generating notice outputs: {str(e)}")
+            raise Exception(f"Failed to generate PDF: {str(e)}")
+
+    def _generate_sections_pdf(self, data: MeetingNoticeRequest, sections: Sequence[str],
+                               generated_at: datetime, deterministic: bool, attachments: list = None,
+                               target=None) -> Optional[bytes]:
+        """
+        Lay out each requested section on its own and combine their pages.
+
+        Every section starts on a new page, so sections laid out independently
+        give the same pages as the full document, and each one is reused from
+        the layout cache until its own HTML changes.
+        """
+        selected = sections_with_content(data, sections)
+        if not selected:
+            raise ValueError("None of the requested sections has content for this meeting")
+        notice_sections = [section for section in selected if section in SHARED_SECTIONS]
+
+        documents = []
+        html_contents = []
+        for section in selected:
+            # The notice footer closes the last of the convocation/agenda/documents sections
+            notice_footer = bool(notice_sections) and section == notice_sections[-1]
+            html_content = self._render_html(data, generated_at, (section,), notice_footer=notice_footer)
+            documents.append(self._layout_cached(html_content))
+            html_contents.append(html_content)
+
+        return self._write_pdf(self._combine(documents), ''.join(html_contents), generated_at, deterministic,
+                               attachments, target)
+
+    def _mail_merge_documents(self, data: MeetingNoticeRequest, recipients: List[Recipient],
+                              generated_at: datetime) -> Iterator[Tuple[object, str]]:
+        """
+        Yield ``(document, html_content)`` for every recipient's copy of the notice.
+
+        The shared sections are laid out once and their pages reused for every
+        copy; only the recipient sections are rendered and laid out per owner.
+        """
+        shared_html = self._render_html(data, generated_at, SHARED_SECTIONS)
+        shared = self._layout_cached(shared_html)
+        for recipient in recipients:
+            owner_html = self._render_html(data, generated_at, RECIPIENT_SECTIONS, recipient)
+            owner = self._layout(owner_html)
+            yield self._combine([shared, owner]), shared_html + owner_html
+
+    def generate_mail_merge_pdfs(self, data: MeetingNoticeRequest, recipients: List[Recipient],
+                                 deterministic: bool = None) -> List[bytes]:
+        """
+        Generate one personalised PDF per recipient.
+
+        Every copy has the shared convocation, agenda and documents pages plus
+        a voting sheet and proxy form pre-filled for the recipient.
+        """
+        if deterministic is None:
+            deterministic = settings.deterministic_render
+
+        try:
+            generated_at = self._generation_time(data, deterministic)
+            return [
+                self._write_pdf(document, html_content, generated_at, deterministic)
+                for document, html_content in self._mail_merge_documents(data, recipients, generated_at)
+            ]
+        except Exception as e:
+            logging.error(f"Error generating mail merge PDFs: {str(e)}")
+            raise Exception(f"Failed to generate PDF: {str(e)}")
+
+    def generate_mail_merge_print_file(self, data: MeetingNoticeRequest, recipients: List[Recipient],
+                                       deterministic: bool = None) -> bytes:
+        """Generate a single PDF with every recipient's copy, one after another, for printing"""
+        if deterministic is None:
+            deterministic = settings.deterministic_render
+
+        try:
+            generated_at = self._generation_time(data, deterministic)
+            documents = []
+            html_contents = []
+            for document, html_content in self._mail_merge_documents(data, recipients, generated_at):
+                documents.append(document)
+                html_contents.append(html_content)
+            return self._write_pdf(self._combine(documents), ''.join(html_contents), generated_at, deterministic)
+        except Exception as e:
+            logging.error(f"Error generating mail merge print file: {str(e)}")
+            raise Exception(f"Failed to generate PDF: {str(e)}")
@@ -0,0 +1,58 @@
+"""
+Outputs derived from a laid-out notice besides the PDF: page information and PNG thumbnails.
+
+WeasyPrint only writes PDF since version 53, so thumbnails are rasterised from
+a PDF of the chosen pages with ``pdftoppm`` (poppler-utils).
+"""
+
+import os
+import shutil
+import subprocess
+import tempfile
+from typing import Optional
+
+PDFTOPPM = "pdftoppm"
+
+MIN_THUMBNAIL_DPI = 18
+MAX_THUMBNAIL_DPI = 300
+MAX_THUMBNAILS_PER_REQUEST = 20
+
+# WeasyPrint page sizes are in CSS pixels (96 per inch)
+_MM_PER_CSS_PX = 25.4 / 96
+
+
+def thumbnails_available() -> bool:
+    """Whether ``pdftoppm`` is installed"""
+    return shutil.which(PDFTOPPM) is not None
+
+
+def document_info(document, sections, generated_at: Optional[str]) -> dict:
+    """Page count, page sizes and metadata of a laid-out WeasyPrint document"""
+    return {
+        "page_count": len(document.pages),
+        "pages": [
+            {"number": number, "width_mm": round(page.width * _MM_PER_CSS_PX, 1),
+             "height_mm": round(page.height * _MM_PER_CSS_PX, 1)}
+            for number, page in enumerate(document.pages, start=1)
+        ],
+        "sections": list(sections),
+        "title": document.metadata.title,
+        "generated_at": generated_at,
+    }
+
+
+def rasterize(pdf_bytes: bytes, dpi: int, timeout: float = 30.0) -> bytes:
+    """PNG of the first page of a PDF at ``dpi``"""
+    with tempfile.TemporaryDirectory(prefix="thumbnail-") as tmp_dir:
+        pdf_path = os.path.join(tmp_dir, "page.pdf")
+        with open(pdf_path, "wb") as f:
+            f.write(pdf_bytes)
+        output_root = os.path.join(tmp_dir, "page")
+        result = subprocess.run(
+            [PDFTOPPM, "-png", "-r", str(dpi), "-f", "1", "-l", "1", "-singlefile", pdf_path, output_root],
+            capture_output=True, timeout=timeout,
+        )
+        if result.returncode != 0:
+            raise RuntimeError(f"pdftoppm failed: {result.stderr.decode('utf-8', 'replace').strip()}")
+        with open(output_root + ".png", "rb") as f:
+            return f.read()
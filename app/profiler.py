@@ -0,0 +1,228 @@
+"""
+Slow-render profiling: renders are run under ``cProfile`` and, when slow or
+explicitly requested, saved to disk with their redacted request and phase
+timings so they can be analysed after the payload is gone.
+"""
+
+import cProfile
+import io
+import json
+import marshal
+import os
+import pstats
+import random
+import re
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+import zipfile
+from contextlib import contextmanager
+from typing import List, Optional
+from urllib.parse import urlsplit, urlunsplit
+from app.files import write_atomic
+from app.models import MeetingNoticeRequest
+
+_CAPTURE_ID_RE = re.compile(r"^\d{8}T\d{6}-[0-9a-f]{8}$")
+
+# Functions listed in the text summary of a capture
+SUMMARY_FUNCTIONS = 40
+
+
+@contextmanager
+def profile_render(stats: dict, keep_after: Optional[float]):
+    """
+    Run the block under ``cProfile`` when ``keep_after`` is set.
+
+    The marshalled profile is stored in ``stats["profile"]`` only when the
+    block took at least ``keep_after`` seconds, so fast renders cost the
+    profiling overhead but nothing is sent back or written for them.
+    """
+    if keep_after is None:
+        yield
+        return
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:
+        # Another profiler is already active in this process
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        if time.perf_counter() - started >= keep_after:
+            profiler.create_stats()
+            stats["profile"] = marshal.dumps(profiler.stats)
+
+
+def _redact_url(url: str) -> str:
+    """Drop the query string and fragment, which carry the signature of signed URLs"""
+    parts = urlsplit(url)
+    return urlunsplit((parts.scheme, parts.netloc, parts.path, "", ""))
+
+
+def _mask(value: str) -> str:
+    return "*" * len(value)
+
+
+def redact_request(request: MeetingNoticeRequest) -> dict:
+    """
+    Request payload without credentials or personal data.
+
+    Signed URLs lose their query string, and tax IDs and the administrator's
+    contact details are masked to the same length; meeting texts are kept
+    because their length and content drive the layout being profiled.
+    """
+    payload = request.model_dump(mode="json")
+    community = payload["community"]
+    community["cif"] = _mask(community["cif"])
+    if community.get("admin"):
+        for field in ("cif", "email", "name", "phone"):
+            community["admin"][field] = _mask(community["admin"][field])
+    documents = list(payload["meeting"]["documents"])
+    for point in payload["meeting"]["meeting_points"]:
+        documents.extend(point["documents"])
+    for document in documents:
+        document["signed_url"] = _redact_url(document["signed_url"])
+    return payload
+
+
+class ProfileStore:
+    """
+    Profiles of slow or requested renders, kept on the local filesystem.
+
+    Renders are sampled at ``sample_rate`` and profiled; the profile is kept
+    when the render took at least ``slow_seconds`` (0 disables sampling).
+    Every capture is a directory under ``root_dir`` holding ``capture.json``
+    (meeting, reason, timings), ``request.json`` (the redacted request),
+    ``profile.prof`` (loadable with ``pstats`` or snakeviz) and
+    ``summary.txt`` (the slowest functions by cumulative time). Only the
+    newest ``max_captures`` captures younger than ``ttl_seconds`` are kept.
+    """
+
+    def __init__(self, root_dir: str, slow_seconds: float = 0.0, sample_rate: float = 1.0,
+                 max_captures: int = 50, ttl_seconds: int = 7 * 24 * 3600):
+        self.root_dir = root_dir
+        self.slow_seconds = slow_seconds
+        self.sample_rate = sample_rate
+        self.max_captures = max_captures
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        os.makedirs(root_dir, exist_ok=True)
+
+    @classmethod
+    def from_settings(cls, settings) -> "ProfileStore":
+        root_dir = settings.profile_dir or os.path.join(tempfile.gettempdir(), "meeting-notice-profiles")
+        return cls(root_dir, settings.profile_slow_seconds, settings.profile_sample_rate,
+                   settings.profile_max_captures, settings.profile_ttl_seconds)
+
+    def threshold(self, requested: bool = False) -> Optional[float]:
+        """
+        Render time from which a profile is kept, or ``None`` not to profile this render.
+
+        Requested renders are always profiled and kept.
+        """
+        if requested:
+            return 0.0
+        if self.slow_seconds > 0 and random.random() < self.sample_rate:
+            return self.slow_seconds
+        return None
+
+    def _capture_dir(self, capture_id: str) -> str:
+        if not _CAPTURE_ID_RE.match(capture_id):
+            raise KeyError(capture_id)
+        return os.path.join(self.root_dir, capture_id)
+
+    def save(self, request: MeetingNoticeRequest, stats: dict, render_seconds: float,
+             reason: str, endpoint: str) -> str:
+        """Write a capture for a profiled render and apply retention, returning the capture ID"""
+        capture_id = f"{time.strftime('%Y%m%dT%H%M%S', time.gmtime())}-{uuid.uuid4().hex[:8]}"
+        capture_dir = self._capture_dir(capture_id)
+        os.makedirs(capture_dir)
+
+        profile_path = os.path.join(capture_dir, "profile.prof")
+        write_atomic(profile_path, stats["profile"])
+        summary = io.StringIO()
+        pstats.Stats(profile_path, stream=summary).sort_stats("cumulative").print_stats(SUMMARY_FUNCTIONS)
+        write_atomic(os.path.join(capture_dir, "summary.txt"), summary.getvalue().encode("utf-8"))
+        write_atomic(os.path.join(capture_dir, "request.json"),
+                      json.dumps(redact_request(request), ensure_ascii=False).encode("utf-8"))
+
+        capture = {
+            "capture_id": capture_id,
+            "meeting_id": request.meeting.id,
+            "endpoint": endpoint,
+            "reason": reason,
+            "created_at": time.time(),
+            "render_seconds": round(render_seconds, 3),
+            "phases_ms": {phase: round(seconds * 1000, 1) for phase, seconds in stats["phases"].items()},
+            "pages": stats["pages"],
+            "meeting_points": len(request.meeting.meeting_points),
+            "documents": len(request.meeting.documents),
+        }
+        # Written last: a capture without capture.json is incomplete and not listed
+        write_atomic(os.path.join(capture_dir, "capture.json"), json.dumps(capture).encode("utf-8"))
+
+        self.prune()
+        return capture_id
+
+    def get(self, capture_id: str) -> Optional[dict]:
+        """Return the capture record, or ``None`` if it doesn't exist"""
+        try:
+            with open(os.path.join(self._capture_dir(capture_id), "capture.json"), "rb") as f:
+                return json.loads(f.read())
+        except (KeyError, FileNotFoundError):
+            return None
+
+    def captures(self) -> List[dict]:
+        """Complete captures, newest first"""
+        captures = []
+        for capture_id in os.listdir(self.root_dir):
+            if not _CAPTURE_ID_RE.match(capture_id):
+                continue
+            capture = self.get(capture_id)
+            if capture is not None:
+                captures.append(capture)
+        return sorted(captures, key=lambda capture: capture["created_at"], reverse=True)
+
+    def archive(self, capture_id: str) -> Optional[bytes]:
+        """ZIP of every file of a capture, or ``None`` if it doesn't exist"""
+        if self.get(capture_id) is None:
+            return None
+        capture_dir = self._capture_dir(capture_id)
+        buffer = io.BytesIO()
+        try:
+            with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+                for name in sorted(os.listdir(capture_dir)):
+                    if not name.endswith(".tmp"):
+                        archive.write(os.path.join(capture_dir, name), f"{capture_id}/{name}")
+        except FileNotFoundError:
+            # Pruned meanwhile by another server worker
+            return None
+        return buffer.getvalue()
+
+    def prune(self) -> int:
+        """Remove expired captures and the oldest beyond ``max_captures``, returning how many were removed"""
+        with self._lock:
+            cutoff = time.time() - self.ttl_seconds
+            entries = []
+            for capture_id in os.listdir(self.root_dir):
+                if not _CAPTURE_ID_RE.match(capture_id):
+                    continue
+                try:
+                    mtime = os.stat(os.path.join(self.root_dir, capture_id)).st_mtime
+                except FileNotFoundError:
+                    # Pruned meanwhile by another server worker
+                    continue
+                entries.append((mtime, capture_id))
+            entries.sort(reverse=True)
+            removed = 0
+            for index, (mtime, capture_id) in enumerate(entries):
+                if index >= self.max_captures or mtime < cutoff:
+                    shutil.rmtree(os.path.join(self.root_dir, capture_id), ignore_errors=True)
+                    removed += 1
+            return removed
@@ -0,0 +1,440 @@
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import logging
+from app.metrics import collect_render_stats
+from app.profiler import profile_render
+
+logger = logging.getLogger(__name__)
+
+# Delay between attempts to replace a worker that failed to start, doubling up to the maximum
+REPLACE_BACKOFF_SECONDS = 1.0
+MAX_REPLACE_BACKOFF_SECONDS = 60.0
+
+
+class RenderError(Exception):
+    """A render failed inside the pool"""
+
+    def __init__(self, message: str, error_type: str = "RenderError"):
+        super().__init__(message)
+        self.error_type = error_type
+
+
+class RenderTimeoutError(RenderError):
+    """A render did not finish before its deadline"""
+
+    def __init__(self, message: str):
+        super().__init__(message, error_type="RenderTimeoutError")
+
+
+def _current_rss_mb() -> float:
+    """Resident set size of the current process in MB"""
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        import resource
+        # ru_maxrss is the peak, in KB on Linux
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _worker_main(conn):
+    """Entry point of a render worker process"""
+    from app.pdf_generator import PDFGenerator
+
+    generator = PDFGenerator()
+    generator.warm_up()
+    conn.send(('ready', None, _current_rss_mb()))
+
+    while True:
+        try:
+            job = conn.recv()
+        except (EOFError, KeyboardInterrupt):
+            break
+        if job is None:
+            break
+
+        method, args, kwargs, profile = job
+        try:
+            with collect_render_stats() as stats, profile_render(stats, profile):
+                result = getattr(generator, method)(*args, **kwargs)
+            conn.send(('ok', (result, stats), _current_rss_mb()))
+        except Exception as e:
+            conn.send(('error', (type(e).__name__, str(e)), _current_rss_mb()))
+
+
+class _ProcessWorker:
+    """A single render process and the parent end of its pipe"""
+
+    def __init__(self, ctx, name: str):
+        self.name = name
+        self.conn, child_conn = ctx.Pipe()
+        self.process = ctx.Process(target=_worker_main, args=(child_conn,), name=name, daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.jobs = 0
+        self.rss_mb = 0.0
+
+    def wait_ready(self, timeout: float):
+        """Block until the worker has imported WeasyPrint and warmed up"""
+        if not self.conn.poll(timeout):
+            self.kill()
+            raise RenderError(f"Render worker {self.name} did not start within {timeout}s")
+        try:
+            status, _, self.rss_mb = self.conn.recv()
+        except EOFError:
+            status = None
+        if status != 'ready':
+            self.kill()
+            raise RenderError(f"Render worker {self.name} failed to start")
+
+    def run(self, job, timeout: float):
+        """Send a job and wait for ``(result, render stats)``, killing the worker past the deadline"""
+        self.jobs += 1
+        self.conn.send(job)
+        if not self.conn.poll(timeout):
+            self.kill()
+            raise RenderTimeoutError(f"Render exceeded deadline of {timeout}s")
+        try:
+            status, payload, self.rss_mb = self.conn.recv()
+        except EOFError:
+            self.kill()
+            raise RenderError(f"Render worker {self.name} died", error_type="WorkerCrashed")
+        if status == 'error':
+            error_type, message = payload
+            raise RenderError(message, error_type=error_type)
+        return payload
+
+    def is_alive(self) -> bool:
+        return self.process.is_alive()
+
+    def stop(self, timeout: float = 5.0):
+        try:
+            self.conn.send(None)
+        except (OSError, BrokenPipeError):
+            pass
+        self.process.join(timeout)
+        if self.process.is_alive():
+            self.kill()
+        self.conn.close()
+
+    def kill(self):
+        self.process.kill()
+        self.process.join()
+
+
+class RenderPool:
+    """
+    Bounded pool that runs ``PDFGenerator`` methods off the event loop.
+
+    In ``process`` mode every worker is a separate process that imports
+    WeasyPrint and warms fonts once, so renders use several cores. Workers are
+    recycled after ``max_jobs_per_worker`` jobs or once their RSS exceeds
+    ``max_rss_mb``, and a render running past its deadline has its worker
+    killed and replaced. A replacement that fails to start is retried with
+    backoff; while workers are missing ``stats`` reports them, and once none
+    is left the pool is no longer ``ready`` and renders fail at once.
+    ``thread`` mode runs renders in a thread pool inside the current process;
+    deadlines are reported but cannot interrupt a render. There the process
+    itself is the worker: when a render overruns its deadline, or after
+    ``max_jobs_per_worker`` renders or past ``max_rss_mb``, ``recycle_process``
+    is called (once) so the owner can replace the process, as the prefork
+    server does, and the pool stops being ``ready`` while every thread is
+    stuck in an overrun render.
+    """
+
+    def __init__(self, mode: str = "process", workers: int = 1, start_method: str = "spawn",
+                 max_jobs_per_worker: int = 200, max_rss_mb: int = 1024,
+                 timeout: float = 60.0, startup_timeout: float = 120.0):
+        if mode not in ("process", "thread"):
+            raise ValueError(f"Unknown render pool mode: {mode}")
+        self.mode = mode
+        self.size = max(1, workers)
+        self.start_method = start_method
+        self.max_jobs_per_worker = max_jobs_per_worker
+        self.max_rss_mb = max_rss_mb
+        self.timeout = timeout
+        self.startup_timeout = startup_timeout
+
+        self._executor = None
+        self._idle = queue.Queue()
+        self._workers = []
+        self._workers_lock = threading.Lock()
+        self._generator = None
+        self._busy = 0
+        self._started = False
+        self._starting = False
+        # Set once a start attempt finished, successfully or not
+        self._start_finished = threading.Event()
+        self._counter = 0
+        # Workers retired whose replacement hasn't started yet
+        self._missing = 0
+        # Thread mode: renders done, renders still running past their deadline, and the
+        # callback that replaces this process
+        self._thread_jobs = 0
+        self._stuck = 0
+        self.recycle_process = None
+        self._recycling = False
+        self.recycled = 0
+        self.timeouts = 0
+        self.crashes = 0
+
+    @classmethod
+    def from_settings(cls, settings, **overrides) -> "RenderPool":
+        """Pool configured from ``settings``, with ``overrides`` (e.g. ``mode``, ``workers``) taking precedence"""
+        options = dict(
+            mode=settings.render_pool_mode,
+            workers=settings.render_workers,
+            start_method=settings.render_start_method,
+            max_jobs_per_worker=settings.render_max_jobs_per_worker,
+            max_rss_mb=settings.render_max_rss_mb,
+            timeout=settings.render_timeout_seconds,
+        )
+        options.update(overrides)
+        return cls(**options)
+
+    @property
+    def ready(self) -> bool:
+        """Whether the workers have started and warmed up, and at least one is running"""
+        return self._started and self._missing < self.size and self._stuck < self.size
+
+    def mark_starting(self):
+        """Make renders requested before ``start`` finishes wait for it instead of failing"""
+        if not self._started:
+            self._starting = True
+            self._start_finished.clear()
+
+    def start(self):
+        """Start and warm up every worker (blocking)"""
+        if self._started:
+            return
+        self.mark_starting()
+        try:
+            self._executor = ThreadPoolExecutor(max_workers=self.size, thread_name_prefix="render")
+            if self.mode == "process":
+                import multiprocessing
+                self._ctx = multiprocessing.get_context(self.start_method)
+                workers = [self._spawn_worker() for _ in range(self.size)]
+                for worker in workers:
+                    worker.wait_ready(self.startup_timeout)
+                    self._idle.put(worker)
+            else:
+                from app.pdf_generator import PDFGenerator
+                self._generator = PDFGenerator()
+                self._generator.warm_up()
+            self._started = True
+        except BaseException:
+            # Stop the workers already spawned; shutdown() won't, as the pool never started
+            self._stop_workers()
+            raise
+        finally:
+            self._starting = False
+            self._start_finished.set()
+        logger.info(f"Render pool started: mode={self.mode} workers={self.size}")
+
+    def shutdown(self):
+        """Stop every worker and release the pool"""
+        if self._starting:
+            # Stopped while warming up: let the start finish so its workers are stopped too
+            self._start_finished.wait(self.startup_timeout)
+        if not self._started:
+            return
+        self._started = False
+        self._stop_workers()
+        logger.info("Render pool stopped")
+
+    def _stop_workers(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        with self._workers_lock:
+            workers, self._workers = self._workers, []
+        for worker in workers:
+            worker.stop()
+        while True:
+            try:
+                self._idle.get_nowait()
+            except queue.Empty:
+                break
+
+    def _spawn_worker(self) -> _ProcessWorker:
+        with self._workers_lock:
+            self._counter += 1
+            worker = _ProcessWorker(self._ctx, f"render-worker-{self._counter}")
+            self._workers.append(worker)
+        return worker
+
+    def _retire_worker(self, worker: _ProcessWorker, reason: str):
+        """Replace a worker in the background so the caller isn't delayed"""
+        logger.info(f"Recycling {worker.name} after {worker.jobs} jobs ({reason}, rss={worker.rss_mb:.0f}MB)")
+        with self._workers_lock:
+            if worker in self._workers:
+                self._workers.remove(worker)
+            self._missing += 1
+        self.recycled += 1
+
+        def replace():
+            if worker.is_alive():
+                worker.stop()
+            backoff = REPLACE_BACKOFF_SECONDS
+            while self._started:
+                replacement = None
+                try:
+                    replacement = self._spawn_worker()
+                    replacement.wait_ready(self.startup_timeout)
+                except Exception as e:
+                    if replacement is not None:
+                        self._discard_worker(replacement)
+                    logger.error(f"Could not replace render worker, retrying in {backoff:g}s: {e}")
+                    time.sleep(backoff)
+                    backoff = min(backoff * 2, MAX_REPLACE_BACKOFF_SECONDS)
+                    continue
+                with self._workers_lock:
+                    self._missing -= 1
+                self._idle.put(replacement)
+                return
+
+        threading.Thread(target=replace, name=f"replace-{worker.name}", daemon=True).start()
+
+    def _discard_worker(self, worker: _ProcessWorker):
+        """Stop a worker that never became ready"""
+        with self._workers_lock:
+            if worker in self._workers:
+                self._workers.remove(worker)
+        if worker.is_alive():
+            worker.kill()
+        worker.conn.close()
+
+    def _run_in_worker(self, job, timeout: float):
+        if self._missing >= self.size:
+            raise RenderError("No render worker is running", error_type="PoolExhausted")
+        try:
+            worker = self._idle.get(timeout=timeout)
+        except queue.Empty:
+            raise RenderError("No render worker became available", error_type="PoolExhausted")
+        try:
+            result = worker.run(job, timeout)
+        except RenderTimeoutError:
+            self.timeouts += 1
+            self._retire_worker(worker, "deadline exceeded")
+            raise
+        except RenderError:
+            if not worker.is_alive():
+                self.crashes += 1
+                self._retire_worker(worker, "crashed")
+            else:
+                self._idle.put(worker)
+            raise
+        except Exception:
+            self.crashes += 1
+            self._retire_worker(worker, "pipe error")
+            raise
+
+        if worker.jobs >= self.max_jobs_per_worker:
+            self._retire_worker(worker, "max jobs reached")
+        elif worker.rss_mb > self.max_rss_mb:
+            self._retire_worker(worker, "RSS ceiling exceeded")
+        else:
+            self._idle.put(worker)
+        return result
+
+    def _recycle(self, reason: str):
+        """Ask for this process to be replaced (thread mode), once"""
+        if self.recycle_process is None or self._recycling:
+            return
+        self._recycling = True
+        logger.warning(f"Replacing this process: {reason}")
+        self.recycle_process(reason)
+
+    def _release_stuck(self, _future):
+        self._stuck -= 1
+
+    def _run_in_thread(self, method: str, args, kwargs, profile: float = None):
+        try:
+            with collect_render_stats() as stats, profile_render(stats, profile):
+                result = getattr(self._generator, method)(*args, **kwargs)
+            return result, stats
+        except Exception as e:
+            raise RenderError(str(e), error_type=type(e).__name__)
+
+    def run_sync(self, method: str, *args, timeout: float = None, render_stats: dict = None,
+                 profile: float = None, **kwargs):
+        """
+        Run a ``PDFGenerator`` method in the pool, blocking the calling thread.
+
+        When ``render_stats`` is given it is filled with the render's phase
+        timings in seconds (``phases``) and the pages written (``pages``).
+        With ``profile`` set the render runs under ``cProfile``, and if it
+        takes at least that many seconds the marshalled profile is added to
+        ``render_stats`` as ``profile``.
+        """
+        if not self._started:
+            raise RenderError("Render pool is not running")
+        timeout = timeout or self.timeout
+        if self.mode == "process":
+            result, stats = self._run_in_worker((method, args, kwargs, profile), timeout)
+        else:
+            result, stats = self._run_in_thread(method, args, kwargs, profile)
+        if render_stats is not None:
+            render_stats.update(stats)
+        return result
+
+    async def run(self, method: str, *args, timeout: float = None, render_stats: dict = None,
+                  profile: float = None, **kwargs):
+        """
+        Run a ``PDFGenerator`` method in the pool without blocking the event loop.
+
+        ``render_stats`` and ``profile`` work as in ``run_sync``.
+        """
+        # Imported here so processes that only use run_sync (the CLI) don't load asyncio
+        import asyncio
+
+        loop = asyncio.get_running_loop()
+        if not self._started and self._starting:
+            # Renders requested while the workers warm up wait for them instead of failing
+            await loop.run_in_executor(None, self._start_finished.wait, self.startup_timeout)
+        if not self._started:
+            raise RenderError("Render pool is not running")
+        timeout = timeout or self.timeout
+        self._busy += 1
+        try:
+            if self.mode == "process":
+                result, stats = await loop.run_in_executor(
+                    self._executor, self._run_in_worker, (method, args, kwargs, profile), timeout)
+            else:
+                future = loop.run_in_executor(self._executor, self._run_in_thread, method, args, kwargs,
+                                              profile)
+                try:
+                    result, stats = await asyncio.wait_for(asyncio.shield(future), timeout)
+                except asyncio.TimeoutError:
+                    self.timeouts += 1
+                    logger.warning(f"Render exceeded deadline of {timeout}s; thread keeps running")
+                    self._stuck += 1
+                    future.add_done_callback(self._release_stuck)
+                    self._recycle("render exceeded its deadline")
+                    raise RenderTimeoutError(f"Render exceeded deadline of {timeout}s")
+                self._thread_jobs += 1
+                if self._thread_jobs >= self.max_jobs_per_worker:
+                    self._recycle("max jobs reached")
+                elif self.recycle_process is not None and _current_rss_mb() > self.max_rss_mb:
+                    self._recycle("RSS ceiling exceeded")
+        finally:
+            self._busy -= 1
+        if render_stats is not None:
+            render_stats.update(stats)
+        return result
+
+    def stats(self) -> dict:
+        return {
+            "mode": self.mode,
+            "workers": self.size,
+            "busy": self._busy,
+            "missing_workers": self._missing,
+            "stuck_renders": self._stuck,
+            "recycled": self.recycled,
+            "timeouts": self.timeouts,
+            "crashes": self.crashes,
+        }
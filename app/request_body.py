@@ -0,0 +1,126 @@
+"""
+Request bodies read and validated from the raw bytes.
+
+The generate endpoints read the body themselves instead of declaring a
+model body, so it may be gzip-compressed (``Content-Encoding: gzip``) and
+internal callers can send MessagePack (``Content-Type: application/msgpack``,
+needs the optional ``msgpack`` package). All encodings end in the same
+validation and the same 422 errors as FastAPI bodies.
+
+JSON is parsed with ``json.loads`` and then validated rather than with
+``model_validate_json``: with the pinned pydantic-core (2.14) the one-pass
+parser is about 50% slower and peaks at 1.6x the memory on large agendas
+(``benchmarks/request_body.py`` measures both).
+"""
+
+import json
+import zlib
+from typing import Optional, Type
+from fastapi import HTTPException, Request
+from fastapi.exceptions import RequestValidationError
+from pydantic import BaseModel, ValidationError
+
+MSGPACK_TYPES = ("application/msgpack", "application/x-msgpack", "application/vnd.msgpack")
+
+# Ceiling for decompressed gzip bodies, so a small body can't inflate into gigabytes
+MAX_DECOMPRESSED_BYTES = 64 * 1024 * 1024
+
+
+def msgpack_available() -> bool:
+    """Whether the optional ``msgpack`` package is installed"""
+    try:
+        import msgpack  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def decompress_gzip(body: bytes, max_bytes: int = MAX_DECOMPRESSED_BYTES) -> bytes:
+    """Decompress a gzip body, refusing anything that inflates past ``max_bytes``"""
+    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    try:
+        data = decompressor.decompress(body, max_bytes)
+    except zlib.error as e:
+        raise HTTPException(status_code=400, detail=f"Cuerpo gzip inválido: {str(e)}")
+    if decompressor.unconsumed_tail:
+        raise HTTPException(status_code=413,
+                            detail=f"El cuerpo descomprimido supera {max_bytes // (1024 * 1024)} MB")
+    if not decompressor.eof:
+        raise HTTPException(status_code=400, detail="Cuerpo gzip inválido: datos incompletos")
+    return data
+
+
+def _media_type(content_type: Optional[str]) -> str:
+    return (content_type or "application/json").split(";")[0].strip().lower()
+
+
+def parse_body(model: Type[BaseModel], body: bytes, content_type: Optional[str] = None,
+               content_encoding: Optional[str] = None) -> BaseModel:
+    """
+    Validate a raw request body into ``model``.
+
+    Validation errors are raised as ``RequestValidationError`` with ``body``
+    locations, so clients get the same 422 responses as for FastAPI bodies.
+    """
+    encoding = (content_encoding or "identity").strip().lower()
+    if encoding == "gzip":
+        body = decompress_gzip(body)
+    elif encoding != "identity":
+        raise HTTPException(status_code=415, detail=f"Content-Encoding no soportado: {encoding}")
+
+    media_type = _media_type(content_type)
+    try:
+        if media_type in MSGPACK_TYPES:
+            try:
+                import msgpack
+            except ImportError:
+                raise HTTPException(status_code=415, detail="MessagePack no está disponible en este servidor")
+            try:
+                data = msgpack.unpackb(body, raw=False)
+            except Exception as e:
+                raise HTTPException(status_code=400, detail=f"MessagePack inválido: {str(e)}")
+            return model.model_validate(data)
+        if media_type == "application/json" or media_type.endswith("+json"):
+            try:
+                data = json.loads(body)
+            except (json.JSONDecodeError, UnicodeDecodeError) as e:
+                # Same error FastAPI reports for a malformed JSON body
+                raise RequestValidationError([{"type": "json_invalid", "loc": ("body", getattr(e, "pos", 0)),
+                                               "msg": "JSON decode error", "input": {},
+                                               "ctx": {"error": getattr(e, "msg", str(e))}}], body=body)
+            return model.model_validate(data)
+    except ValidationError as e:
+        raise RequestValidationError(
+            [{**error, "loc": ("body",) + tuple(error["loc"])} for error in e.errors(include_url=False)],
+            body=body)
+    raise HTTPException(status_code=415, detail=f"Content-Type no soportado: {media_type}")
+
+
+def body_of(model: Type[BaseModel]):
+    """FastAPI dependency that reads the request body and validates it into ``model``"""
+    async def read_body(http_request: Request) -> BaseModel:
+        return parse_body(model, await http_request.body(), http_request.headers.get("content-type"),
+                          http_request.headers.get("content-encoding"))
+    return read_body
+
+
+def openapi_body(model: Type[BaseModel]) -> dict:
+    """``openapi_extra`` documenting ``model`` as a JSON or MessagePack request body"""
+    schema = {"$ref": f"#/components/schemas/{model.__name__}"}
+    return {
+        "requestBody": {
+            "required": True,
+            "content": {"application/json": {"schema": schema}, MSGPACK_TYPES[0]: {"schema": schema}},
+        }
+    }
+
+
+def add_schemas(openapi_schema: dict, *models: Type[BaseModel]) -> dict:
+    """Register ``models`` (and the models they use) under ``components/schemas``"""
+    schemas = openapi_schema.setdefault("components", {}).setdefault("schemas", {})
+    for model in models:
+        schema = model.model_json_schema(ref_template="#/components/schemas/{model}")
+        for name, definition in schema.pop("$defs", {}).items():
+            schemas.setdefault(name, definition)
+        schemas.setdefault(model.__name__, schema)
+    return openapi_schema
@@ -0,0 +1,252 @@
+import fcntl
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from pydantic import BaseModel
+import logging
+
+logger = logging.getLogger(__name__)
+
+# File suffixes of the page information and thumbnail entries of the products cache
+PRODUCT_SUFFIXES = (".json", ".png")
+
+
+def canonical_request_hash(request: BaseModel) -> str:
+    """SHA-256 of the validated request serialized as canonical JSON"""
+    canonical = json.dumps(request.model_dump(mode="json"), sort_keys=True,
+                           separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    """
+    Content-addressed cache of rendered PDFs.
+
+    Keys combine the canonical request hash with the template/CSS fingerprint,
+    so any change to the input or to the templates produces a new key. Entries
+    live in an in-memory LRU bounded by a byte budget and, optionally, in a
+    disk directory evicted by total size (least recently used first).
+
+    The memory tier belongs to the process. The disk tier is shared by every
+    process using the directory (e.g. the forked server workers): lookups
+    check the file itself, hits refresh its mtime, and every write rescans
+    the directory and evicts the least recently used files under an exclusive
+    ``fcntl`` lock on it, so the budget holds for all processes together.
+
+    Disk entries are named ``<key><suffix>``; ``suffixes`` lists the ones this
+    cache stores (the first is the default) and only those files count
+    towards its budget.
+    """
+
+    def __init__(self, memory_budget_bytes: int, disk_dir: str = None, disk_budget_bytes: int = 0,
+                 suffixes: tuple = (".pdf",)):
+        self.memory_budget_bytes = memory_budget_bytes
+        self.disk_dir = disk_dir if disk_budget_bytes > 0 else None
+        self.disk_budget_bytes = disk_budget_bytes
+        self.suffixes = suffixes
+
+        self._lock = threading.Lock()
+        self._memory = OrderedDict()
+        self._memory_bytes = 0
+        # Disk tier as of the last directory scan
+        self._disk_entries = 0
+        self._disk_bytes = 0
+        self.hits = {"memory": 0, "disk": 0}
+        self.misses = 0
+
+        if self.disk_dir:
+            os.makedirs(self.disk_dir, exist_ok=True)
+            self._evict_disk()
+
+    @classmethod
+    def from_settings(cls, settings, products: bool = False) -> "ResultCache":
+        """
+        Cache of rendered PDFs, or with ``products`` the separate cache of page
+        information and thumbnails, in a subdirectory and with budgets of its own
+        """
+        disk_dir = settings.result_cache_dir or os.path.join(tempfile.gettempdir(), "meeting-notice-pdf-cache")
+        if products:
+            return cls(
+                memory_budget_bytes=settings.result_cache_products_memory_mb * 1024 * 1024,
+                disk_dir=os.path.join(disk_dir, "products"),
+                disk_budget_bytes=settings.result_cache_products_disk_mb * 1024 * 1024,
+                suffixes=PRODUCT_SUFFIXES,
+            )
+        return cls(
+            memory_budget_bytes=settings.result_cache_memory_mb * 1024 * 1024,
+            disk_dir=disk_dir,
+            disk_budget_bytes=settings.result_cache_disk_mb * 1024 * 1024,
+        )
+
+    @staticmethod
+    def make_key(request: BaseModel, fingerprint: str, **variant) -> str:
+        """Cache key for a request rendered with the given templates and options"""
+        key = hashlib.sha256()
+        key.update(canonical_request_hash(request).encode("ascii"))
+        key.update(fingerprint.encode("ascii"))
+        for name in sorted(variant):
+            key.update(f"{name}={variant[name]}".encode("utf-8"))
+        return key.hexdigest()
+
+    def _disk_path(self, key: str, suffix: str = None) -> str:
+        return os.path.join(self.disk_dir, f"{key}{suffix or self.suffixes[0]}")
+
+    @staticmethod
+    def _touch(path: str):
+        """Mark a disk entry as just used; explicit nanosecond times keep the LRU order exact"""
+        now = time.time_ns()
+        os.utime(path, ns=(now, now))
+
+    @contextmanager
+    def _exclusive_disk(self):
+        """Exclusive lock across threads and processes sharing the disk directory"""
+        # Each call opens its own descriptor, so threads of one process exclude each other too
+        fd = os.open(self.disk_dir, os.O_RDONLY)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            yield
+        finally:
+            os.close(fd)
+
+    def _evict_memory(self):
+        while self._memory_bytes > self.memory_budget_bytes and self._memory:
+            _, data = self._memory.popitem(last=False)
+            self._memory_bytes -= len(data)
+
+    def _evict_disk(self):
+        """Scan the disk tier and remove the least recently used files until it fits its budget"""
+        with self._exclusive_disk():
+            entries = []
+            total = 0
+            for entry in os.scandir(self.disk_dir):
+                if not entry.name.endswith(self.suffixes) or not entry.is_file():
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime_ns, entry.path, stat.st_size))
+                total += stat.st_size
+
+            removed = 0
+            for _, path, size in sorted(entries):
+                if total <= self.disk_budget_bytes:
+                    break
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                total -= size
+                removed += 1
+        with self._lock:
+            self._disk_entries = len(entries) - removed
+            self._disk_bytes = total
+
+    def get(self, key: str, suffix: str = None):
+        """
+        Look up a rendered PDF (or the entry stored with ``suffix``).
+
+        Returns ``("memory", bytes)``, ``("disk", path)`` or ``None``; disk hits
+        are returned as a path so they can be sent without loading them.
+        """
+        with self._lock:
+            data = self._memory.get(key)
+            if data is not None:
+                self._memory.move_to_end(key)
+                self.hits["memory"] += 1
+                return "memory", data
+
+            if self.disk_dir:
+                # Possibly written by another process sharing the directory
+                path = self._disk_path(key, suffix)
+                try:
+                    self._touch(path)
+                except FileNotFoundError:
+                    pass
+                else:
+                    self.hits["disk"] += 1
+                    return "disk", path
+
+            self.misses += 1
+            return None
+
+    def contains(self, key: str, suffix: str = None) -> bool:
+        """Whether an entry is cached, without counting it as a lookup"""
+        with self._lock:
+            if key in self._memory:
+                return True
+        return self.disk_dir is not None and os.path.exists(self._disk_path(key, suffix))
+
+    def put(self, key: str, data: bytes, suffix: str = None):
+        """Store a rendered PDF (or an entry with ``suffix``) in both tiers"""
+        with self._lock:
+            if len(data) <= self.memory_budget_bytes:
+                if key in self._memory:
+                    self._memory_bytes -= len(self._memory.pop(key))
+                self._memory[key] = data
+                self._memory_bytes += len(data)
+                self._evict_memory()
+
+        if not self.disk_dir or len(data) > self.disk_budget_bytes:
+            return
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=self.disk_dir, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            self._touch(tmp_path)
+            os.replace(tmp_path, self._disk_path(key, suffix))
+            self._evict_disk()
+        except OSError as e:
+            logger.warning(f"Could not write PDF to disk cache: {e}")
+
+    def put_file(self, key: str, path: str, data: bytes = None):
+        """
+        Move a PDF written to ``path`` into the disk tier, returning its cached path.
+
+        ``path`` must be on the same filesystem as the disk tier, e.g. created
+        in ``disk_dir``. The PDF also goes to the memory tier when its ``data``
+        is given. Returns ``None``, leaving ``path`` in place, when there is
+        no disk tier or the file is larger than it.
+        """
+        if data is not None:
+            with self._lock:
+                if len(data) <= self.memory_budget_bytes:
+                    if key in self._memory:
+                        self._memory_bytes -= len(self._memory.pop(key))
+                    self._memory[key] = data
+                    self._memory_bytes += len(data)
+                    self._evict_memory()
+
+        size = os.path.getsize(path)
+        if not self.disk_dir or size > self.disk_budget_bytes:
+            return None
+        cached_path = self._disk_path(key)
+        try:
+            self._touch(path)
+            os.replace(path, cached_path)
+        except OSError as e:
+            logger.warning(f"Could not move PDF into disk cache: {e}")
+            return None
+        try:
+            self._evict_disk()
+        except OSError as e:
+            logger.warning(f"Could not evict from disk cache: {e}")
+        return cached_path
+
+    def stats(self) -> dict:
+        lookups = self.hits["memory"] + self.hits["disk"] + self.misses
+        return {
+            "memory_entries": len(self._memory),
+            "memory_bytes": self._memory_bytes,
+            "disk_entries": self._disk_entries,
+            "disk_bytes": self._disk_bytes,
+            "memory_hits": self.hits["memory"],
+            "disk_hits": self.hits["disk"],
+            "misses": self.misses,
+            "hit_ratio": round((lookups - self.misses) / lookups, 3) if lookups else 0.0,
+        }
@@ -0,0 +1,22 @@
+from typing import List, Sequence
+from app.models import MeetingNoticeRequest, Section
+
+# Sections of meeting_notice.html, in document order
+SECTIONS = tuple(section.value for section in Section)
+# Sections that are the same for every owner and the ones pre-filled per owner
+SHARED_SECTIONS = ('convocation', 'agenda', 'documents')
+RECIPIENT_SECTIONS = ('voting_sheet', 'proxy_form')
+
+
+def sections_with_content(data: MeetingNoticeRequest, sections: Sequence[str]) -> List[str]:
+    """Requested sections in document order, leaving out those with nothing to show for ``data``"""
+    selected = []
+    for section in SECTIONS:
+        if section not in sections:
+            continue
+        if section in ('agenda', 'voting_sheet') and not data.meeting.meeting_points:
+            continue
+        if section == 'documents' and not data.meeting.documents:
+            continue
+        selected.append(section)
+    return selected
@@ -0,0 +1,213 @@
+"""
+Preforking production server.
+
+``python -m app.server`` imports the application, compiles the templates,
+parses ``styles.css`` and renders a warm-up notice once, in the parent
+process. It then freezes the garbage collector, so reference count updates
+in the workers don't touch (and unshare) the pages holding that state, and
+forks ``server_workers`` uvicorn workers that share the listening socket and
+the warmed-up state copy-on-write.
+
+Each worker renders in ``server_render_threads`` threads of its own process:
+the workers themselves provide the multi-core parallelism that the process
+render pool gives a single uvicorn process, and they are recycled the way
+that pool recycles its render processes. A worker drains and is replaced
+after ``server_max_requests`` requests, after ``render_max_jobs_per_worker``
+renders, past ``render_max_rss_mb``, or when a render overruns its deadline
+(the thread can't be interrupted, so it dies with the worker); it is also
+replaced when it dies. SIGTERM or SIGINT let in-flight requests finish for
+up to ``server_graceful_timeout_seconds``.
+Every worker resumes unfinished jobs when it starts, including those a
+replaced worker had to cancel; each job is claimed by a single worker.
+
+The disk tiers of the result and attachment caches are shared by the
+workers under one budget. The result cache's memory tier, admission control
+and ``/metrics`` are per worker: a scrape describes the worker that served
+it.
+"""
+
+import gc
+import os
+import random
+import signal
+import socket
+import time
+from typing import Dict
+from app.config import settings
+from app.warmup import configure_font_cache
+import logging
+
+logger = logging.getLogger(__name__)
+
+# A worker that exits sooner than this after being forked is treated as a crash loop
+MIN_WORKER_LIFETIME_SECONDS = 5.0
+
+_SHUTDOWN_SIGNALS = {signal.SIGTERM, signal.SIGINT}
+
+
+def preload():
+    """Import the application and warm it up in this process, returning the ASGI app"""
+    configure_font_cache(settings.font_cache_dir)
+    # Renders run in threads inside every forked worker; a process pool would be shared by all of them
+    settings.render_pool_mode = "thread"
+    settings.render_workers = settings.server_render_threads
+
+    gc.disable()
+    from app import main
+    started = time.perf_counter()
+    # Thread mode only creates its threads on the first render, so the started pool survives fork()
+    main.render_pool.start()
+    logger.info(f"Application preloaded and warmed up in {time.perf_counter() - started:.2f}s")
+    gc.collect()
+    gc.freeze()
+    return main.app
+
+
+def bind_socket(host: str, port: int, backlog: int = 2048) -> socket.socket:
+    """Listening socket inherited by every worker"""
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+class PreforkServer:
+    """Parent process that forks, supervises and drains the uvicorn workers"""
+
+    def __init__(self, app, sock: socket.socket, workers: int = 1, max_requests: int = 0,
+                 max_requests_jitter: int = 0, graceful_timeout: float = 30.0, render_pool=None):
+        self.app = app
+        # Thread-mode render pool of the app, which asks for its worker to be replaced
+        self.render_pool = render_pool
+        self.sock = sock
+        self.workers = max(1, workers)
+        self.max_requests = max_requests
+        self.max_requests_jitter = max_requests_jitter
+        self.graceful_timeout = graceful_timeout
+        self._children: Dict[int, int] = {}
+        self._stopping = False
+
+    @classmethod
+    def from_settings(cls, settings, app, sock: socket.socket, render_pool=None) -> "PreforkServer":
+        return cls(app, sock, settings.server_workers, settings.server_max_requests,
+                   settings.server_max_requests_jitter, settings.server_graceful_timeout_seconds,
+                   render_pool)
+
+    def _serve(self):
+        """Body of a forked worker: run uvicorn on the inherited socket"""
+        import uvicorn
+
+        for signum in _SHUTDOWN_SIGNALS:
+            signal.signal(signum, signal.SIG_DFL)
+        signal.pthread_sigmask(signal.SIG_UNBLOCK, _SHUTDOWN_SIGNALS)
+        gc.enable()
+        limit = None
+        if self.max_requests > 0:
+            limit = self.max_requests + random.randint(0, max(0, self.max_requests_jitter))
+        config = uvicorn.Config(self.app, limit_max_requests=limit,
+                                timeout_graceful_shutdown=self.graceful_timeout)
+        server = uvicorn.Server(config)
+        if self.render_pool is not None:
+            # Drain and exit like after max requests; the parent forks a fresh worker
+            self.render_pool.recycle_process = lambda reason: setattr(server, "should_exit", True)
+        server.run(sockets=[self.sock])
+
+    def _spawn(self, index: int):
+        # Blocked across fork() so the parent's handler never runs in a worker that hasn't reset it yet
+        signal.pthread_sigmask(signal.SIG_BLOCK, _SHUTDOWN_SIGNALS)
+        pid = os.fork()
+        if pid == 0:
+            exit_code = 0
+            try:
+                self._serve()
+            except BaseException:
+                logger.exception(f"Server worker {index} failed")
+                exit_code = 1
+            finally:
+                # Skip the parent's atexit handlers and buffered state
+                os._exit(exit_code)
+        signal.pthread_sigmask(signal.SIG_UNBLOCK, _SHUTDOWN_SIGNALS)
+        self._children[pid] = index
+        logger.info(f"Started server worker {index} (pid {pid})")
+
+    def _stop(self, signum, frame):
+        """Start the graceful drain: workers finish their in-flight requests and exit"""
+        if self._stopping:
+            return
+        self._stopping = True
+        logger.info(f"Received signal {signum}, draining {len(self._children)} server workers")
+        for pid in self._children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def _reap(self) -> Dict[int, int]:
+        """Collect exited workers without blocking, returning ``{index: exit status}``"""
+        exited = {}
+        while self._children:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                break
+            if pid == 0:
+                break
+            index = self._children.pop(pid, None)
+            if index is not None:
+                exited[index] = os.waitstatus_to_exitcode(status)
+        return exited
+
+    def run(self):
+        """Fork the workers and supervise them until a shutdown signal, then drain them"""
+        for signum in _SHUTDOWN_SIGNALS:
+            signal.signal(signum, self._stop)
+        for index in range(self.workers):
+            self._spawn(index)
+
+        started_at = {index: time.monotonic() for index in range(self.workers)}
+        while not self._stopping:
+            time.sleep(0.2)
+            for index, exit_code in self._reap().items():
+                if self._stopping:
+                    break
+                lifetime = time.monotonic() - started_at[index]
+                logger.info(f"Server worker {index} exited with code {exit_code} after {lifetime:.0f}s")
+                if exit_code != 0 and lifetime < MIN_WORKER_LIFETIME_SECONDS:
+                    time.sleep(1.0)
+                started_at[index] = time.monotonic()
+                self._spawn(index)
+
+        deadline = time.monotonic() + self.graceful_timeout + 5.0
+        while self._children and time.monotonic() < deadline:
+            self._reap()
+            time.sleep(0.1)
+        for pid, index in list(self._children.items()):
+            logger.warning(f"Killing server worker {index} (pid {pid}) after the graceful timeout")
+            try:
+                os.kill(pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+        while self._children:
+            try:
+                pid, _ = os.waitpid(-1, 0)
+            except ChildProcessError:
+                break
+            self._children.pop(pid, None)
+        self.sock.close()
+        logger.info("Server stopped")
+
+
+def main():
+    logging.basicConfig(level=logging.INFO)
+    # Bound before preloading, so a busy port fails fast instead of after the warm-up
+    sock = bind_socket(settings.server_host, settings.server_port)
+    app = preload()
+    from app.main import render_pool
+    PreforkServer.from_settings(settings, app, sock, render_pool).run()
+
+
+if __name__ == "__main__":
+    main()
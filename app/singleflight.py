@@ -0,0 +1,64 @@
+import asyncio
+from typing import Awaitable, Callable, Hashable
+
+
+class _Flight:
+    """A shared call in progress and how many callers are waiting on it"""
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    In-process coalescing of concurrent identical calls.
+
+    The first caller for a key starts the call as a separate task; callers
+    arriving while it runs wait on that same task and get the same result or
+    exception. The task is not tied to any single caller, so a caller going
+    away does not cancel it for the others, and the key is released as soon
+    as the task finishes, whether it succeeded, failed or timed out.
+    """
+
+    def __init__(self):
+        self._flights = {}
+        self.leaders = 0
+        self.coalesced = 0
+
+    def waiters(self, key: Hashable) -> int:
+        """Callers currently waiting on the call for ``key``"""
+        flight = self._flights.get(key)
+        return flight.waiters if flight is not None else 0
+
+    def _release(self, key: Hashable, task: asyncio.Task):
+        if self._flights.get(key) is not None and self._flights[key].task is task:
+            del self._flights[key]
+        # Mark the exception as retrieved even if every waiter went away
+        if not task.cancelled():
+            task.exception()
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable]):
+        """Run ``fn()`` for ``key`` unless an identical call is already running"""
+        flight = self._flights.get(key)
+        if flight is None:
+            task = asyncio.ensure_future(fn())
+            flight = _Flight(task)
+            self._flights[key] = flight
+            task.add_done_callback(lambda done: self._release(key, done))
+            self.leaders += 1
+        else:
+            self.coalesced += 1
+
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task)
+        finally:
+            flight.waiters -= 1
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": len(self._flights),
+            "renders": self.leaders,
+            "renders_saved": self.coalesced,
+        }
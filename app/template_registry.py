@@ -0,0 +1,126 @@
+import hashlib
+import os
+import tempfile
+import threading
+from jinja2 import Environment, FileSystemLoader, FileSystemBytecodeCache, Template
+import logging
+
+logger = logging.getLogger(__name__)
+
+TEMPLATE_DIR = os.path.join(os.path.dirname(__file__), 'templates')
+STATIC_DIR = os.path.join(os.path.dirname(__file__), 'static')
+
+_registry = None
+
+
+class _FileState:
+    """Last seen stat signature and content hash of a file"""
+
+    def __init__(self, mtime_ns: int, size: int, digest: str):
+        self.mtime_ns = mtime_ns
+        self.size = size
+        self.digest = digest
+
+
+class TemplateRegistry:
+    """
+    Process-wide registry of compiled Jinja templates and parsed stylesheets.
+
+    Templates are served from a Jinja ``Environment`` with a filesystem loader
+    and bytecode cache, stylesheets are parsed once into WeasyPrint ``CSS``
+    objects sharing a single ``FontConfiguration``. Every lookup stats the
+    source file; an entry is only rebuilt when its mtime or size changed and
+    the content hash no longer matches, so edits take effect without restart.
+    """
+
+    def __init__(self, template_dir: str, static_dir: str, bytecode_cache_dir: str = None):
+        self.template_dir = template_dir
+        self.static_dir = static_dir
+
+        if bytecode_cache_dir is None:
+            bytecode_cache_dir = os.path.join(tempfile.gettempdir(), 'meeting-notice-jinja-cache')
+        os.makedirs(bytecode_cache_dir, exist_ok=True)
+
+        self.env = Environment(
+            loader=FileSystemLoader(template_dir),
+            bytecode_cache=FileSystemBytecodeCache(bytecode_cache_dir),
+            auto_reload=True,
+        )
+
+        self._lock = threading.RLock()
+        self._file_states = {}
+        self._css_cache = {}
+        self._font_config = None
+
+    def _file_state(self, path: str) -> _FileState:
+        """Return the current state of a file, hashing it only when its stat changed"""
+        stat = os.stat(path)
+        state = self._file_states.get(path)
+        if state is not None and state.mtime_ns == stat.st_mtime_ns and state.size == stat.st_size:
+            return state
+
+        with open(path, 'rb') as f:
+            digest = hashlib.sha256(f.read()).hexdigest()
+        state = _FileState(stat.st_mtime_ns, stat.st_size, digest)
+        self._file_states[path] = state
+        return state
+
+    @property
+    def font_config(self):
+        """Shared WeasyPrint font configuration for the life of the process"""
+        if self._font_config is None:
+            from weasyprint.text.fonts import FontConfiguration
+            with self._lock:
+                if self._font_config is None:
+                    self._font_config = FontConfiguration()
+        return self._font_config
+
+    def get_template(self, template_name: str) -> Template:
+        """Return the compiled template, recompiling it only if the source changed"""
+        return self.env.get_template(template_name)
+
+    def get_css(self, css_name: str):
+        """Return the parsed stylesheet, re-parsing it only if its content changed"""
+        from weasyprint import CSS
+
+        css_path = os.path.join(self.static_dir, css_name)
+        with self._lock:
+            state = self._file_state(css_path)
+            cached = self._css_cache.get(css_name)
+            if cached is not None and cached[0] == state.digest:
+                return cached[1]
+
+            logger.info(f"Parsing stylesheet {css_name} ({state.digest[:12]})")
+            with open(css_path, 'r', encoding='utf-8') as f:
+                css_content = f.read()
+            css_doc = CSS(string=css_content, base_url=self.static_dir + os.sep,
+                          font_config=self.font_config)
+            self._css_cache[css_name] = (state.digest, css_doc)
+            return css_doc
+
+    def fingerprint(self, *css_names: str) -> str:
+        """
+        Combined content hash of every template and the given stylesheets.
+
+        Changes whenever a template or stylesheet edit could change the output.
+        """
+        paths = []
+        for root, _, files in os.walk(self.template_dir):
+            paths.extend(os.path.join(root, name) for name in files)
+        paths.sort()
+        paths.extend(os.path.join(self.static_dir, name) for name in css_names)
+
+        combined = hashlib.sha256()
+        with self._lock:
+            for path in paths:
+                combined.update(os.path.relpath(path, os.path.dirname(self.template_dir)).encode('utf-8'))
+                combined.update(self._file_state(path).digest.encode('ascii'))
+        return combined.hexdigest()
+
+
+def get_registry() -> TemplateRegistry:
+    """Return the process-wide template registry, creating it on first use"""
+    global _registry
+    if _registry is None:
+        _registry = TemplateRegistry(TEMPLATE_DIR, STATIC_DIR)
+    return _registry
@@ -0,0 +1,94 @@
+"""
+Render worker warm-up.
+
+WeasyPrint, fontconfig and Pango build their caches lazily, on the first real
+render. Workers render ``warm_up_request`` before taking traffic, a notice that
+goes through every section, font style and voting layout, and fontconfig can
+keep its cache in a persistent directory so restarts skip the font scan.
+"""
+
+import os
+from datetime import datetime, timezone
+from typing import Optional
+from xml.sax.saxutils import escape
+from app.models import MeetingNoticeRequest
+
+_FONTS_CONF = """<?xml version="1.0"?>
+<!DOCTYPE fontconfig SYSTEM "fonts.dtd">
+<fontconfig>
+  <cachedir>{cache_dir}</cachedir>
+  <include ignore_missing="yes">{system_conf}</include>
+</fontconfig>
+"""
+
+
+def warm_up_request() -> MeetingNoticeRequest:
+    """Synthetic notice with content in every section"""
+    document = {
+        "id": "warm-up-document",
+        "name": "Presupuesto de mantenimiento 2025.pdf",
+        "signed_url": "https://example.com/warm-up.pdf",
+        "content_type": "application/pdf",
+        "size": 245_760,
+    }
+    points = []
+    for index, vote_type in enumerate(("simple", "multiple", "free")):
+        points.append({
+            "id": f"warm-up-point-{index}",
+            "meeting_id": "warm-up",
+            "title": f"Aprobación, si procede, de la propuesta nº {index + 1}",
+            "description": "Lectura y aprobación del acta anterior, cuentas del ejercicio y presupuesto "
+                           "para la reparación de la fachada, la renovación del ascensor y la limpieza.",
+            "documents": [document] if index == 0 else [],
+            "voting": {
+                "voteType": vote_type,
+                "options": [] if vote_type == "free" else [
+                    {"id": f"warm-up-option-{option}", "option": text, "order": option}
+                    for option, text in enumerate(("A favor", "En contra", "Abstención"))
+                ],
+            },
+            "created_at": "2025-01-01T00:00:00Z",
+            "updated_at": "2025-01-01T00:00:00Z",
+        })
+    return MeetingNoticeRequest(**{
+        "community": {
+            "address": "Calle de Albarracín, 33, Madrid",
+            "admin": {"cif": "B00000000", "company": "Administración de Fincas", "email": "admin@example.com",
+                      "is_internal": False, "name": "Administración", "phone": "900000000"},
+            "cif": "B00000000",
+            "coordinates": {"Lat": 40.43, "Long": -3.63},
+            "id": "warm-up-community",
+            "legal_name": "Comunidad de Propietarios Calentamiento",
+            "name": "Comunidad Calentamiento",
+        },
+        "meeting": {
+            "id": "warm-up",
+            "date_time": 1753919400000,
+            "description": "Junta general ordinaria de propietarios.",
+            "documents": [document],
+            "location": "Sala común del edificio",
+            "meeting_points": points,
+            "meeting_type": "ORDINARY",
+            "status": 1,
+            "title": "Junta General Ordinaria",
+        },
+        "generated_at": datetime(2025, 1, 1, tzinfo=timezone.utc),
+    })
+
+
+def configure_font_cache(cache_dir: str, system_conf: str = "/etc/fonts/fonts.conf") -> Optional[str]:
+    """
+    Make fontconfig keep its cache in ``cache_dir``, returning the config file written.
+
+    Must run before fontconfig is initialised, i.e. before the first render in
+    this process; render workers inherit the setting. An explicit
+    ``FONTCONFIG_FILE`` in the environment is left untouched.
+    """
+    if not cache_dir or "FONTCONFIG_FILE" in os.environ:
+        return None
+    os.makedirs(cache_dir, exist_ok=True)
+    config_path = os.path.join(cache_dir, "fonts.conf")
+    with open(config_path, "w", encoding="utf-8") as f:
+        f.write(_FONTS_CONF.format(cache_dir=escape(cache_dir), system_conf=escape(system_conf)))
+    os.environ["FONTCONFIG_FILE"] = config_path
+    return config_path
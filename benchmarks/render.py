@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+"""
+Render benchmark: time every phase of a meeting notice render across payload sizes.
+
+Usage: python benchmarks/render.py [--scenario large] [--repeat 5] [--output results.json]
+                                   [--baseline benchmarks/baseline.json] [--save-baseline]
+
+Each scenario is a synthetic ``MeetingNoticeRequest`` (from one meeting point
+to 500, up to 100 documents, long descriptions, many voting options). The
+pipeline of ``PDFGenerator.generate_meeting_notice_pdf`` is run step by step
+so every phase is timed on its own: validation, context build, Jinja render,
+HTML parse, layout and PDF write. Results record the median of ``--repeat``
+runs after a warm-up, plus pages and output bytes, and are written as JSON.
+
+With ``--baseline`` the results are compared with a stored run and the
+command exits with status 1 when a phase got slower than the tolerance
+allows. Baselines are machine-specific: record one with ``--save-baseline``
+on the machine that runs the comparison.
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+PHASES = ("validation", "context", "jinja", "html_parse", "layout", "pdf_write")
+
+# points: meeting points, documents: meeting documents, description_chars: length
+# of every description, voting_options: options per voted point
+SCENARIOS = {
+    "minimal": {"points": 1, "documents": 0, "description_chars": 200, "voting_options": 2},
+    "typical": {"points": 10, "documents": 5, "description_chars": 600, "voting_options": 3},
+    "long_descriptions": {"points": 20, "documents": 5, "description_chars": 8000, "voting_options": 3},
+    "many_voting_options": {"points": 50, "documents": 10, "description_chars": 400, "voting_options": 25},
+    "large": {"points": 200, "documents": 50, "description_chars": 600, "voting_options": 4},
+    "huge": {"points": 500, "documents": 100, "description_chars": 600, "voting_options": 4},
+}
+
+_WORDS = ("la junta de propietarios aprueba el presupuesto anual de mantenimiento del edificio "
+          "incluyendo la reparación de la fachada la renovación del ascensor y la limpieza de "
+          "zonas comunes conforme al artículo dieciséis de la ley de propiedad horizontal").split()
+
+# Fixed dates keep synthetic payloads, and deterministic renders of them, identical across runs
+_MEETING_TIME_MS = 1753919400000
+_UPDATED_AT = "2025-07-01T10:00:00Z"
+
+
+def _text(length: int, offset: int = 0) -> str:
+    words = []
+    size = 0
+    index = offset
+    while size < length:
+        word = _WORDS[index % len(_WORDS)]
+        words.append(word)
+        size += len(word) + 1
+        index += 1
+    return " ".join(words)[:length].strip().capitalize() + "."
+
+
+def _document(prefix: str, index: int) -> dict:
+    return {
+        "id": f"{prefix}-doc-{index}",
+        "name": f"Documento {index + 1} - {_text(40, index)}.pdf",
+        "signed_url": f"https://storage.example.com/{prefix}/{index}.pdf",
+        "content_type": "application/pdf",
+        "size": 150_000 + index * 1_000,
+    }
+
+
+def synthetic_request(points: int, documents: int, description_chars: int, voting_options: int) -> dict:
+    """A valid ``MeetingNoticeRequest`` payload of the given size, identical on every call"""
+    meeting_id = f"bench-{points}p-{documents}d"
+    meeting_points = []
+    for index in range(points):
+        vote_type = ("simple", "multiple", "free")[index % 3]
+        options = [] if vote_type == "free" else [
+            {"id": f"p{index}-o{option}", "option": _text(30, index + option), "order": option}
+            for option in range(voting_options)
+        ]
+        meeting_points.append({
+            "id": f"point-{index}",
+            "meeting_id": meeting_id,
+            "title": f"Punto {index + 1}: {_text(60, index)}",
+            "description": _text(description_chars, index),
+            "documents": [],
+            "voting": {"voteType": vote_type, "options": options},
+            "created_at": _UPDATED_AT,
+            "updated_at": _UPDATED_AT,
+        })
+
+    return {
+        "community": {
+            "address": "Calle de Albarracín, 33, Madrid",
+            "cif": "B12345676",
+            "coordinates": {"Lat": 40.43, "Long": -3.63},
+            "id": "bench-community",
+            "legal_name": "Comunidad de Propietarios Benchmark",
+            "name": "Comunidad Benchmark",
+        },
+        "meeting": {
+            "id": meeting_id,
+            "date_time": _MEETING_TIME_MS,
+            "description": _text(description_chars),
+            "documents": [_document(meeting_id, index) for index in range(documents)],
+            "location": "Sala común del edificio",
+            "meeting_points": meeting_points,
+            "meeting_type": "ORDINARY",
+            "status": 1,
+            "title": "Junta General Ordinaria",
+        },
+    }
+
+
+def _timed(phases: dict, name: str, fn):
+    started = time.perf_counter()
+    result = fn()
+    phases[name] = (time.perf_counter() - started) * 1000
+    return result
+
+
+def render_phases(generator, payload: dict) -> tuple:
+    """
+    Run the full-document pipeline of ``generate_meeting_notice_pdf`` one phase at a time.
+
+    Returns ``(phase timings in ms, number of pages, PDF bytes)``. Renders are
+    deterministic, so the bytes can be checked against the real method.
+    """
+    from weasyprint import HTML
+    from app.models import MeetingNoticeRequest
+
+    phases = {}
+    request = _timed(phases, "validation", lambda: MeetingNoticeRequest.model_validate(payload))
+    generated_at = generator._generation_time(request, True)
+    context = _timed(phases, "context", lambda: generator._build_context(request, generated_at))
+    template = generator._load_template('meeting_notice.html')
+    html_content = _timed(phases, "jinja", lambda: template.render(**context))
+    html = _timed(phases, "html_parse", lambda: HTML(string=html_content))
+    css_doc = generator._load_css('styles.css')
+    document = _timed(phases, "layout", lambda: html.render(stylesheets=[css_doc],
+                                                            font_config=generator.registry.font_config))
+    pdf_bytes = _timed(phases, "pdf_write", lambda: generator._write_pdf(document, html_content,
+                                                                         generated_at, True))
+    return phases, len(document.pages), pdf_bytes
+
+
+def run_scenario(generator, name: str, repeat: int) -> dict:
+    from app.models import MeetingNoticeRequest
+
+    params = SCENARIOS[name]
+    payload = synthetic_request(**params)
+
+    # Warm-up run, also proving the phased pipeline still matches the real method
+    _, pages, pdf_bytes = render_phases(generator, payload)
+    expected = generator.generate_meeting_notice_pdf(MeetingNoticeRequest.model_validate(payload),
+                                                     deterministic=True)
+    if pdf_bytes != expected:
+        raise RuntimeError(f"Scenario {name}: the phased pipeline no longer produces the same PDF as "
+                           "generate_meeting_notice_pdf; update render_phases to match it")
+
+    runs = [render_phases(generator, payload)[0] for _ in range(repeat)]
+    phases_ms = {phase: round(statistics.median(run[phase] for run in runs), 2) for phase in PHASES}
+    return {
+        "params": params,
+        "phases_ms": phases_ms,
+        "total_ms": round(statistics.median(sum(run.values()) for run in runs), 2),
+        "pages": pages,
+        "bytes": len(pdf_bytes),
+    }
+
+
+def environment(generator) -> dict:
+    import weasyprint
+
+    return {
+        "recorded_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "weasyprint": weasyprint.__version__,
+        "templates": generator.registry.fingerprint('styles.css')[:16],
+    }
+
+
+def compare(results: dict, baseline: dict, tolerance: float, min_delta_ms: float) -> tuple:
+    """
+    Compare results with a baseline run.
+
+    A phase (or the total) regresses when it is more than ``tolerance`` slower
+    in relative terms and more than ``min_delta_ms`` slower in absolute terms,
+    so sub-millisecond noise never fails the run. Returns
+    ``(regressions, notes)``; notes report page and size changes and
+    scenarios missing from the baseline.
+    """
+    regressions = []
+    notes = []
+    for name, current in results["scenarios"].items():
+        previous = baseline.get("scenarios", {}).get(name)
+        if previous is None:
+            notes.append(f"{name}: not in the baseline")
+            continue
+        timings = [(phase, current["phases_ms"][phase], previous["phases_ms"].get(phase))
+                   for phase in PHASES] + [("total", current["total_ms"], previous.get("total_ms"))]
+        for phase, now, before in timings:
+            if before is None:
+                continue
+            if now > before * (1 + tolerance) and now - before > min_delta_ms:
+                regressions.append(f"{name}.{phase}: {before}ms -> {now}ms (+{(now / before - 1) * 100:.0f}%)")
+        for field in ("pages", "bytes"):
+            if current[field] != previous.get(field):
+                notes.append(f"{name}: {field} {previous.get(field)} -> {current[field]}")
+
+    changed = {key: (baseline.get("environment", {}).get(key), value)
+               for key, value in results["environment"].items()
+               if key in ("python", "weasyprint", "templates", "cpus")
+               and baseline.get("environment", {}).get(key) != value}
+    for key, (before, now) in changed.items():
+        notes.append(f"environment: {key} {before} -> {now}")
+    return regressions, notes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time each phase of a meeting notice render")
+    parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS),
+                        help="Only run this scenario (default: all)")
+    parser.add_argument("--repeat", type=int, default=5, help="Measured runs per scenario (default: 5)")
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    parser.add_argument("--baseline", help="Compare with the results stored in this JSON file")
+    parser.add_argument("--save-baseline", action="store_true",
+                        help="Store the results as the new baseline (requires --baseline)")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="Allowed slowdown per phase as a fraction (default: 0.25)")
+    parser.add_argument("--min-delta-ms", type=float, default=5.0,
+                        help="Slowdowns below this many ms never count (default: 5)")
+    args = parser.parse_args()
+    if args.save_baseline and not args.baseline:
+        parser.error("--save-baseline requires --baseline")
+
+    from app.pdf_generator import PDFGenerator
+
+    generator = PDFGenerator()
+    generator.warm_up()
+    results = {"environment": environment(generator), "scenarios": {}}
+    for name in args.scenario or SCENARIOS:
+        result = run_scenario(generator, name, max(1, args.repeat))
+        results["scenarios"][name] = result
+        phases = "  ".join(f"{phase}={result['phases_ms'][phase]}" for phase in PHASES)
+        print(f"{name:<20} total={result['total_ms']}ms pages={result['pages']} bytes={result['bytes']}  {phases}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+        return
+
+    if args.baseline:
+        if not os.path.exists(args.baseline):
+            print(f"No baseline at {args.baseline}; record one with --save-baseline")
+            return
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions, notes = compare(results, baseline, args.tolerance, args.min_delta_ms)
+        for note in notes:
+            print(f"NOTE: {note}")
+        for regression in regressions:
+            print(f"REGRESSION: {regression}")
+        if regressions:
+            sys.exit(1)
+        print("OK: no phase regressed against the baseline")
+
+
+if __name__ == "__main__":
+    main()
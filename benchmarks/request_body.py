@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Request body benchmark: validation time and peak memory per body encoding.
+
+Usage: python benchmarks/request_body.py [--scenario huge] [--repeat 20] [--output results.json]
+
+For each synthetic payload of ``benchmarks/render.py`` the body is encoded
+as JSON, gzip-compressed JSON and MessagePack (when ``msgpack`` is
+installed) and validated into a ``MeetingNoticeRequest`` the way the API
+does it (``app.request_body.parse_body``). ``json_one_pass`` validates the
+raw bytes with ``model_validate_json`` instead, to check whether a pydantic
+upgrade makes it the faster JSON path. Results record the body size, the
+median validation time of ``--repeat`` runs and the peak memory allocated
+while validating (``tracemalloc``).
+"""
+
+import argparse
+import gzip
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from render import SCENARIOS, synthetic_request  # noqa: E402
+
+from app.models import MeetingNoticeRequest  # noqa: E402
+from app.request_body import msgpack_available, parse_body  # noqa: E402
+
+DEFAULT_SCENARIOS = ("typical", "large", "huge")
+
+
+def encodings(payload: dict) -> dict:
+    """``{name: (body, validate)}`` for every encoding available here"""
+    body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+    compressed = gzip.compress(body)
+    cases = {
+        "json": (body, lambda: parse_body(MeetingNoticeRequest, body, "application/json")),
+        "json_one_pass": (body, lambda: MeetingNoticeRequest.model_validate_json(body)),
+        "gzip": (compressed, lambda: parse_body(MeetingNoticeRequest, compressed, "application/json", "gzip")),
+    }
+    if msgpack_available():
+        import msgpack
+
+        packed = msgpack.packb(payload)
+        cases["msgpack"] = (packed, lambda: parse_body(MeetingNoticeRequest, packed, "application/msgpack"))
+    return cases
+
+
+def measure(validate, repeat: int) -> dict:
+    """Median time over ``repeat`` runs after a warm-up, and the peak memory of one run"""
+    validate()
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        validate()
+        timings.append((time.perf_counter() - started) * 1000)
+    tracemalloc.start()
+    validate()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"median_ms": round(statistics.median(timings), 3), "peak_kb": round(peak / 1024, 1)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare request body validation across encodings")
+    parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS),
+                        help=f"Only run this scenario (default: {', '.join(DEFAULT_SCENARIOS)})")
+    parser.add_argument("--repeat", type=int, default=20, help="Measured runs per encoding (default: 20)")
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    args = parser.parse_args()
+
+    if not msgpack_available():
+        print("NOTE: msgpack is not installed; MessagePack is skipped")
+    results = {}
+    for name in args.scenario or DEFAULT_SCENARIOS:
+        results[name] = {}
+        for encoding, (body, validate) in encodings(synthetic_request(**SCENARIOS[name])).items():
+            result = dict(measure(validate, max(1, args.repeat)), bytes=len(body))
+            results[name][encoding] = result
+            print(f"{name:<20} {encoding:<14} bytes={result['bytes']:<10} "
+                  f"median={result['median_ms']}ms peak={result['peak_kb']}KB")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
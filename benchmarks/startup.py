@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Startup benchmark: how long importing the CLI and the API takes, per module.
+
+Usage: python benchmarks/startup.py [--runs 5] [--top 15] [--budget app.cli=400] [--json]
+
+Every target is imported ``--runs`` times, each in a fresh interpreter, and
+the median import time is compared with the target's budget. One more run
+with ``-X importtime`` gives the breakdown: the slowest modules (cumulative
+time, including what they import) and the self time of each top-level
+package. The command exits with status 1 when a target is over budget or
+loads a module it must not load, so CI can enforce both.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Import-time budget (milliseconds) and modules each entry point must not load.
+# The CLI forwards to the daemon or renders lazily, so no rendering stack at start;
+# the API renders in worker processes, so its parent never needs WeasyPrint.
+TARGETS = {
+    "app.cli": {
+        "budget_ms": 600,
+        "forbidden": ("weasyprint", "pydyf", "cairocffi", "httpx", "fastapi", "starlette", "uvicorn",
+                      "jinja2", "app.pdf_generator"),
+    },
+    "app.main": {
+        "budget_ms": 1500,
+        "forbidden": ("weasyprint", "pydyf", "cairocffi", "app.pdf_generator"),
+    },
+}
+
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"seconds": elapsed, "modules": sorted(sys.modules)}}))
+"""
+
+
+def _run_probe(module: str, importtime: bool = False) -> subprocess.CompletedProcess:
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [ROOT, os.environ.get("PYTHONPATH")])))
+    command = [sys.executable] + (["-X", "importtime"] if importtime else []) + ["-c", _PROBE.format(module=module)]
+    result = subprocess.run(command, cwd=ROOT, env=env, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{result.stderr[-2000:]}")
+    return result
+
+
+def parse_importtime(stderr: str) -> list:
+    """``(module, self_us, cumulative_us)`` for every line of ``-X importtime`` output"""
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:"):].split("|")
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue
+        entries.append((fields[2].strip(), int(fields[0]), int(fields[1])))
+    return entries
+
+
+def measure(module: str, runs: int, top: int) -> dict:
+    """Median import time of ``module`` plus its per-module breakdown"""
+    import_times = []
+    process_times = []
+    loaded = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        result = _run_probe(module)
+        process_times.append(time.perf_counter() - started)
+        report = json.loads(result.stdout.strip().splitlines()[-1])
+        import_times.append(report["seconds"])
+        loaded = report["modules"]
+
+    entries = parse_importtime(_run_probe(module, importtime=True).stderr)
+    packages = {}
+    for name, self_us, _ in entries:
+        package = name.split(".")[0]
+        packages[package] = packages.get(package, 0) + self_us
+
+    return {
+        "module": module,
+        "import_ms": round(statistics.median(import_times) * 1000, 1),
+        "process_ms": round(statistics.median(process_times) * 1000, 1),
+        "modules_loaded": len(loaded),
+        "slowest_modules": [
+            {"module": name, "self_ms": round(self_us / 1000, 1), "cumulative_ms": round(cumulative_us / 1000, 1)}
+            for name, self_us, cumulative_us in sorted(entries, key=lambda entry: -entry[2])[:top]
+        ],
+        "packages": [
+            {"package": package, "self_ms": round(self_us / 1000, 1)}
+            for package, self_us in sorted(packages.items(), key=lambda item: -item[1])[:top]
+        ],
+        "loaded": loaded,
+    }
+
+
+def check(result: dict, budget_ms: float, forbidden: tuple) -> list:
+    """Budget and import-graph violations of a measured target"""
+    problems = []
+    if result["import_ms"] > budget_ms:
+        problems.append(f"{result['module']} imports in {result['import_ms']}ms, over its {budget_ms}ms budget")
+    for name in forbidden:
+        if any(loaded == name or loaded.startswith(name + ".") for loaded in result["loaded"]):
+            problems.append(f"{result['module']} loads {name} at import time")
+    return problems
+
+
+def _print_report(result: dict, budget_ms: float):
+    print(f"\n{result['module']}: {result['import_ms']}ms import (budget {budget_ms}ms), "
+          f"{result['process_ms']}ms with interpreter start, {result['modules_loaded']} modules")
+    print(f"  {'slowest modules':<48} {'cumulative':>10} {'self':>8}")
+    for entry in result["slowest_modules"]:
+        print(f"  {entry['module']:<48} {entry['cumulative_ms']:>8}ms {entry['self_ms']:>6}ms")
+    print(f"  {'self time by package':<48} {'self':>10}")
+    for entry in result["packages"]:
+        print(f"  {entry['package']:<48} {entry['self_ms']:>8}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure and enforce the import time of the CLI and the API")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters per target (default: 5)")
+    parser.add_argument("--top", type=int, default=15, help="Modules and packages to list (default: 15)")
+    parser.add_argument("--budget", action="append", default=[], metavar="MODULE=MS",
+                        help="Override a target's budget, e.g. app.cli=400")
+    parser.add_argument("--target", action="append", choices=sorted(TARGETS),
+                        help="Only measure this target (default: all)")
+    parser.add_argument("--json", action="store_true", help="Print the results as JSON")
+    args = parser.parse_args()
+
+    budgets = {module: target["budget_ms"] for module, target in TARGETS.items()}
+    for override in args.budget:
+        module, _, value = override.partition("=")
+        if module not in TARGETS or not value:
+            parser.error(f"Invalid budget {override!r}")
+        budgets[module] = float(value)
+
+    results = []
+    problems = []
+    for module in args.target or TARGETS:
+        result = measure(module, max(1, args.runs), args.top)
+        problems.extend(check(result, budgets[module], TARGETS[module]["forbidden"]))
+        results.append(result)
+
+    if args.json:
+        for result in results:
+            result["budget_ms"] = budgets[result["module"]]
+            del result["loaded"]
+        print(json.dumps({"results": results, "problems": problems}, indent=2))
+    else:
+        for result in results:
+            _print_report(result, budgets[result["module"]])
+        print()
+        for problem in problems:
+            print(f"FAIL: {problem}")
+        if not problems:
+            print("OK: every target is within budget")
+
+    sys.exit(1 if problems else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -37,10 +37,12 @@ a = Analysis(
         'weasyprint',
         'jinja2',
         'pydantic',
-        'fastapi',
-        'uvicorn',
         'app.models',
+        # Imported lazily by the CLI, only when a render or mode needs them
         'app.pdf_generator',
+        'app.attachments',
+        'app.cli_batch',
+        'app.cli_stream',
         'cairocffi',
         'cairosvg',
         'pango',
@@ -58,6 +60,10 @@ a = Analysis(
         'pandas',
         'IPython',
         'jupyter',
+        # The API stack is not used by the CLI
+        'fastapi',
+        'starlette',
+        'uvicorn',
     ],
     win_no_prefer_redirects=False,
     win_private_assemblies=False,
@@ -137,6 +143,9 @@ def build_executable():
                 "--hidden-import", "pydantic",
                 "--hidden-import", "app.models",
                 "--hidden-import", "app.pdf_generator",
+                "--hidden-import", "app.attachments",
+                "--hidden-import", "app.cli_batch",
+                "--hidden-import", "app.cli_stream",
                 "--exclude-module", "tkinter",
                 "--exclude-module", "matplotlib",
                 "--exclude-module", "numpy",
@@ -144,6 +153,9 @@ def build_executable():
                 "--exclude-module", "pandas",
                 "--exclude-module", "IPython",
                 "--exclude-module", "jupyter",
+                "--exclude-module", "fastapi",
+                "--exclude-module", "starlette",
+                "--exclude-module", "uvicorn",
                 "app/cli.py"
             ], env=env)
             
@@ -0,0 +1,70 @@
+import asyncio
+import pytest
+from app.admission import AdmissionController, AdmissionRejected
+
+
+class TestAdmissionController:
+    """Tests para el control de admisión de la cola de renderizado"""
+
+    def test_rejects_past_queue_bound(self):
+        """Test que las peticiones por encima del límite se rechazan con Retry-After"""
+        async def scenario():
+            controller = AdmissionController(capacity=1, max_queue_depth=1, initial_render_seconds=3.0)
+            release = asyncio.Event()
+
+            async def hold():
+                async with controller.admit():
+                    await release.wait()
+
+            tasks = [asyncio.create_task(hold()) for _ in range(2)]
+            await asyncio.sleep(0)
+            assert controller.in_flight == 2
+            assert controller.queue_depth == 1
+            assert controller.free_capacity == 0
+
+            with pytest.raises(AdmissionRejected) as excinfo:
+                async with controller.admit():
+                    pass
+            assert excinfo.value.retry_after == 6
+
+            release.set()
+            await asyncio.gather(*tasks)
+            assert controller.in_flight == 0
+            assert controller.rejected == 1
+
+        asyncio.run(scenario())
+
+    def test_observe_updates_moving_average(self):
+        """Test que la media móvil sigue los tiempos observados"""
+        controller = AdmissionController(capacity=2, max_queue_depth=0, initial_render_seconds=1.0,
+                                         smoothing=0.5)
+        controller.observe(3.0)
+        assert controller.avg_render_seconds == 2.0
+        assert controller.retry_after() == 1
+
+    def test_waiting_callers_are_never_rejected(self):
+        """Test que los trabajos en segundo plano esperan un hueco en lugar de ser rechazados"""
+        async def scenario():
+            controller = AdmissionController(capacity=1, max_queue_depth=0)
+            release = asyncio.Event()
+
+            async def hold():
+                async with controller.admit():
+                    await release.wait()
+
+            holder = asyncio.create_task(hold())
+            await asyncio.sleep(0)
+
+            async def job():
+                async with controller.admit(reject=False):
+                    return controller.active
+
+            waiting = asyncio.create_task(job())
+            await asyncio.sleep(0)
+            assert controller.queue_depth == 1
+            release.set()
+            assert await waiting == 1
+            await holder
+            assert controller.rejected == 0
+
+        asyncio.run(scenario())
@@ -0,0 +1,80 @@
+import asyncio
+import os
+import time
+from app.attachment_cache import AttachmentCache
+from app.attachments import AttachmentFetcher
+from app.models import Document
+
+
+def _document(doc_id: str, payload: bytes, content_type: str = "application/pdf") -> Document:
+    return Document(id=doc_id, name=f"{doc_id}.pdf", signed_url="http://127.0.0.1:9/unreachable",
+                    content_type=content_type, size=len(payload))
+
+
+class TestAttachmentCache:
+    """Tests para la caché en disco de documentos adjuntos"""
+
+    def test_roundtrip_keyed_by_id_size_and_type(self, tmp_path):
+        """Test que la clave incluye el id, el tamaño y el tipo de contenido"""
+        cache = AttachmentCache(str(tmp_path), budget_bytes=1024 * 1024)
+        document = _document("presupuesto", b"%PDF presupuesto")
+        assert cache.put(document, b"%PDF presupuesto")
+        assert cache.get(document) == b"%PDF presupuesto"
+        assert cache.get(_document("presupuesto", b"%PDF presupuesto", "text/plain")) is None
+        assert cache.get(_document("presupuesto", b"%PDF otra version")) is None
+
+    def test_size_mismatch_is_not_cached(self, tmp_path):
+        """Test que no se guarda un contenido que no coincide con el tamaño declarado"""
+        cache = AttachmentCache(str(tmp_path), budget_bytes=1024 * 1024)
+        document = _document("acta", b"%PDF acta")
+        assert not cache.put(document, b"%PDF acta truncada")
+        assert cache.get(document) is None
+
+    def test_corrupted_entry_is_discarded(self, tmp_path):
+        """Test que un fichero dañado se detecta y se elimina"""
+        cache = AttachmentCache(str(tmp_path), budget_bytes=1024 * 1024)
+        document = _document("acta", b"%PDF acta")
+        cache.put(document, b"%PDF acta")
+        [path] = [entry.path for entry in os.scandir(str(tmp_path)) if entry.name.endswith(".bin")]
+        with open(path, "r+b") as f:
+            f.seek(-1, os.SEEK_END)
+            f.write(b"X")
+        assert cache.get(document) is None
+        assert not os.path.exists(path)
+        assert cache.stats()["corrupted"] == 1
+
+    def test_least_recently_used_is_evicted(self, tmp_path):
+        """Test que se eliminan primero los documentos usados hace más tiempo"""
+        cache = AttachmentCache(str(tmp_path), budget_bytes=2 * (64 + 100))
+        old, recent, new = (_document(name, bytes(100)) for name in ("old", "recent", "new"))
+        cache.put(old, bytes(100))
+        cache.put(recent, bytes(100))
+        past = time.time() - 60
+        for entry in os.scandir(str(tmp_path)):
+            if entry.name.endswith(".bin"):
+                os.utime(entry.path, (past, past))
+        assert cache.get(recent) is not None
+        cache.put(new, bytes(100))
+        assert cache.get(old) is None
+        assert cache.get(recent) is not None
+        assert cache.get(new) is not None
+
+    def test_seeded_documents_skip_the_network(self, tmp_path):
+        """Test que los documentos precargados se sirven sin conexión"""
+        seed_dir = tmp_path / "seed"
+        seed_dir.mkdir()
+        (seed_dir / "presupuesto.pdf").write_bytes(b"%PDF presupuesto")
+        cache = AttachmentCache(str(tmp_path / "cache"), budget_bytes=1024 * 1024)
+        assert cache.seed(str(seed_dir)) == 1
+        assert cache.seed(str(seed_dir)) == 0
+
+        fetcher = AttachmentFetcher(retries=1, cache=cache)
+
+        async def run():
+            try:
+                return await fetcher.fetch_all([_document("presupuesto", b"%PDF presupuesto")])
+            finally:
+                await fetcher.aclose()
+
+        assert asyncio.run(run()) == {"presupuesto": b"%PDF presupuesto"}
+        assert cache.stats()["hits"] == 1
@@ -0,0 +1,145 @@
+import asyncio
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from app.attachments import AttachmentFetcher, AttachmentFetchError, signed_url_expiry
+from app.models import Document
+
+
+class _DocumentServer(BaseHTTPRequestHandler):
+    """Servidor local que sirve documentos y simula fallos transitorios"""
+    hits = {}
+    active = 0
+    max_active = 0
+    lock = threading.Lock()
+
+    def do_GET(self):
+        cls = type(self)
+        with cls.lock:
+            cls.hits[self.path] = cls.hits.get(self.path, 0) + 1
+            cls.active += 1
+            cls.max_active = max(cls.max_active, cls.active)
+            attempt = cls.hits[self.path]
+        try:
+            time.sleep(0.05)
+            if self.path.startswith("/flaky") and attempt == 1:
+                self.send_response(503)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            if self.path.startswith("/redirect"):
+                self.send_response(302)
+                self.send_header("Location", self.path.replace("/redirect", "/doc", 1))
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            if self.path.startswith("/missing"):
+                self.send_response(404)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            body = f"%PDF {self.path}".encode()
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        finally:
+            with cls.lock:
+                cls.active -= 1
+
+    def log_message(self, *args):
+        pass
+
+
+def _document(doc_id: str, url: str) -> Document:
+    return Document(id=doc_id, name=f"{doc_id}.pdf", signed_url=url, content_type="application/pdf", size=0)
+
+
+class TestAttachmentFetcher:
+    """Tests para la descarga concurrente de documentos adjuntos"""
+
+    def _serve(self):
+        _DocumentServer.hits = {}
+        _DocumentServer.max_active = 0
+        server = ThreadingHTTPServer(("127.0.0.1", 0), _DocumentServer)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server, f"http://127.0.0.1:{server.server_port}"
+
+    def _fetch(self, fetcher, documents):
+        async def run():
+            try:
+                return await fetcher.fetch_all(documents)
+            finally:
+                await fetcher.aclose()
+        return asyncio.run(run())
+
+    def test_fetches_concurrently_within_host_limit(self):
+        """Test que las descargas van en paralelo sin superar el límite por host"""
+        server, base = self._serve()
+        try:
+            documents = [_document(f"doc{i}", f"{base}/doc{i}") for i in range(6)]
+            payloads = self._fetch(AttachmentFetcher(concurrency=8, per_host_limit=2, allow_private_hosts=True), documents)
+            assert payloads["doc3"] == b"%PDF /doc3"
+            assert len(payloads) == 6
+            assert _DocumentServer.max_active == 2
+        finally:
+            server.shutdown()
+
+    def test_transient_errors_are_retried(self):
+        """Test que un 503 se reintenta y un 404 no"""
+        server, base = self._serve()
+        try:
+            fetcher = AttachmentFetcher(retries=3, backoff=0, allow_private_hosts=True)
+            assert self._fetch(fetcher, [_document("flaky", f"{base}/flaky")]) == {"flaky": b"%PDF /flaky"}
+            assert _DocumentServer.hits["/flaky"] == 2
+
+            try:
+                self._fetch(AttachmentFetcher(retries=3, backoff=0, allow_private_hosts=True), [_document("missing", f"{base}/missing")])
+                assert False, "expected AttachmentFetchError"
+            except AttachmentFetchError as e:
+                assert "HTTP 404" in str(e)
+            assert _DocumentServer.hits["/missing"] == 1
+        finally:
+            server.shutdown()
+
+    def test_expired_signed_url_is_not_fetched(self):
+        """Test que una URL firmada caducada no se descarga"""
+        server, base = self._serve()
+        try:
+            url = f"{base}/expired?Expires={int(time.time()) - 60}"
+            try:
+                self._fetch(AttachmentFetcher(allow_private_hosts=True), [_document("expired", url)])
+                assert False, "expected AttachmentFetchError"
+            except AttachmentFetchError as e:
+                assert "expired" in str(e)
+            assert "/expired" not in "".join(_DocumentServer.hits)
+        finally:
+            server.shutdown()
+
+    def test_redirects_are_followed_and_checked(self):
+        """Test que se siguen las redirecciones y que no se descargan URLs de hosts privados"""
+        server, base = self._serve()
+        try:
+            fetched = self._fetch(AttachmentFetcher(allow_private_hosts=True), [_document("moved", f"{base}/redirect1")])
+            assert fetched == {"moved": b"%PDF /doc1"}
+
+            for url in (f"{base}/doc1", "http://169.254.169.254/latest/meta-data/", "file:///etc/passwd"):
+                _DocumentServer.hits = {}
+                try:
+                    self._fetch(AttachmentFetcher(retries=1), [_document("private", url)])
+                    assert False, "expected AttachmentFetchError"
+                except AttachmentFetchError as e:
+                    assert "URL not allowed" in str(e)
+                assert _DocumentServer.hits == {}
+        finally:
+            server.shutdown()
+
+    def test_signed_url_expiry_formats(self):
+        """Test de lectura de la caducidad de URLs firmadas de S3, GCS y Azure"""
+        s3 = "https://bucket.s3.amazonaws.com/a.pdf?X-Amz-Date=20250730T100000Z&X-Amz-Expires=600"
+        assert signed_url_expiry(s3) == 1753869600 + 600
+        gcs = "https://storage.googleapis.com/b/a.pdf?X-Goog-Date=20250730T100000Z&X-Goog-Expires=60"
+        assert signed_url_expiry(gcs) == 1753869600 + 60
+        assert signed_url_expiry("https://cdn.example.com/a.pdf?Expires=1753869600") == 1753869600
+        assert signed_url_expiry("https://x.blob.core.windows.net/a.pdf?se=2025-07-30T10:00:00Z") == 1753869600
+        assert signed_url_expiry("https://example.com/a.pdf") is None
@@ -0,0 +1,69 @@
+import asyncio
+import io
+import json
+import zipfile
+from app.batch import iter_json_items, iter_ndjson_items, stream_batch_zip
+
+
+def _meeting_notice(meeting_id: str) -> dict:
+    return {
+        "community": {
+            "address": "Calle de Albarracín, 33, Madrid",
+            "cif": "B12345676",
+            "coordinates": {"Lat": 40.43, "Long": -3.63},
+            "id": "01K1C1TN9A7JNZP6YMNVWJCHQ1",
+            "legal_name": "Nombre legal comunidad",
+            "name": "Nombre comunidad"
+        },
+        "meeting": {
+            "id": meeting_id,
+            "date_time": 1753919400000,
+            "description": "Reunión ordinaria",
+            "location": "Sala común",
+            "meeting_type": "ORDINARY",
+            "status": 1,
+            "title": "Junta General"
+        }
+    }
+
+
+async def _fake_render(request) -> bytes:
+    if request.meeting.id == "boom":
+        raise RuntimeError("render failed")
+    await asyncio.sleep(0)
+    return f"%PDF {request.meeting.id}".encode()
+
+
+def _collect(items, concurrency: int = 2) -> zipfile.ZipFile:
+    async def run():
+        chunks = [chunk async for chunk in stream_batch_zip(items, _fake_render, concurrency)]
+        return b"".join(chunks)
+    return zipfile.ZipFile(io.BytesIO(asyncio.run(run())))
+
+
+class TestBatchZip:
+    """Tests para la generación de lotes en ZIP"""
+
+    def test_failed_items_do_not_fail_the_batch(self):
+        """Test que los errores se reflejan en el manifiesto sin abortar el lote"""
+        items = [_meeting_notice("m1"), {"community": {}}, _meeting_notice("boom"), _meeting_notice("m2")]
+        archive = _collect(iter_json_items(items))
+
+        manifest = json.loads(archive.read("manifest.json"))
+        assert manifest["total"] == 4
+        assert manifest["succeeded"] == 2
+        assert [entry["status"] for entry in manifest["items"]] == ["ok", "error", "error", "ok"]
+        assert manifest["items"][2]["error"] == "render failed"
+        assert archive.read("0003_convocatoria_reunion_m2.pdf") == b"%PDF m2"
+
+    def test_ndjson_reports_invalid_lines(self):
+        """Test que las líneas NDJSON inválidas se registran como error"""
+        lines = [json.dumps(_meeting_notice("m1")).encode(), b"", b"{no es json", b"\n", b'{"id": "\xff"}']
+        archive = _collect(iter_ndjson_items(lines), concurrency=1)
+
+        manifest = json.loads(archive.read("manifest.json"))
+        assert manifest["total"] == 3
+        assert manifest["items"][0]["file"] == "0000_convocatoria_reunion_m1.pdf"
+        assert manifest["items"][1]["status"] == "error"
+        assert manifest["items"][2]["status"] == "error"
+        assert "utf-8" in manifest["items"][2]["error"]
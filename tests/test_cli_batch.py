@@ -0,0 +1,58 @@
+import json
+from app.cli_batch import BatchManifest, iter_batch_inputs, output_name
+
+
+class TestBatchInputs:
+    """Tests para la lectura de entradas del modo lote del CLI"""
+
+    def test_directory_glob_and_ndjson(self, tmp_path):
+        """Test que se leen directorios, patrones y NDJSON, marcando las entradas rotas"""
+        (tmp_path / "a.json").write_text(json.dumps({"meeting": {"id": "a"}}), encoding="utf-8")
+        (tmp_path / "b.json").write_text("{roto", encoding="utf-8")
+        (tmp_path / "notas.txt").write_text("no es json", encoding="utf-8")
+        ndjson = tmp_path / "lote.ndjson"
+        ndjson.write_text('{"meeting": {"id": "n1"}}\n\n{roto\n', encoding="utf-8")
+
+        items = list(iter_batch_inputs(str(tmp_path)))
+        assert [source.rsplit("/", 1)[-1] for source, _ in items] == ["a.json", "b.json"]
+        assert items[0][1] == {"meeting": {"id": "a"}}
+        assert isinstance(items[1][1], Exception)
+
+        assert [source for source, _ in iter_batch_inputs(str(tmp_path / "a*.json"))] == [str(tmp_path / "a.json")]
+
+        lines = list(iter_batch_inputs(str(ndjson)))
+        assert [source for source, _ in lines] == [f"{ndjson}:1", f"{ndjson}:3"]
+        assert isinstance(lines[1][1], Exception)
+
+
+class TestBatchManifest:
+    """Tests para el manifiesto que permite reanudar un lote"""
+
+    def test_resume_skips_finished_outputs(self, tmp_path):
+        """Test que solo se saltan las salidas existentes con el mismo contenido"""
+        manifest = BatchManifest(str(tmp_path / "manifest.ndjson"))
+        manifest.record({"source": "a.json", "file": "convocatoria_reunion_a.pdf", "key": "k1", "status": "ok"})
+        manifest.record({"source": "b.json", "file": "convocatoria_reunion_b.pdf", "key": "k2", "status": "error"})
+        manifest.close()
+        (tmp_path / "convocatoria_reunion_a.pdf").write_bytes(b"%PDF")
+        with open(tmp_path / "manifest.ndjson", "a", encoding="utf-8") as f:
+            f.write('{"source": "c.json", "fi')
+
+        resumed = BatchManifest(str(tmp_path / "manifest.ndjson"))
+        assert resumed.is_done("convocatoria_reunion_a.pdf", "k1", str(tmp_path))
+        assert not resumed.is_done("convocatoria_reunion_a.pdf", "otro", str(tmp_path))
+        assert not resumed.is_done("convocatoria_reunion_b.pdf", "k2", str(tmp_path))
+        resumed.record({"source": "b.json", "file": "convocatoria_reunion_b.pdf", "key": "k2", "status": "ok"})
+        resumed.close()
+        (tmp_path / "convocatoria_reunion_b.pdf").write_bytes(b"%PDF")
+        assert BatchManifest(str(tmp_path / "manifest.ndjson")).is_done("convocatoria_reunion_b.pdf", "k2",
+                                                                         str(tmp_path))
+
+    def test_inputs_sharing_a_meeting_id_do_not_collide(self):
+        """Test que las entradas con el mismo id de reunión no se sobrescriben"""
+        claimed = {}
+        assert output_name(claimed, "m1", "a" * 64) == "convocatoria_reunion_m1.pdf"
+        assert output_name(claimed, "m1", "b" * 64) == f"convocatoria_reunion_m1_{'b' * 12}.pdf"
+        assert output_name(claimed, "m1", "a" * 64) is None
+        assert output_name(claimed, "m1", "b" * 64) is None
+        assert output_name(claimed, "m2", "a" * 64) == "convocatoria_reunion_m2.pdf"
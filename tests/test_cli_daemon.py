@@ -0,0 +1,93 @@
+import os
+import threading
+import pytest
+from app.cli_daemon import DaemonUnavailable, RenderDaemon, call_daemon
+from app.models import MeetingNoticeRequest, Recipient
+from app.render_pool import RenderError
+from tests.test_batch import _meeting_notice
+
+
+class _FakePool:
+    size = 1
+
+    def __init__(self):
+        self.calls = []
+
+    def run_sync(self, method, *args, timeout=None, **kwargs):
+        self.calls.append((method, args, kwargs))
+        request = args[0]
+        if request.meeting.id == "boom":
+            raise RenderError("render failed", error_type="ValueError")
+        if method == "generate_mail_merge_pdfs":
+            return [f"%PDF {recipient.unit}".encode() for recipient in args[1]]
+        return f"%PDF {request.meeting.id}".encode()
+
+
+@pytest.fixture
+def daemon(tmp_path):
+    pool = _FakePool()
+    server = RenderDaemon(str(tmp_path / "render.sock"), pool)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server, pool
+    server.shutdown()
+    server.server_close()
+    thread.join()
+
+
+class TestCliDaemon:
+    """Tests para el demonio residente del CLI"""
+
+    def test_forwards_renders_with_attachments(self, daemon):
+        """Test que el demonio renderiza y devuelve lo mismo que el método en proceso"""
+        server, pool = daemon
+        request = MeetingNoticeRequest.model_validate(_meeting_notice("m1"))
+
+        pdf = call_daemon(server.socket_path, "generate_meeting_notice_pdf", request,
+                          attachments={"doc-1": b"\x00binario"}, deterministic=False, sections=["agenda"])
+        assert pdf == b"%PDF m1"
+        method, args, kwargs = pool.calls[0]
+        assert args[0] == request
+        assert kwargs == {"deterministic": False, "sections": ["agenda"], "attachments": {"doc-1": b"\x00binario"}}
+
+        recipients = [Recipient(name="Ana", unit="1-A", ballot_token="T1"),
+                      Recipient(name="Luis", unit="2-B", ballot_token="T2")]
+        pdfs = call_daemon(server.socket_path, "generate_mail_merge_pdfs", request, recipients)
+        assert pdfs == [b"%PDF 1-A", b"%PDF 2-B"]
+        assert os.stat(server.socket_path).st_mode & 0o777 == 0o600
+
+    def test_render_errors_are_reported(self, daemon):
+        """Test que un error de renderizado llega al cliente sin pasar a modo local"""
+        server, _ = daemon
+        request = MeetingNoticeRequest.model_validate(_meeting_notice("boom"))
+        with pytest.raises(RenderError) as error:
+            call_daemon(server.socket_path, "generate_meeting_notice_pdf", request)
+        assert error.value.error_type == "ValueError"
+
+        with pytest.raises(DaemonUnavailable):
+            call_daemon(server.socket_path, "warm_up", request)
+
+    def test_daemon_of_another_user_is_not_used(self, daemon, monkeypatch):
+        """Test que no se envían renderizados a un demonio de otro usuario"""
+        server, pool = daemon
+        request = MeetingNoticeRequest.model_validate(_meeting_notice("m1"))
+        uid = os.getuid()
+        monkeypatch.setattr(os, "getuid", lambda: uid + 1)
+        with pytest.raises(DaemonUnavailable):
+            call_daemon(server.socket_path, "generate_meeting_notice_pdf", request)
+        assert pool.calls == []
+
+    def test_unavailable_and_stale_socket(self, tmp_path):
+        """Test que sin demonio se pide el modo local y que un socket abandonado se reutiliza"""
+        path = str(tmp_path / "render.sock")
+        request = MeetingNoticeRequest.model_validate(_meeting_notice("m1"))
+        with pytest.raises(DaemonUnavailable):
+            call_daemon(path, "generate_meeting_notice_pdf", request)
+
+        RenderDaemon(path, _FakePool()).socket.close()
+        assert os.path.exists(path)
+        with pytest.raises(DaemonUnavailable):
+            call_daemon(path, "generate_meeting_notice_pdf", request)
+        server = RenderDaemon(path, _FakePool())
+        server.server_close()
+        assert not os.path.exists(path)
@@ -0,0 +1,84 @@
+import io
+import json
+import tarfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from app.cli_stream import EXIT_ALL_FAILED, EXIT_OK, EXIT_PARTIAL, exit_code, stream_tar
+from tests.test_batch import _meeting_notice
+
+
+def _render(request) -> bytes:
+    if request.meeting.id == "boom":
+        raise RuntimeError("render failed")
+    if request.meeting.id == "slow":
+        time.sleep(0.2)
+    return f"%PDF {request.meeting.id}".encode()
+
+
+def _run(lines, completion_order: bool = False, window: int = 4):
+    output, errors = io.BytesIO(), io.StringIO()
+    with ThreadPoolExecutor(max_workers=window) as executor:
+        summary = stream_tar(lines, output, errors, lambda request: executor.submit(_render, request),
+                             window=window, completion_order=completion_order, mtime=0)
+    output.seek(0)
+    archive = tarfile.open(fileobj=output, mode="r:")
+    names = archive.getnames()
+    contents = {name: archive.extractfile(name).read() for name in names}
+    return summary, names, contents, [json.loads(line) for line in errors.getvalue().splitlines()]
+
+
+def _ndjson(*items) -> list:
+    return [(item if isinstance(item, str) else json.dumps(item)).encode() + b"\n" for item in items]
+
+
+class TestStreamTar:
+    """Tests para el modo streaming del CLI (NDJSON a tar)"""
+
+    def test_input_order_and_error_stream(self):
+        """Test que el tar respeta el orden de entrada y los errores van aparte"""
+        lines = _ndjson(_meeting_notice("slow"), "{roto", "", _meeting_notice("boom"), _meeting_notice("m3"))
+        summary, names, contents, errors = _run(lines)
+
+        assert names == ["0000_convocatoria_reunion_slow.pdf", "0003_convocatoria_reunion_m3.pdf"]
+        assert contents["0003_convocatoria_reunion_m3.pdf"] == b"%PDF m3"
+        assert summary == {"rendered": 2, "failed": 2}
+        assert [(error["index"], error["line"]) for error in errors] == [(1, 2), (2, 4)]
+        assert errors[1]["meeting_id"] == "boom"
+
+    def test_completion_order(self):
+        """Test que con completion_order un PDF lento no retiene a los siguientes"""
+        lines = _ndjson(_meeting_notice("slow"), _meeting_notice("m1"), _meeting_notice("m2"))
+        _, names, _, _ = _run(lines, completion_order=True)
+        assert names[-1] == "0000_convocatoria_reunion_slow.pdf"
+        assert sorted(names[:2]) == ["0001_convocatoria_reunion_m1.pdf", "0002_convocatoria_reunion_m2.pdf"]
+
+    def test_pending_renders_stay_within_window(self):
+        """Test que nunca hay más renderizados pendientes que la ventana"""
+        lock = threading.Lock()
+        state = {"pending": 0, "peak": 0}
+
+        def submit(request):
+            with lock:
+                state["pending"] += 1
+                state["peak"] = max(state["peak"], state["pending"])
+            future = executor.submit(_render, request)
+
+            def done(_):
+                with lock:
+                    state["pending"] -= 1
+            future.add_done_callback(done)
+            return future
+
+        lines = (line for line in _ndjson(*[_meeting_notice(f"m{i}") for i in range(50)]))
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            summary = stream_tar(lines, io.BytesIO(), io.StringIO(), submit, window=3)
+        assert summary == {"rendered": 50, "failed": 0}
+        assert state["peak"] <= 3
+
+    def test_exit_code_summarises_failures(self):
+        """Test que el código de salida distingue éxito, fallo parcial y fallo total"""
+        assert exit_code({"rendered": 3, "failed": 0}) == EXIT_OK
+        assert exit_code({"rendered": 0, "failed": 0}) == EXIT_OK
+        assert exit_code({"rendered": 2, "failed": 1}) == EXIT_PARTIAL
+        assert exit_code({"rendered": 0, "failed": 2}) == EXIT_ALL_FAILED
@@ -0,0 +1,81 @@
+import io
+import json
+from concurrent.futures import ThreadPoolExecutor
+from app.cli_validate import EXIT_ERROR, EXIT_INVALID, EXIT_UNREADABLE, json_path, run_validate, validate_inputs
+from tests.test_batch import _meeting_notice
+
+
+def _export(tmp_path, broken=(3,)):
+    lines = []
+    for index in range(8):
+        payload = _meeting_notice(f"meeting-{index}")
+        if index in broken:
+            del payload["meeting"]["title"]
+            payload["meeting"]["meeting_points"] = [{"id": "p1"}]
+        lines.append(json.dumps(payload))
+    lines.insert(5, '{"community": ')
+    path = tmp_path / "export.ndjson"
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    return str(path)
+
+
+class TestCliValidate:
+    """Tests para el modo de validación del CLI"""
+
+    def test_reports_every_error_with_path_and_index(self, tmp_path):
+        """Test que se informan todos los errores de cada registro con su ruta JSON e índice"""
+        report = io.StringIO()
+        summary = validate_inputs([_export(tmp_path)], report)
+
+        assert summary == {"records": 9, "valid": 7, "invalid": 2}
+        entries = [json.loads(line) for line in report.getvalue().splitlines()]
+        assert [entry.get("index") for entry in entries[:-1]] == [3, 5]
+        assert entries[0]["source"].endswith("export.ndjson:4")
+        paths = {error["path"] for error in entries[0]["errors"]}
+        assert "$.meeting.title" in paths
+        assert "$.meeting.meeting_points[0].title" in paths
+        assert entries[1]["errors"][0]["type"] == "json_invalid"
+        assert entries[-1] == {"summary": summary}
+
+    def test_parallel_report_keeps_input_order(self, tmp_path, monkeypatch):
+        """Test que el informe en paralelo coincide con el secuencial"""
+        monkeypatch.setattr("app.cli_validate.CHUNK_SIZE", 2)
+        spec = _export(tmp_path, broken=(0, 3, 6, 7))
+        sequential = io.StringIO()
+        validate_inputs([spec], sequential)
+        parallel = io.StringIO()
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            validate_inputs([spec], parallel, executor, window=2)
+        assert parallel.getvalue() == sequential.getvalue()
+
+    def test_json_list_files_and_exit_codes(self, tmp_path):
+        """Test que un fichero con una lista valida cada elemento y los códigos de salida"""
+        invalid = _meeting_notice("meeting-1")
+        del invalid["community"]["cif"]
+        (tmp_path / "list.json").write_text(json.dumps([_meeting_notice("meeting-0"), invalid]),
+                                            encoding="utf-8")
+        report = io.StringIO()
+        assert run_validate([str(tmp_path / "list.json")], report) == EXIT_INVALID
+        entry = json.loads(report.getvalue().splitlines()[0])
+        assert entry["source"].endswith("list.json[1]")
+        assert entry["errors"][0]["path"] == "$.community.cif"
+
+        assert run_validate([str(tmp_path / "missing.json")], io.StringIO()) == EXIT_UNREADABLE
+        assert json_path(("meeting", "documents", 2, "size")) == "$.meeting.documents[2].size"
+
+    def test_undecodable_records_and_worker_failures(self, tmp_path, monkeypatch):
+        """Test que un registro que no es UTF-8 es inválido y que un fallo de un worker no termina con 0"""
+        (tmp_path / "latin1.ndjson").write_bytes(json.dumps(_meeting_notice("m0")).encode() + b"\n{\"x\": \"\xf1\"}\n")
+        (tmp_path / "latin1.json").write_bytes(b'[{"x": "\xf1"}]')
+        report = io.StringIO()
+        assert run_validate([str(tmp_path / "latin1.ndjson"), str(tmp_path / "latin1.json")], report,
+                            jobs=2) == EXIT_INVALID
+        entries = [json.loads(line) for line in report.getvalue().splitlines()]
+        assert [entry["errors"][0]["type"] for entry in entries[:-1]] == ["json_invalid", "json_invalid"]
+        assert entries[-1]["summary"] == {"records": 3, "valid": 1, "invalid": 2}
+
+        def crash(records):
+            raise RuntimeError("worker crashed")
+
+        monkeypatch.setattr("app.cli_validate.validate_chunk", crash)
+        assert run_validate([str(tmp_path / "latin1.ndjson")], io.StringIO()) == EXIT_ERROR
@@ -0,0 +1,164 @@
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+import pytest
+from app.jobs import QUEUED, SUCCEEDED, JobStore, post_webhook, validate_webhook_url
+from app.models import MeetingNoticeRequest
+
+
+def _request() -> MeetingNoticeRequest:
+    return MeetingNoticeRequest(**{
+        "community": {
+            "address": "Calle de Albarracín, 33, Madrid",
+            "cif": "B12345676",
+            "coordinates": {"Lat": 40.43, "Long": -3.63},
+            "id": "01K1C1TN9A7JNZP6YMNVWJCHQ1",
+            "legal_name": "Nombre legal comunidad",
+            "name": "Nombre comunidad"
+        },
+        "meeting": {
+            "id": "01K1C2MRFPSEW1DGB4JB3XG7FB",
+            "date_time": 1753919400000,
+            "description": "Reunión ordinaria",
+            "location": "Sala común",
+            "meeting_type": "ORDINARY",
+            "status": 1,
+            "title": "Junta General"
+        }
+    })
+
+
+class _WebhookStandIn(BaseHTTPRequestHandler):
+    received = []
+    status = 204
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        type(self).received.append(json.loads(body))
+        self.send_response(type(self).status)
+        if self.path == "/moved":
+            self.send_header("Location", "/hook")
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+class TestJobStore:
+    """Tests para el almacén de trabajos asíncronos"""
+
+    def test_job_lifecycle(self, tmp_path):
+        """Test de creación, actualización y resultado de un trabajo"""
+        store = JobStore(str(tmp_path), ttl_seconds=60)
+        job = store.create(_request(), webhook_url="http://localhost/hook")
+        assert job["status"] == QUEUED
+        assert store.unfinished()[0]["job_id"] == job["job_id"]
+        assert store.load_request(job["job_id"]).meeting.id == "01K1C2MRFPSEW1DGB4JB3XG7FB"
+
+        store.save_result(job["job_id"], b"%PDF")
+        store.update(job["job_id"], status=SUCCEEDED, finished_at=time.time())
+        assert store.get(job["job_id"])["status"] == SUCCEEDED
+        assert store.unfinished() == []
+        with open(store.result_path(job["job_id"]), "rb") as f:
+            assert f.read() == b"%PDF"
+
+    def test_unknown_or_invalid_ids(self, tmp_path):
+        """Test que los IDs desconocidos o mal formados no existen"""
+        store = JobStore(str(tmp_path), ttl_seconds=60)
+        assert store.get("0" * 32) is None
+        assert store.get("../../etc") is None
+
+    def test_claims_are_exclusive_until_released(self, tmp_path):
+        """Test que un trabajo solo lo reclama quien tiene el bloqueo y que queda libre al soltarlo"""
+        store = JobStore(str(tmp_path), ttl_seconds=60)
+        job_id = store.create(_request())["job_id"]
+        assert store.claim(job_id)
+        assert not store.claim(job_id)
+        assert not JobStore(str(tmp_path), ttl_seconds=60).claim(job_id)
+        store.release(job_id)
+
+        holder = subprocess.Popen([sys.executable, "-c", (
+            "import fcntl, os, sys, time\n"
+            f"fd = os.open({os.path.join(str(tmp_path), job_id, 'claim')!r}, os.O_WRONLY)\n"
+            "fcntl.flock(fd, fcntl.LOCK_EX)\n"
+            "print('locked', flush=True)\n"
+            "time.sleep(30)\n")], stdout=subprocess.PIPE, text=True)
+        try:
+            assert holder.stdout.readline().strip() == "locked"
+            assert not store.claim(job_id)
+        finally:
+            holder.kill()
+            holder.wait()
+        # The kernel drops the lock of a dead process, so its job can be claimed again
+        assert store.claim(job_id)
+
+    def test_cleanup_expired(self, tmp_path):
+        """Test que los trabajos caducados se eliminan"""
+        store = JobStore(str(tmp_path), ttl_seconds=60)
+        old = store.create(_request())
+        store.update(old["job_id"], finished_at=time.time() - 120)
+        recent = store.create(_request())
+        assert store.cleanup_expired() == 1
+        assert store.get(old["job_id"]) is None
+        assert store.get(recent["job_id"]) is not None
+        assert not os.path.exists(os.path.join(str(tmp_path), old["job_id"]))
+
+
+class TestWebhook:
+    """Tests para la notificación por webhook contra un servidor HTTP local"""
+
+    def _serve(self):
+        _WebhookStandIn.received = []
+        server = HTTPServer(("127.0.0.1", 0), _WebhookStandIn)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+
+    def test_webhook_delivered(self):
+        server = self._serve()
+        try:
+            _WebhookStandIn.status = 204
+            url = f"http://127.0.0.1:{server.server_port}/hook"
+            assert post_webhook(url, {"job_id": "abc", "status": SUCCEEDED}, timeout=5, allow_private=True)
+            assert _WebhookStandIn.received == [{"job_id": "abc", "status": SUCCEEDED}]
+        finally:
+            server.shutdown()
+
+    def test_webhook_retries_then_gives_up(self):
+        server = self._serve()
+        try:
+            _WebhookStandIn.status = 500
+            url = f"http://127.0.0.1:{server.server_port}/hook"
+            assert not post_webhook(url, {"job_id": "abc"}, timeout=5, retries=2, backoff=0,
+                                    allow_private=True)
+            assert len(_WebhookStandIn.received) == 2
+        finally:
+            server.shutdown()
+
+    def test_webhook_is_not_redirected_or_sent_to_private_hosts(self):
+        """Test que no se siguen redirecciones y que se comprueba el host al conectar"""
+        server = self._serve()
+        try:
+            _WebhookStandIn.status = 307
+            base = f"http://127.0.0.1:{server.server_port}"
+            assert not post_webhook(f"{base}/moved", {"job_id": "abc"}, timeout=5, retries=1, allow_private=True)
+            assert len(_WebhookStandIn.received) == 1
+
+            _WebhookStandIn.status = 204
+            assert not post_webhook(f"{base}/hook", {"job_id": "abc"}, timeout=5, retries=1)
+            assert len(_WebhookStandIn.received) == 1
+        finally:
+            server.shutdown()
+
+    def test_webhook_urls_are_validated(self):
+        """Test que solo se aceptan URLs http(s) con host público"""
+        validate_webhook_url("https://93.184.216.34/hook")
+        validate_webhook_url("http://127.0.0.1:8080/hook", allow_private=True)
+        for url in ("file:///etc/passwd", "ftp://example.com/x", "http:///hook", "not a url",
+                    "http://127.0.0.1/hook", "http://10.0.0.5/hook", "http://169.254.169.254/latest",
+                    "http://[::1]/hook", "http://localhost:8000/hook"):
+            with pytest.raises(ValueError):
+                validate_webhook_url(url)
@@ -0,0 +1,48 @@
+from app.layout_cache import LayoutCache
+
+
+class TestLayoutCache:
+    """Tests para la caché de secciones maquetadas"""
+
+    def test_layout_is_created_once(self):
+        """Test que una sección se maqueta una sola vez mientras su HTML no cambie"""
+        cache = LayoutCache(max_entries=4)
+        calls = []
+
+        def layout():
+            calls.append(1)
+            return object()
+
+        first = cache.get_or_create("hoja-votacion", layout)
+        assert cache.get_or_create("hoja-votacion", layout) is first
+        assert len(calls) == 1
+        assert cache.stats()["hits"] == 1
+
+    def test_least_recently_used_is_evicted(self):
+        """Test que se descarta la sección usada hace más tiempo"""
+        cache = LayoutCache(max_entries=2)
+        cache.put("convocatoria", 1)
+        cache.put("orden-del-dia", 2)
+        cache.get("convocatoria")
+        cache.put("modelo-representacion", 3)
+        assert cache.get("orden-del-dia") is None
+        assert cache.get("convocatoria") == 1
+        assert cache.stats()["entries"] == 2
+
+    def test_disabled_cache_stores_nothing(self):
+        """Test que con cero entradas la caché queda desactivada"""
+        cache = LayoutCache(max_entries=0)
+        cache.put("convocatoria", 1)
+        assert cache.get("convocatoria") is None
+
+    def test_expired_entries_are_dropped(self, monkeypatch):
+        """Test que los documentos caducan pasado su tiempo de vida"""
+        now = [1000.0]
+        monkeypatch.setattr("app.layout_cache.time.monotonic", lambda: now[0])
+        cache = LayoutCache(max_entries=4, ttl_seconds=120)
+        cache.put("convocatoria", 1)
+        now[0] += 60
+        assert cache.get("convocatoria") == 1
+        now[0] += 61
+        assert cache.get("convocatoria") is None
+        assert cache.stats()["entries"] == 0
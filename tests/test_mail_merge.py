@@ -0,0 +1,65 @@
+import io
+import os
+import zipfile
+import pytest
+from pydantic import ValidationError
+from app.mail_merge import recipient_file_name, zip_recipient_pdfs
+from app.models import MailMergeRequest, Recipient
+from app.template_registry import TemplateRegistry
+
+APP_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "app")
+
+
+def _context(sections, recipient=None) -> dict:
+    return {
+        "community": {"name": "Nombre comunidad", "legal_name": "Nombre legal", "cif": "B12345676",
+                      "address": "Calle de Albarracín, 33", "admin": None},
+        "meeting": {"id": "m1", "meeting_type": "ordinaria", "date_time": "30 de julio de 2025",
+                    "location_time": "19:30 horas", "location": "Sala común",
+                    "description": "Reunión ordinaria", "documents": [], "meeting_points": []},
+        "sections": list(sections),
+        "recipient": recipient,
+        "generated_at": "01/01/2025 a las 10:00 horas",
+        "format_file_size": str,
+        "get_vote_type_text": str,
+    }
+
+
+class TestMailMerge:
+    """Tests para la combinación de correspondencia por propietario"""
+
+    def test_recipient_pages_are_prefilled(self):
+        """Test que el modelo de representación se rellena con los datos del propietario"""
+        registry = TemplateRegistry(os.path.join(APP_DIR, "templates"), os.path.join(APP_DIR, "static"))
+        template = registry.get_template("meeting_notice.html")
+        recipient = Recipient(name="Ana Pérez", unit="3º B", ballot_token="TK-001")
+
+        owner_html = template.render(**_context(("voting_sheet", "proxy_form"), recipient))
+        assert "Ana Pérez" in owner_html
+        assert "3º B" in owner_html
+        assert "CONVOCATORIA DE JUNTA GENERAL" not in owner_html
+
+        shared_html = template.render(**_context(("convocation", "agenda", "documents")))
+        assert "CONVOCATORIA DE JUNTA GENERAL" in shared_html
+        assert "Modelo de Representación" not in shared_html
+
+    def test_zip_has_one_pdf_per_recipient(self):
+        """Test que el ZIP contiene un PDF por destinatario con nombre seguro"""
+        recipients = [Recipient(name="Ana", unit="3º B", ballot_token="TK-001"),
+                      Recipient(name="Luis", unit="../1A", ballot_token="TK-002")]
+        archive = zipfile.ZipFile(io.BytesIO(zip_recipient_pdfs("m1", recipients, [b"%PDF a", b"%PDF b"])))
+        assert archive.namelist() == [recipient_file_name(0, "m1", recipients[0]),
+                                      recipient_file_name(1, "m1", recipients[1])]
+        assert archive.namelist()[1] == "0001_convocatoria_reunion_m1_1A.pdf"
+        assert archive.read(archive.namelist()[0]) == b"%PDF a"
+
+    def test_recipients_are_required(self):
+        """Test que una combinación sin destinatarios no es válida"""
+        with pytest.raises(ValidationError):
+            MailMergeRequest(**{
+                "community": {"address": "Calle", "cif": "B1", "coordinates": {"Lat": 0, "Long": 0},
+                              "id": "c1", "legal_name": "Legal", "name": "Nombre"},
+                "meeting": {"id": "m1", "date_time": 0, "description": "", "location": "",
+                            "meeting_type": "ORDINARY", "status": 1, "title": ""},
+                "recipients": []
+            })
@@ -0,0 +1,61 @@
+from app.metrics import (Counter, Histogram, MetricsRegistry, ScrapedMetric, collect_render_stats,
+                         record_pages, render_phase, server_timing)
+
+
+class TestMetrics:
+    """Tests para las métricas Prometheus y los tiempos por fase"""
+
+    def test_histogram_buckets_are_cumulative(self):
+        """Test que los buckets del histograma son acumulativos y terminan en +Inf"""
+        histogram = Histogram("pdf_pages", "Pages", (1, 4, 16), ("endpoint",))
+        for pages in (1, 3, 3, 20):
+            histogram.observe(pages, endpoint="/generate")
+
+        lines = histogram.render()
+        assert lines[:2] == ["# HELP pdf_pages Pages", "# TYPE pdf_pages histogram"]
+        assert 'pdf_pages_bucket{endpoint="/generate",le="1"} 1' in lines
+        assert 'pdf_pages_bucket{endpoint="/generate",le="4"} 3' in lines
+        assert 'pdf_pages_bucket{endpoint="/generate",le="16"} 3' in lines
+        assert 'pdf_pages_bucket{endpoint="/generate",le="+Inf"} 4' in lines
+        assert 'pdf_pages_sum{endpoint="/generate"} 27' in lines
+        assert 'pdf_pages_count{endpoint="/generate"} 4' in lines
+
+    def test_registry_exposes_counters_and_scraped_values(self):
+        """Test que el registro expone contadores y valores leídos al consultar"""
+        registry = MetricsRegistry()
+        errors = registry.register(Counter("pdf_errors_total", "Errors", ("type",)))
+        depth = {"value": 2}
+        registry.register(ScrapedMetric("pdf_queue_depth", "Queue", lambda: depth["value"]))
+        registry.register(ScrapedMetric("pdf_cache_lookups_total", "Lookups",
+                                        lambda: {("hit",): 3, ("miss",): 1}, ("result",), kind="counter"))
+        errors.inc(type="RenderTimeoutError")
+        errors.inc(type="RenderTimeoutError")
+        depth["value"] = 5
+
+        text = registry.render()
+        assert 'pdf_errors_total{type="RenderTimeoutError"} 2\n' in text
+        assert "# TYPE pdf_queue_depth gauge\npdf_queue_depth 5\n" in text
+        assert "# TYPE pdf_cache_lookups_total counter\n" in text
+        assert 'pdf_cache_lookups_total{result="miss"} 1\n' in text
+
+    def test_render_phases_are_collected_per_render(self):
+        """Test que las fases y páginas solo se registran dentro de una recogida"""
+        with render_phase("layout"):
+            record_pages(3)
+
+        with collect_render_stats() as stats:
+            with render_phase("layout"):
+                pass
+            with render_phase("layout"):
+                pass
+            record_pages(2)
+            record_pages(3)
+
+        assert set(stats["phases"]) == {"layout"}
+        assert stats["phases"]["layout"] >= 0
+        assert stats["pages"] == 5
+
+    def test_server_timing_header(self):
+        """Test que la cabecera Server-Timing usa milisegundos y descripciones"""
+        header = server_timing({"cache": 0.0012, "total": 0.0015}, {"cache": "memory"})
+        assert header == 'cache;dur=1.2;desc="memory", total;dur=1.5'
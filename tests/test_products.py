@@ -0,0 +1,41 @@
+import shutil
+import pytest
+from app.products import document_info, rasterize
+
+
+class _Page:
+    def __init__(self, width: float, height: float):
+        self.width = width
+        self.height = height
+
+
+class _Metadata:
+    title = "Convocatoria de Reunión"
+
+
+class _Document:
+    def __init__(self, pages):
+        self.pages = pages
+        self.metadata = _Metadata()
+
+
+class TestProducts:
+    """Tests para la información de páginas y las miniaturas"""
+
+    def test_document_info_reports_pages_in_mm(self):
+        """Test que la información incluye el número de páginas y su tamaño en milímetros"""
+        a4 = _Page(793.7, 1122.5)
+        info = document_info(_Document([a4, a4]), ["convocation", "agenda"], "2025-07-30T10:00:00")
+        assert info["page_count"] == 2
+        assert info["pages"][1] == {"number": 2, "width_mm": 210.0, "height_mm": 297.0}
+        assert info["sections"] == ["convocation", "agenda"]
+        assert info["title"] == "Convocatoria de Reunión"
+
+    @pytest.mark.skipif(shutil.which("pdftoppm") is None, reason="pdftoppm no está instalado")
+    def test_rasterize_returns_png(self):
+        """Test que la miniatura de una página PDF es un PNG"""
+        pdf = (b"%PDF-1.4\n1 0 obj<</Type/Catalog/Pages 2 0 R>>endobj\n"
+               b"2 0 obj<</Type/Pages/Kids[3 0 R]/Count 1>>endobj\n"
+               b"3 0 obj<</Type/Page/Parent 2 0 R/MediaBox[0 0 595 842]>>endobj\n"
+               b"trailer<</Root 1 0 R>>\n%%EOF")
+        assert rasterize(pdf, 18).startswith(b"\x89PNG")
@@ -0,0 +1,118 @@
+import io
+import os
+import shutil
+import time
+import zipfile
+from app.models import MeetingNoticeRequest
+from app.profiler import ProfileStore, profile_render, redact_request
+from tests.test_batch import _meeting_notice
+
+
+def _request() -> MeetingNoticeRequest:
+    payload = _meeting_notice("01K1C2MRFPSEW1DGB4JB3XG7FB")
+    payload["community"]["admin"] = {"cif": "B00000000", "company": "Fincas SL", "email": "admin@example.com",
+                                     "is_internal": False, "name": "Ana López", "phone": "600000000"}
+    payload["meeting"]["documents"] = [{
+        "id": "doc-1", "name": "Presupuesto.pdf", "content_type": "application/pdf", "size": 1000,
+        "signed_url": "https://storage.example.com/doc-1.pdf?X-Goog-Signature=abc&X-Goog-Expires=900",
+    }]
+    return MeetingNoticeRequest(**payload)
+
+
+def _profiled_stats() -> dict:
+    stats = {"phases": {"layout": 0.25}, "pages": 3}
+    with profile_render(stats, 0.0):
+        sum(range(1000))
+    return stats
+
+
+class TestProfiler:
+    """Tests para las capturas de perfilado de renderizados lentos"""
+
+    def test_profile_kept_only_past_threshold(self):
+        """Test que el perfil solo se conserva si el renderizado supera el umbral"""
+        fast = {}
+        with profile_render(fast, 60.0):
+            pass
+        assert "profile" not in fast
+
+        not_profiled = {}
+        with profile_render(not_profiled, None):
+            pass
+        assert not_profiled == {}
+
+        assert isinstance(_profiled_stats()["profile"], bytes)
+
+    def test_redact_request_masks_credentials_and_personal_data(self):
+        """Test que la petición guardada no contiene firmas de URLs ni datos personales"""
+        payload = redact_request(_request())
+        assert payload["community"]["cif"] == "*********"
+        assert payload["community"]["admin"]["email"] == "*" * len("admin@example.com")
+        assert payload["community"]["admin"]["company"] == "Fincas SL"
+        assert payload["meeting"]["documents"][0]["signed_url"] == "https://storage.example.com/doc-1.pdf"
+        assert payload["meeting"]["description"] == "Reunión ordinaria"
+        MeetingNoticeRequest(**payload)
+
+    def test_threshold_sampling(self, tmp_path):
+        """Test que las peticiones solicitadas siempre se perfilan y el muestreo respeta la configuración"""
+        disabled = ProfileStore(str(tmp_path), slow_seconds=0.0)
+        assert disabled.threshold() is None
+        assert disabled.threshold(requested=True) == 0.0
+
+        sampled = ProfileStore(str(tmp_path), slow_seconds=2.0, sample_rate=1.0)
+        assert sampled.threshold() == 2.0
+        assert ProfileStore(str(tmp_path), slow_seconds=2.0, sample_rate=0.0).threshold() is None
+
+    def test_save_list_and_download_capture(self, tmp_path):
+        """Test que una captura se guarda, se lista y se descarga completa en un ZIP"""
+        store = ProfileStore(str(tmp_path))
+        capture_id = store.save(_request(), _profiled_stats(), 2.5, "slow", "/meeting-notice/generate-pdf")
+
+        [capture] = store.captures()
+        assert capture["capture_id"] == capture_id
+        assert capture["reason"] == "slow"
+        assert capture["phases_ms"] == {"layout": 250.0}
+        assert capture["pages"] == 3
+
+        archive = zipfile.ZipFile(io.BytesIO(store.archive(capture_id)))
+        assert sorted(name.split("/")[1] for name in archive.namelist()) == [
+            "capture.json", "profile.prof", "request.json", "summary.txt"]
+        assert b"B12345676" not in archive.read(f"{capture_id}/request.json")
+        assert store.archive("../etc") is None
+        assert store.archive("20250101T000000-00000000") is None
+
+    def test_retention_limits(self, tmp_path):
+        """Test que se eliminan las capturas caducadas y las que superan el máximo"""
+        store = ProfileStore(str(tmp_path), max_captures=3, ttl_seconds=3600)
+        request = _request()
+        ids = [store.save(request, _profiled_stats(), 1.0, "slow", "/jobs") for _ in range(3)]
+        for age, capture_id in enumerate(ids):
+            past = time.time() - (3 - age) * 60
+            os.utime(os.path.join(str(tmp_path), capture_id), (past, past))
+
+        store.max_captures = 2
+        assert store.prune() == 1
+        assert {capture["capture_id"] for capture in store.captures()} == set(ids[1:])
+
+        expired = time.time() - 7200
+        os.utime(os.path.join(str(tmp_path), ids[1]), (expired, expired))
+        assert store.prune() == 1
+        assert [capture["capture_id"] for capture in store.captures()] == [ids[2]]
+
+    def test_prune_skips_captures_removed_by_another_worker(self, tmp_path, monkeypatch):
+        """Test que la limpieza ignora las capturas que otro worker borró entre listarlas y consultarlas"""
+        store = ProfileStore(str(tmp_path), max_captures=10, ttl_seconds=3600)
+        request = _request()
+        ids = [store.save(request, _profiled_stats(), 1.0, "slow", "/jobs") for _ in range(2)]
+        real_listdir = os.listdir
+
+        def listdir_then_remove(path):
+            names = real_listdir(path)
+            if path == str(tmp_path):
+                shutil.rmtree(os.path.join(path, ids[0]))
+            return names
+
+        monkeypatch.setattr("app.profiler.os.listdir", listdir_then_remove)
+        assert store.prune() == 0
+        monkeypatch.undo()
+        assert [capture["capture_id"] for capture in store.captures()] == [ids[1]]
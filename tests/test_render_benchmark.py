@@ -0,0 +1,47 @@
+from benchmarks.render import PHASES, SCENARIOS, compare, synthetic_request
+from app.models import MeetingNoticeRequest
+
+
+def _results(total: float, layout: float, pages: int = 3) -> dict:
+    phases = {phase: 1.0 for phase in PHASES}
+    phases["layout"] = layout
+    return {
+        "environment": {"python": "3.11", "weasyprint": "62.3", "templates": "abc", "cpus": 4},
+        "scenarios": {"typical": {"phases_ms": phases, "total_ms": total, "pages": pages, "bytes": 1000}},
+    }
+
+
+class TestRenderBenchmark:
+    """Tests para la suite de benchmarks del renderizado"""
+
+    def test_synthetic_payloads_are_valid_and_stable(self):
+        """Test que las peticiones sintéticas validan, tienen el tamaño pedido y no cambian"""
+        for params in SCENARIOS.values():
+            request = MeetingNoticeRequest.model_validate(synthetic_request(**params))
+            assert len(request.meeting.meeting_points) == params["points"]
+            assert len(request.meeting.documents) == params["documents"]
+            assert len(request.meeting.description) <= params["description_chars"] + 1
+        assert synthetic_request(**SCENARIOS["large"]) == synthetic_request(**SCENARIOS["large"])
+
+        voted = synthetic_request(points=3, documents=0, description_chars=50, voting_options=25)
+        assert len(voted["meeting"]["meeting_points"][0]["voting"]["options"]) == 25
+
+    def test_compare_flags_only_significant_slowdowns(self):
+        """Test que solo cuentan las regresiones por encima de la tolerancia y del mínimo absoluto"""
+        baseline = _results(total=100.0, layout=80.0)
+
+        regressions, notes = compare(_results(total=110.0, layout=90.0), baseline, 0.25, 5.0)
+        assert regressions == [] and notes == []
+
+        regressions, _ = compare(_results(total=150.0, layout=130.0), baseline, 0.25, 5.0)
+        assert [regression.split(":")[0] for regression in regressions] == ["typical.layout", "typical.total"]
+
+        # Relative jump on a tiny phase stays below the absolute threshold
+        slow_small = _results(total=100.0, layout=80.0)
+        slow_small["scenarios"]["typical"]["phases_ms"]["context"] = 3.0
+        assert compare(slow_small, baseline, 0.25, 5.0)[0] == []
+
+        changed = _results(total=100.0, layout=80.0, pages=4)
+        changed["environment"]["weasyprint"] = "63.0"
+        _, notes = compare(changed, baseline, 0.25, 5.0)
+        assert notes == ["typical: pages 3 -> 4", "environment: weasyprint 62.3 -> 63.0"]
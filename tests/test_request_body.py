@@ -0,0 +1,62 @@
+import gzip
+import json
+import pytest
+from fastapi import HTTPException
+from fastapi.exceptions import RequestValidationError
+from app.models import MeetingNoticeRequest
+from app.request_body import decompress_gzip, parse_body
+from tests.test_batch import _meeting_notice
+
+MEETING_ID = "01K1C2MRFPSEW1DGB4JB3XG7FB"
+
+
+def _body() -> bytes:
+    return json.dumps(_meeting_notice(MEETING_ID)).encode("utf-8")
+
+
+class TestRequestBody:
+    """Tests para la lectura de cuerpos JSON, gzip y MessagePack"""
+
+    def test_json_and_gzip_bodies(self):
+        """Test que un cuerpo JSON y el mismo comprimido con gzip producen la misma convocatoria"""
+        plain = parse_body(MeetingNoticeRequest, _body(), "application/json; charset=utf-8")
+        compressed = parse_body(MeetingNoticeRequest, gzip.compress(_body()), None, "gzip")
+        assert plain.meeting.id == MEETING_ID
+        assert compressed == plain
+
+    def test_validation_errors_point_at_the_body(self):
+        """Test que los errores de validación y de JSON se devuelven como los de FastAPI"""
+        payload = _meeting_notice(MEETING_ID)
+        del payload["meeting"]["title"]
+        with pytest.raises(RequestValidationError) as invalid:
+            parse_body(MeetingNoticeRequest, json.dumps(payload).encode("utf-8"), "application/json")
+        assert invalid.value.errors()[0]["loc"] == ("body", "meeting", "title")
+
+        with pytest.raises(RequestValidationError) as malformed:
+            parse_body(MeetingNoticeRequest, b'{"community": ', "application/json")
+        assert malformed.value.errors()[0]["type"] == "json_invalid"
+
+    def test_unsupported_encodings_and_gzip_bombs(self):
+        """Test que se rechazan codificaciones desconocidas y cuerpos que se descomprimen de más"""
+        with pytest.raises(HTTPException) as encoding:
+            parse_body(MeetingNoticeRequest, _body(), "application/json", "br")
+        assert encoding.value.status_code == 415
+
+        with pytest.raises(HTTPException) as content_type:
+            parse_body(MeetingNoticeRequest, _body(), "text/plain")
+        assert content_type.value.status_code == 415
+
+        with pytest.raises(HTTPException) as bomb:
+            decompress_gzip(gzip.compress(b"0" * 10_000), max_bytes=1_000)
+        assert bomb.value.status_code == 413
+
+        with pytest.raises(HTTPException) as truncated:
+            decompress_gzip(gzip.compress(_body())[:-20])
+        assert truncated.value.status_code == 400
+
+    def test_msgpack_body(self):
+        """Test que un cuerpo MessagePack produce la misma convocatoria que el JSON"""
+        msgpack = pytest.importorskip("msgpack")
+        packed = msgpack.packb(_meeting_notice(MEETING_ID))
+        assert parse_body(MeetingNoticeRequest, packed, "application/msgpack") == \
+            parse_body(MeetingNoticeRequest, _body(), "application/json")
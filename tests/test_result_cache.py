@@ -0,0 +1,103 @@
+from app.models import Coordinates
+from app.result_cache import ResultCache, canonical_request_hash
+
+
+class TestResultCache:
+    """Tests para la caché de PDFs generados"""
+
+    def test_canonical_hash_ignores_key_order(self):
+        """Test que el hash canónico no depende del orden de los campos"""
+        first = Coordinates(**{"Lat": 40.4, "Long": -3.6})
+        second = Coordinates(**{"Long": -3.6, "Lat": 40.4})
+        assert canonical_request_hash(first) == canonical_request_hash(second)
+        assert canonical_request_hash(first) != canonical_request_hash(Coordinates(Lat=40.5, Long=-3.6))
+
+    def test_make_key_depends_on_fingerprint_and_variant(self):
+        """Test que la clave cambia con la huella de plantillas y las opciones"""
+        request = Coordinates(Lat=40.4, Long=-3.6)
+        base = ResultCache.make_key(request, "a" * 64)
+        assert base != ResultCache.make_key(request, "b" * 64)
+        assert base != ResultCache.make_key(request, "a" * 64, deterministic=True)
+
+    def test_memory_tier_respects_byte_budget(self):
+        """Test que el LRU en memoria expulsa las entradas más antiguas"""
+        cache = ResultCache(memory_budget_bytes=10)
+        cache.put("a", b"12345")
+        cache.put("b", b"12345")
+        assert cache.get("a") == ("memory", b"12345")
+        cache.put("c", b"12345")
+        assert cache.get("b") is None
+        assert cache.get("a") is not None
+        assert cache.get("c") is not None
+
+    def test_disk_tier_serves_paths_and_evicts_by_size(self, tmp_path):
+        """Test que el nivel de disco devuelve rutas y respeta su tamaño máximo"""
+        cache = ResultCache(memory_budget_bytes=0, disk_dir=str(tmp_path), disk_budget_bytes=10)
+        cache.put("a", b"12345")
+        cache.put("b", b"12345")
+        tier, path = cache.get("a")
+        assert tier == "disk"
+        with open(path, "rb") as f:
+            assert f.read() == b"12345"
+
+        cache.put("c", b"12345")
+        assert cache.get("b") is None
+        assert sorted(p.name for p in tmp_path.iterdir()) == ["a.pdf", "c.pdf"]
+
+        reopened = ResultCache(memory_budget_bytes=0, disk_dir=str(tmp_path), disk_budget_bytes=10)
+        assert reopened.get("c")[0] == "disk"
+
+    def test_contains_does_not_count_lookups(self, tmp_path):
+        """Test que comprobar si una entrada existe no altera las estadísticas"""
+        cache = ResultCache(memory_budget_bytes=0, disk_dir=str(tmp_path), disk_budget_bytes=100)
+        cache.put("a", b"12345")
+        assert cache.contains("a")
+        assert not cache.contains("b")
+        assert cache.stats()["misses"] == 0
+        assert cache.stats()["disk_hits"] == 0
+
+    def test_put_file_moves_rendered_pdf_into_disk_tier(self, tmp_path):
+        """Test que un PDF escrito en un fichero se mueve al nivel de disco sin copiarlo"""
+        cache = ResultCache(memory_budget_bytes=0, disk_dir=str(tmp_path / "cache"), disk_budget_bytes=10)
+        rendered = tmp_path / "cache" / "render.tmp"
+        rendered.write_bytes(b"12345")
+        path = cache.put_file("a", str(rendered))
+        assert not rendered.exists()
+        assert cache.get("a") == ("disk", path)
+
+        too_large = tmp_path / "cache" / "large.tmp"
+        too_large.write_bytes(b"0" * 11)
+        assert cache.put_file("b", str(too_large)) is None
+        assert too_large.exists()
+        assert cache.get("b") is None
+
+    def test_disk_tier_is_shared_between_processes(self, tmp_path):
+        """Test que dos cachés sobre el mismo directorio comparten entradas y presupuesto"""
+        first = ResultCache(memory_budget_bytes=0, disk_dir=str(tmp_path), disk_budget_bytes=10)
+        second = ResultCache(memory_budget_bytes=0, disk_dir=str(tmp_path), disk_budget_bytes=10)
+        first.put("a", b"12345")
+        assert second.get("a")[0] == "disk"
+        assert second.contains("a")
+
+        second.put("b", b"12345")
+        assert first.get("a")[0] == "disk"
+        first.put("c", b"12345")
+        assert sorted(p.name for p in tmp_path.iterdir()) == ["a.pdf", "c.pdf"]
+        assert second.get("b") is None
+        assert first.stats()["disk_bytes"] == 10
+
+    def test_products_are_stored_with_their_own_suffix_and_budget(self, tmp_path):
+        """Test que la información de páginas y las miniaturas no se guardan como PDF ni usan su presupuesto"""
+        pdfs = ResultCache(memory_budget_bytes=0, disk_dir=str(tmp_path), disk_budget_bytes=10)
+        products = ResultCache(memory_budget_bytes=0, disk_dir=str(tmp_path / "products"), disk_budget_bytes=10,
+                               suffixes=(".json", ".png"))
+        pdfs.put("a", b"12345")
+        products.put("a", b"{}", ".json")
+        products.put("b", b"12345678", ".png")
+        pdfs.put("c", b"12345")
+
+        assert sorted(p.name for p in (tmp_path / "products").iterdir()) == ["a.json", "b.png"]
+        assert products.get("b", ".png") == ("disk", str(tmp_path / "products" / "b.png"))
+        assert products.get("b") is None
+        assert pdfs.get("a")[0] == "disk"
+        assert pdfs.stats()["disk_bytes"] == 10
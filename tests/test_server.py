@@ -0,0 +1,105 @@
+import signal
+import subprocess
+import sys
+import time
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import httpx
+import pytest
+from app.render_pool import RenderPool, RenderTimeoutError
+from app.server import bind_socket
+
+_SERVER = """
+import logging
+import sys
+from app.server import PreforkServer, bind_socket
+
+async def app(scope, receive, send):
+    if scope["type"] != "http":
+        return
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"ok"})
+
+logging.basicConfig(level=logging.INFO)
+
+PreforkServer(app, bind_socket("127.0.0.1", int(sys.argv[1])), workers=2, max_requests=2,
+              graceful_timeout=2).run()
+"""
+
+
+class TestPreforkServer:
+    """Tests para el servidor de producción con workers preforkeados"""
+
+    def test_workers_are_replaced_and_drained(self):
+        """Test que los workers se reemplazan tras el máximo de peticiones y SIGTERM termina limpio"""
+        sock = bind_socket("127.0.0.1", 0)
+        port = sock.getsockname()[1]
+        sock.close()
+        process = subprocess.Popen([sys.executable, "-c", _SERVER, str(port)],
+                                   stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+        try:
+            statuses = []
+            deadline = time.monotonic() + 20
+            while len(statuses) < 10 and time.monotonic() < deadline:
+                try:
+                    statuses.append(httpx.get(f"http://127.0.0.1:{port}/", timeout=5).status_code)
+                except httpx.TransportError:
+                    time.sleep(0.1)
+            assert statuses == [200] * 10
+        finally:
+            process.send_signal(signal.SIGTERM)
+            output, _ = process.communicate(timeout=20)
+
+        assert process.returncode == 0
+        assert "exited with code 0" in output
+        assert "Server stopped" in output
+
+    def test_thread_pool_asks_to_replace_the_worker(self):
+        """Test que un renderizado atascado o el máximo de renderizados piden reemplazar el worker"""
+        release = threading.Event()
+
+        class _Generator:
+            def slow(self):
+                release.wait(10)
+
+            def fast(self):
+                return b"%PDF"
+
+        pool = RenderPool(mode="thread", workers=1, max_jobs_per_worker=2, timeout=0.2)
+        pool._generator = _Generator()
+        pool._executor = ThreadPoolExecutor(max_workers=1)
+        pool._started = True
+        reasons = []
+        pool.recycle_process = reasons.append
+
+        async def scenario():
+            assert await pool.run("fast") == b"%PDF"
+            with pytest.raises(RenderTimeoutError):
+                await pool.run("slow")
+            assert not pool.ready
+            release.set()
+            await asyncio.sleep(0.1)
+            assert pool.ready
+
+        try:
+            asyncio.run(scenario())
+        finally:
+            release.set()
+            pool._executor.shutdown()
+        assert reasons == ["render exceeded its deadline"]
+
+        pool = RenderPool(mode="thread", workers=1, max_jobs_per_worker=2)
+        pool._generator = _Generator()
+        pool._executor = ThreadPoolExecutor(max_workers=1)
+        pool._started = True
+        reasons = []
+        pool.recycle_process = reasons.append
+
+        async def renders():
+            for _ in range(3):
+                await pool.run("fast")
+
+        asyncio.run(renders())
+        pool._executor.shutdown()
+        assert reasons == ["max jobs reached"]
@@ -0,0 +1,66 @@
+import asyncio
+import pytest
+from app.singleflight import SingleFlight
+
+
+class TestSingleFlight:
+    """Tests para la deduplicación de renderizados concurrentes idénticos"""
+
+    def test_concurrent_calls_share_one_render(self):
+        """Test que las llamadas concurrentes con la misma clave comparten resultado"""
+        calls = []
+
+        async def render():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return b"%PDF"
+
+        async def run():
+            flight = SingleFlight()
+            results = await asyncio.gather(*[flight.do("key", render) for _ in range(5)])
+            return flight, results
+
+        flight, results = asyncio.run(run())
+        assert results == [b"%PDF"] * 5
+        assert len(calls) == 1
+        assert flight.stats() == {"in_flight": 0, "renders": 1, "renders_saved": 4}
+
+    def test_failure_reaches_every_waiter_and_releases_key(self):
+        """Test que un error llega a todos los que esperan y libera la clave"""
+        async def failing():
+            await asyncio.sleep(0.01)
+            raise RuntimeError("render failed")
+
+        async def run():
+            flight = SingleFlight()
+            results = await asyncio.gather(*[flight.do("key", failing) for _ in range(3)],
+                                           return_exceptions=True)
+            retry = await flight.do("key", lambda: asyncio.sleep(0, result=b"%PDF"))
+            return flight, results, retry
+
+        flight, results, retry = asyncio.run(run())
+        assert all(isinstance(result, RuntimeError) for result in results)
+        assert retry == b"%PDF"
+        assert flight.stats()["in_flight"] == 0
+        assert flight.waiters("key") == 0
+
+    def test_cancelled_waiter_does_not_cancel_the_others(self):
+        """Test que cancelar a quien inició el renderizado no afecta al resto"""
+        async def render():
+            await asyncio.sleep(0.05)
+            return b"%PDF"
+
+        async def run():
+            flight = SingleFlight()
+            leader = asyncio.create_task(flight.do("key", render))
+            await asyncio.sleep(0)
+            follower = asyncio.create_task(flight.do("key", render))
+            await asyncio.sleep(0)
+            leader.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await leader
+            return await follower, flight.waiters("key")
+
+        result, waiters = asyncio.run(run())
+        assert result == b"%PDF"
+        assert waiters == 0
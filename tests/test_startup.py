@@ -0,0 +1,30 @@
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _loaded_modules(module: str) -> set:
+    """Modules loaded by importing ``module`` in a fresh interpreter"""
+    result = subprocess.run(
+        [sys.executable, "-c", f"import sys, {module}; print(chr(10).join(sys.modules))"],
+        cwd=ROOT, env=dict(os.environ, PYTHONPATH=ROOT), capture_output=True, text=True, check=True,
+    )
+    return {name.split(".")[0] for name in result.stdout.split()} | set(result.stdout.split())
+
+
+class TestStartupImports:
+    """Tests para el grafo de imports del arranque del CLI y de la API"""
+
+    def test_cli_does_not_load_the_rendering_stack(self):
+        """Test que importar el CLI no carga WeasyPrint, httpx ni la API"""
+        loaded = _loaded_modules("app.cli")
+        for heavy in ("weasyprint", "httpx", "fastapi", "uvicorn", "jinja2", "app.pdf_generator"):
+            assert heavy not in loaded
+
+    def test_api_does_not_load_weasyprint(self):
+        """Test que la API no carga WeasyPrint en el proceso principal"""
+        loaded = _loaded_modules("app.main")
+        assert "weasyprint" not in loaded
+        assert "app.pdf_generator" not in loaded
@@ -0,0 +1,48 @@
+import os
+from app.template_registry import TemplateRegistry
+
+
+class TestTemplateRegistry:
+    """Tests para el registro de plantillas compiladas"""
+
+    def _make_registry(self, tmp_path):
+        template_dir = tmp_path / "templates"
+        static_dir = tmp_path / "static"
+        template_dir.mkdir()
+        static_dir.mkdir()
+        (template_dir / "notice.html").write_text("Hola {{ name }}", encoding="utf-8")
+        (static_dir / "styles.css").write_text("body { color: black; }", encoding="utf-8")
+        registry = TemplateRegistry(str(template_dir), str(static_dir),
+                                    bytecode_cache_dir=str(tmp_path / "bytecode"))
+        return registry, template_dir, static_dir
+
+    def test_template_is_compiled_once(self, tmp_path):
+        """Test que la plantilla compilada se reutiliza entre llamadas"""
+        registry, _, _ = self._make_registry(tmp_path)
+        first = registry.get_template("notice.html")
+        second = registry.get_template("notice.html")
+        assert first is second
+        assert first.render(name="Ana") == "Hola Ana"
+
+    def test_template_reloads_after_edit(self, tmp_path):
+        """Test que una edición de la plantilla se aplica sin reiniciar"""
+        registry, template_dir, _ = self._make_registry(tmp_path)
+        registry.get_template("notice.html")
+        path = template_dir / "notice.html"
+        path.write_text("Adiós {{ name }}", encoding="utf-8")
+        stat = path.stat()
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+        assert registry.get_template("notice.html").render(name="Ana") == "Adiós Ana"
+
+    def test_fingerprint_tracks_content(self, tmp_path):
+        """Test que la huella cambia solo cuando cambia el contenido"""
+        registry, _, static_dir = self._make_registry(tmp_path)
+        before = registry.fingerprint("styles.css")
+        css_path = static_dir / "styles.css"
+        stat = css_path.stat()
+        os.utime(css_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+        assert registry.fingerprint("styles.css") == before
+
+        css_path.write_text("body { color: red; }", encoding="utf-8")
+        os.utime(css_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 2_000_000_000))
+        assert registry.fingerprint("styles.css") != before
@@ -0,0 +1,37 @@
+import os
+from app.sections import SECTIONS, sections_with_content
+from app.warmup import configure_font_cache, warm_up_request
+
+
+class TestWarmUp:
+    """Tests para el calentamiento de los workers de renderizado"""
+
+    def test_warm_up_request_fills_every_section(self):
+        """Test que la convocatoria sintética tiene contenido en todas las secciones"""
+        request = warm_up_request()
+        assert sections_with_content(request, SECTIONS) == list(SECTIONS)
+        vote_types = {point.voting.voteType for point in request.meeting.meeting_points}
+        assert len(vote_types) == 3
+
+    def test_configure_font_cache(self, tmp_path, monkeypatch):
+        """Test que fontconfig usa el directorio de caché indicado e incluye la configuración del sistema"""
+        monkeypatch.delenv("FONTCONFIG_FILE", raising=False)
+        cache_dir = str(tmp_path / "fonts")
+
+        config_path = configure_font_cache(cache_dir, system_conf="/etc/fonts/fonts.conf")
+
+        assert os.environ["FONTCONFIG_FILE"] == config_path
+        with open(config_path, encoding="utf-8") as f:
+            config = f.read()
+        assert f"<cachedir>{cache_dir}</cachedir>" in config
+        assert '<include ignore_missing="yes">/etc/fonts/fonts.conf</include>' in config
+
+    def test_configure_font_cache_keeps_explicit_config(self, tmp_path, monkeypatch):
+        """Test que no se sobrescribe un FONTCONFIG_FILE explícito ni se configura sin directorio"""
+        monkeypatch.setenv("FONTCONFIG_FILE", "/custom/fonts.conf")
+        assert configure_font_cache(str(tmp_path)) is None
+        assert os.environ["FONTCONFIG_FILE"] == "/custom/fonts.conf"
+
+        monkeypatch.delenv("FONTCONFIG_FILE")
+        assert configure_font_cache("") is None
+        assert "FONTCONFIG_FILE" not in os.environ